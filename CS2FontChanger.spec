@@ -19,6 +19,8 @@ a = Analysis(
         'PyQt5.QtWebEngineWidgets',
         'fontTools.ttLib',
         'requests',
+        'bsdiff4',  # Delta updates, optional at runtime
+        'zstandard',
     ],
     hookspath=[],
     hooksconfig={},
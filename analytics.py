@@ -0,0 +1,199 @@
+"""
+CS2 Font Changer - Analytics Spool
+Queues launch analytics in a local spool file and sends them together from one background thread
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import threading
+import http.client
+from pathlib import Path
+from urllib.parse import urlsplit
+from version import CURRENT_VERSION
+
+# CS2FC_ANALYTICS_URL points the spool at another endpoint, e.g. localserver.py
+ANALYTICS_URL = os.environ.get('CS2FC_ANALYTICS_URL', "https://conspiracy.moe/cs2fc.php")
+ANALYTICS_TIMEOUT = 5
+
+SPOOL_FILE_NAME = "analytics_spool.jsonl"
+MAX_SPOOL_BYTES = 256 * 1024  # Stop queueing when offline for a very long time
+FLUSH_DELAY = 20  # Seconds after launch before any network activity
+RETRY_DELAY = 60  # Doubled after every failed flush
+MAX_RETRY_DELAY = 60 * 60
+
+
+def build_launch_event():
+    """Analytics event for one application launch"""
+    # Determine if running from EXE
+    is_exe = getattr(sys, 'frozen', False) or any(
+        (Path(__file__).parent / exe_name).exists()
+        for exe_name in ["main.exe", "CS2FontChanger.exe"]
+    )
+    return {
+        'version': CURRENT_VERSION,
+        'platform': f"{platform.system()} {platform.release()}; {platform.machine()}",
+        'python': f"Python/{platform.python_version()}",
+        'is_exe': "YES" if is_exe else "NO",
+        'time': int(time.time()),
+    }
+
+
+def read_spool(path):
+    """Events in a spool file, skipping lines torn by a crash mid-write"""
+    events = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return events
+
+
+class AnalyticsSpool:
+    """Append-only spool of analytics events with a single batched flusher
+
+    Events are appended as JSON lines. A flush first renames the spool to a
+    .sending file, so events recorded meanwhile go to a fresh spool, then
+    POSTs its events one JSON object per request (the format cs2fc.php has
+    always received) over one kept-alive connection. Unsent events stay in
+    the .sending file for the next flush.
+    """
+
+    def __init__(self, setup_dir, url=ANALYTICS_URL):
+        self.spool_path = Path(setup_dir) / SPOOL_FILE_NAME
+        self.sending_path = self.spool_path.with_suffix('.sending')
+        self.url = url
+        self.lock = threading.Lock()
+        self.connection = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.sent = 0
+
+    def record(self, event):
+        """Append an event to the spool, dropped if the spool has grown past MAX_SPOOL_BYTES"""
+        with self.lock:
+            try:
+                if self.spool_path.exists() and self.spool_path.stat().st_size > MAX_SPOOL_BYTES:
+                    return False
+                with open(self.spool_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(event) + "\n")
+                return True
+            except OSError:
+                return False
+
+    def pending_events(self):
+        """Events waiting to be sent, oldest first"""
+        return read_spool(self.sending_path) + read_spool(self.spool_path)
+
+    def get_connection(self):
+        if self.connection is None:
+            parts = urlsplit(self.url)
+            connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            self.connection = connection_class(parts.netloc, timeout=ANALYTICS_TIMEOUT)
+        return self.connection
+
+    def close_connection(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def post_event(self, event):
+        """POST one event, reconnecting once if a kept-alive connection was closed by the server"""
+        parts = urlsplit(self.url)
+        path = parts.path or '/'
+        if parts.query:
+            path += f"?{parts.query}"
+        body = json.dumps(event).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'User-Agent': 'CS2FontChanger-Analytics'}
+
+        for attempt in range(2):
+            try:
+                connection = self.get_connection()
+                connection.request('POST', path, body, headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    raise http.client.HTTPException(f"HTTP {response.status}")
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.close_connection()
+                return
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close_connection()
+                if attempt:
+                    raise
+            except Exception:
+                self.close_connection()
+                raise
+
+    def flush(self):
+        """Send all pending events, returns True once the spool is empty"""
+        with self.lock:
+            if not self.sending_path.exists():
+                if not self.spool_path.exists():
+                    return True
+                os.replace(self.spool_path, self.sending_path)
+
+        events = read_spool(self.sending_path)
+        sent = 0
+        try:
+            for event in events:
+                self.post_event(event)
+                sent += 1
+                self.sent += 1
+        except Exception:
+            # Keep only what wasn't sent
+            with open(self.sending_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(event) + "\n" for event in events[sent:])
+            raise
+        finally:
+            self.close_connection()
+
+        self.sending_path.unlink(missing_ok=True)
+        return not self.spool_path.exists()
+
+    def run(self, event_factory=None, delay=FLUSH_DELAY):
+        """Flusher loop: record an event, wait delay, then flush with exponential backoff until empty"""
+        if event_factory is not None:
+            self.record(event_factory())
+        if self.stop_event.wait(delay):
+            return
+
+        retry_delay = RETRY_DELAY
+        while not self.stop_event.is_set():
+            try:
+                if self.flush():
+                    return
+                continue  # Events were recorded while sending
+            except Exception as e:
+                print(f"Analytics flush failed ({e}), retrying in {retry_delay} s")
+            if self.stop_event.wait(retry_delay):
+                return
+            retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+
+    def start(self, event_factory=None, delay=FLUSH_DELAY):
+        """Start the single flusher thread, which also builds and records the event so the caller does no work"""
+        if self.thread and self.thread.is_alive():
+            if event_factory is not None:
+                self.record(event_factory())
+            return self.thread
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, args=(event_factory, delay), daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def send_analytics(setup_dir):
+    """Queue the launch event and start the background flusher"""
+    spool = AnalyticsSpool(setup_dir)
+    spool.start(build_launch_event)
+    return spool
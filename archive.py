@@ -0,0 +1,667 @@
+"""
+CS2 Font Changer - Archive Import Module
+Streams font files out of downloaded archives without blocking the GUI
+"""
+
+import io
+import json
+import shutil
+import struct
+import tempfile
+import time
+import zipfile
+import zlib
+from pathlib import Path
+
+from font import read_font_family, hash_bytes
+
+try:
+    import rarfile
+    RARFILE_AVAILABLE = True
+except ImportError:
+    RARFILE_AVAILABLE = False
+
+try:
+    import py7zr
+    PY7ZR_AVAILABLE = True
+except ImportError:
+    PY7ZR_AVAILABLE = False
+
+try:
+    from PyQt5.QtCore import QThread, pyqtSignal
+    QT_AVAILABLE = True
+except ImportError:
+    QT_AVAILABLE = False
+
+FONT_EXTENSIONS = ('.ttf', '.otf')
+ARCHIVE_EXTENSIONS = ('.zip', '.rar', '.7z')
+COPY_CHUNK_SIZE = 256 * 1024
+MAX_NESTING_DEPTH = 3
+
+# Leading bytes of the file types a font download may contain
+SNIFF_BYTES = 8
+DOWNLOAD_MAGIC_NUMBERS = [
+    (b'\x00\x01\x00\x00', 'ttf'),
+    (b'true', 'ttf'),
+    (b'OTTO', 'otf'),
+    (b'ttcf', 'ttc'),
+    (b'wOFF', 'woff'),
+    (b'wOF2', 'woff2'),
+    (b'PK\x03\x04', 'zip'),
+    (b'PK\x05\x06', 'zip'),
+    (b'Rar!\x1a\x07', 'rar'),
+    (b'7z\xbc\xaf\x27\x1c', '7z'),
+]
+
+# WebEngine writes a download to <path>.download and renames it to <path> once it completes
+PARTIAL_DOWNLOAD_SUFFIX = ".download"
+
+# Verdicts of sniff_partial_download()
+SNIFF_WAIT = 'wait'
+SNIFF_ACCEPT = 'accept'
+SNIFF_REJECT = 'reject'
+SNIFF_UNAVAILABLE = 'unavailable'
+
+
+def sniff_file_type(header):
+    """Identify a font or archive from its first bytes, None for anything else"""
+    for magic, file_type in DOWNLOAD_MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return file_type
+    return None
+
+
+def describe_content(header):
+    """Short description of content that is not a font or archive, for log messages"""
+    stripped = header.lstrip().lower()
+    if stripped.startswith((b'<!doc', b'<html', b'<?xml', b'<')):
+        return "an HTML page"
+    if header.startswith(b'MZ'):
+        return "a Windows executable"
+    if header.startswith(b'%PDF'):
+        return "a PDF document"
+    return "unknown content"
+
+
+def partial_download_path(file_path):
+    """Path WebEngine writes an in-progress download of file_path to"""
+    file_path = Path(file_path)
+    return file_path.with_name(file_path.name + PARTIAL_DOWNLOAD_SUFFIX)
+
+
+def open_download(file_path):
+    """Open the .download file of a download in progress
+
+    FileNotFoundError before WebEngine has created it and once it was renamed.
+    file_path itself is never read here, it may still be an older file of the
+    same name.
+    """
+    return open(partial_download_path(file_path), 'rb')
+
+
+def read_file_header(file_path):
+    """First SNIFF_BYTES of a file, None if it doesn't exist"""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(SNIFF_BYTES)
+    except FileNotFoundError:
+        return None
+
+
+def read_download_header(file_path):
+    """First SNIFF_BYTES of a download in progress, None if its .download file isn't on disk"""
+    return read_file_header(partial_download_path(file_path))
+
+
+def sniff_partial_download(file_path, received):
+    """Check the first bytes of a download while it is still in progress
+
+    Returns (verdict, header). SNIFF_WAIT until SNIFF_BYTES have been
+    received and written, SNIFF_ACCEPT or SNIFF_REJECT once they are known,
+    and SNIFF_UNAVAILABLE if bytes were received but no file holds them, so
+    the caller stops checking on progress and decides when it finishes.
+    """
+    if received < SNIFF_BYTES:
+        return SNIFF_WAIT, None
+    header = read_download_header(file_path)
+    if header is None:
+        return SNIFF_UNAVAILABLE, None
+    if len(header) < SNIFF_BYTES:
+        return SNIFF_WAIT, header  # Received but not flushed to disk yet
+    return (SNIFF_ACCEPT if sniff_file_type(header) else SNIFF_REJECT), header
+
+
+class ZipBackend:
+    """ZIP archives via the standard library"""
+    name = "zip"
+    extensions = ('.zip',)
+    available = True
+    install_hint = ""
+
+    def __init__(self, archive_path):
+        self.archive = zipfile.ZipFile(archive_path, 'r')
+
+    def members(self):
+        """List (name, size, crc) for every file in the archive"""
+        return [(info.filename, info.file_size, info.CRC)
+                for info in self.archive.infolist() if not info.is_dir()]
+
+    def stream(self, names):
+        """Yield (name, file object) for the requested members"""
+        for name in names:
+            with self.archive.open(name) as source:
+                yield name, source
+
+    def close(self):
+        self.archive.close()
+
+
+class RarBackend(ZipBackend):
+    """RAR archives via the optional rarfile package"""
+    name = "rar"
+    extensions = ('.rar',)
+    available = RARFILE_AVAILABLE
+    install_hint = "pip install rarfile (and an unrar tool on PATH)"
+
+    def __init__(self, archive_path):
+        self.archive = rarfile.RarFile(archive_path, 'r')
+
+    def members(self):
+        return [(info.filename, info.file_size, info.CRC)
+                for info in self.archive.infolist() if not info.isdir()]
+
+
+class SevenZipBackend(ZipBackend):
+    """7z archives via the optional py7zr package"""
+    name = "7z"
+    extensions = ('.7z',)
+    available = PY7ZR_AVAILABLE
+    install_hint = "pip install py7zr"
+
+    def __init__(self, archive_path):
+        self.archive = py7zr.SevenZipFile(archive_path, 'r')
+
+    def members(self):
+        return [(info.filename, info.uncompressed, info.crc32)
+                for info in self.archive.list() if not info.is_directory]
+
+    def stream(self, names):
+        # 7z archives are usually solid, so all requested members are
+        # decoded in a single pass instead of being opened one by one
+        if hasattr(self.archive, 'read'):
+            for name, source in self.archive.read(targets=list(names)).items():
+                yield name, source
+            self.archive.reset()
+            return
+
+        # Newer py7zr versions dropped read() - decode into a scratch directory
+        with tempfile.TemporaryDirectory() as scratch:
+            self.archive.extract(path=scratch, targets=list(names))
+            self.archive.reset()
+            for name in names:
+                with open(Path(scratch) / name, 'rb') as source:
+                    yield name, source
+
+
+ARCHIVE_BACKENDS = [ZipBackend, RarBackend, SevenZipBackend]
+
+
+def get_archive_backend(archive_path):
+    """Find the backend class for an archive path, or None if it isn't an archive"""
+    suffix = Path(archive_path).suffix.lower()
+    for backend in ARCHIVE_BACKENDS:
+        if suffix in backend.extensions:
+            return backend
+    return None
+
+
+def is_archive(archive_path):
+    """Check if a path looks like a supported archive type"""
+    return get_archive_backend(archive_path) is not None
+
+
+def open_archive(archive_path):
+    """Open an archive with the matching backend"""
+    backend = get_archive_backend(archive_path)
+    if backend is None:
+        raise Exception(f"Unsupported archive type: {Path(archive_path).name}")
+    if not backend.available:
+        raise Exception(f"{backend.name.upper()} support is not installed - {backend.install_hint}")
+    return backend(archive_path)
+
+
+def is_font_member(name):
+    """Check if an archive member name is a font file worth importing"""
+    return name.lower().endswith(FONT_EXTENSIONS) and not name.startswith('__MACOSX/')
+
+
+def is_nested_archive_member(name):
+    """Check if an archive member is itself an archive"""
+    return name.lower().endswith(ARCHIVE_EXTENSIONS) and not name.startswith('__MACOSX/')
+
+
+def reserve_font_path(dest_dir, member_name, taken_names):
+    """Pick a flattened, conflict-free destination path for an archive member
+
+    taken_names holds the lowercased file names already present in dest_dir
+    and is updated in place, so conflicts are resolved without touching disk.
+    """
+    original = Path(Path(member_name).name)
+    name = original.name
+    counter = 1
+    while name.lower() in taken_names:
+        name = f"{original.stem}_{counter}{original.suffix}"
+        counter += 1
+    taken_names.add(name.lower())
+    return Path(dest_dir) / name
+
+
+def reserve_download_path(download_dir, filename, active_names=()):
+    """Target for a new download that replaces no earlier download and no download in progress
+
+    active_names are the file names of downloads that have been started but
+    may not have a .download file yet.
+    """
+    download_dir = Path(download_dir)
+    taken_names = {name.lower() for name in active_names}
+    if download_dir.is_dir():
+        for path in download_dir.iterdir():
+            name = path.name.lower()
+            taken_names.add(name[:-len(PARTIAL_DOWNLOAD_SUFFIX)] if name.endswith(PARTIAL_DOWNLOAD_SUFFIX) else name)
+    return reserve_font_path(download_dir, filename, taken_names)
+
+
+def index_archive(archive_path, progress_callback=None, _prefix=(), _depth=0):
+    """List the font members of an archive without writing anything to disk
+
+    Every font member is decoded in memory only to read the family name
+    from its name table and hash its content. Returns a list of dicts with
+    the member path (one name per nesting level), size, CRC, SHA-256 and
+    family.
+    """
+    members = []
+
+    archive = open_archive(archive_path)
+    try:
+        listing = archive.members()
+        font_info = {name: (size, crc) for name, size, crc in listing if is_font_member(name)}
+        nested_names = [name for name, size, crc in listing if is_nested_archive_member(name)] if _depth < MAX_NESTING_DEPTH else []
+
+        for index, (name, source) in enumerate(archive.stream(list(font_info)), 1):
+            size, crc = font_info[name]
+            data = source.read()
+            members.append({
+                'member': list(_prefix) + [name],
+                'size': size,
+                'crc': crc,
+                'sha256': hash_bytes(data),
+                'family': read_font_family(io.BytesIO(data)),
+            })
+            if progress_callback:
+                progress_callback(index, len(font_info), Path(name).name)
+
+        if nested_names:
+            with tempfile.TemporaryDirectory() as scratch:
+                for name, source in archive.stream(nested_names):
+                    nested_path = Path(scratch) / Path(name).name
+                    with open(nested_path, 'wb') as target:
+                        shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+                    try:
+                        members.extend(index_archive(nested_path, progress_callback,
+                                                     tuple(_prefix) + (name,), _depth + 1))
+                    except Exception as e:
+                        print(f"Warning: Could not index nested archive {name}: {e}")
+                    nested_path.unlink(missing_ok=True)
+    finally:
+        archive.close()
+
+    return members
+
+
+class ZipStreamIndexer:
+    """Indexes the fonts of a ZIP archive while it is still downloading
+
+    Every ZIP member is preceded by a local file header, so members can be
+    read as soon as their bytes are on disk. Call feed() whenever more of
+    the file has arrived and finish() once the download is complete; the
+    central directory is then used to confirm the streamed result.
+    """
+
+    LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+    LOCAL_SIGNATURE = 0x04034b50
+    DESCRIPTOR_SIGNATURE = 0x08074b50
+    END_SIGNATURES = (0x02014b50, 0x06054b50)  # Central directory, end of central directory
+
+    def __init__(self, archive_path):
+        self.archive_path = Path(archive_path)
+        self.offset = 0
+        self.fed_size = 0
+        self.members = []
+        self.complete = False
+        self.unsupported = False  # Something only index_archive() can handle (encryption, zip64, nesting, ...)
+        self.current = None
+        self.decompressor = None
+        self.chunks = []
+
+    def feed(self, finished=False):
+        """Process the bytes that arrived since the last call, returns the number of new font members
+
+        Reads the .download file while in progress and archive_path once finished.
+        """
+        if self.complete or self.unsupported:
+            return 0
+        found = len(self.members)
+        try:
+            with (open(self.archive_path, 'rb') if finished else open_download(self.archive_path)) as f:
+                self.fed_size = f.seek(0, io.SEEK_END)
+                while not (self.complete or self.unsupported) and self._step(f):
+                    pass
+        except FileNotFoundError:
+            pass  # Nothing written yet, or renamed since
+        except (OSError, zlib.error, struct.error, UnicodeDecodeError):
+            self.unsupported = True
+        return len(self.members) - found
+
+    def _read(self, f, size):
+        """Read size bytes at the current offset, None if they haven't arrived yet"""
+        if self.offset + size > self.fed_size:
+            return None
+        f.seek(self.offset)
+        data = f.read(size)
+        return data if len(data) == size else None
+
+    def _step(self, f):
+        """Advance by one header, member or descriptor; False when more bytes are needed"""
+        if self.current is None:
+            return self._read_header(f)
+        if self.current['descriptor']:
+            return self._read_streamed_data(f)
+        return self._read_sized_data(f)
+
+    def _read_header(self, f):
+        signature = self._read(f, 4)
+        if signature is None:
+            return False
+        signature, = struct.unpack('<I', signature)
+        if signature in self.END_SIGNATURES:
+            self.complete = True
+            return False
+        header = self._read(f, self.LOCAL_HEADER.size)
+        if header is None:
+            return False
+        (signature, _, flags, method, _, _, crc, compressed_size, size,
+         name_length, extra_length) = self.LOCAL_HEADER.unpack(header)
+        if signature != self.LOCAL_SIGNATURE:
+            self.unsupported = True
+            return False
+        name = self._read(f, self.LOCAL_HEADER.size + name_length)
+        if name is None or self.offset + self.LOCAL_HEADER.size + name_length + extra_length > self.fed_size:
+            return False
+        name = name[self.LOCAL_HEADER.size:].decode('utf-8' if flags & 0x800 else 'cp437')
+
+        descriptor = bool(flags & 0x08)
+        if (flags & 0x01 or method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+                or (descriptor and method == zipfile.ZIP_STORED) or 0xFFFFFFFF in (compressed_size, size)
+                or is_nested_archive_member(name)):
+            self.unsupported = True
+            return False
+
+        self.offset += self.LOCAL_HEADER.size + name_length + extra_length
+        self.current = {'name': name, 'method': method, 'crc': crc, 'compressed_size': compressed_size,
+                        'size': size, 'descriptor': descriptor, 'wanted': is_font_member(name)}
+        if descriptor:
+            self.decompressor = zlib.decompressobj(-15)
+            self.chunks = []
+        return True
+
+    def _read_sized_data(self, f):
+        current = self.current
+        if not current['wanted']:
+            # Skipped unread, the next header is read once its bytes have arrived
+            self.offset += current['compressed_size']
+            self.current = None
+            return True
+        data = self._read(f, current['compressed_size'])
+        if data is None:
+            return False
+        self.offset += current['compressed_size']
+        if current['method'] == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -15)
+        self._add_member(data, current['crc'])
+        self.current = None
+        return True
+
+    def _read_streamed_data(self, f):
+        current = self.current
+        if self.decompressor is not None:
+            available = self.fed_size - self.offset
+            if available <= 0:
+                return False
+            f.seek(self.offset)
+            data = f.read(min(available, COPY_CHUNK_SIZE))
+            if not data:
+                return False
+            output = self.decompressor.decompress(data)
+            if current['wanted']:
+                self.chunks.append(output)
+            if not self.decompressor.eof:
+                self.offset += len(data)
+                return True
+            self.offset += len(data) - len(self.decompressor.unused_data)
+            self.decompressor = None
+
+        # Data descriptor: optional signature, then CRC and sizes
+        descriptor = self._read(f, 16)
+        if descriptor is None:
+            return False
+        values = struct.unpack('<IIII', descriptor)
+        if values[0] == self.DESCRIPTOR_SIGNATURE:
+            crc = values[1]
+            self.offset += 16
+        else:
+            crc = values[0]
+            self.offset += 12
+        if current['wanted']:
+            self._add_member(b''.join(self.chunks), crc)
+        self.chunks = []
+        self.current = None
+        return True
+
+    def _add_member(self, data, crc):
+        if zlib.crc32(data) != crc:
+            self.unsupported = True
+            return
+        self.members.append({
+            'member': [self.current['name']],
+            'size': len(data),
+            'crc': crc,
+            'sha256': hash_bytes(data),
+            'family': read_font_family(io.BytesIO(data)),
+        })
+
+    def finish(self):
+        """Complete the index after the download, None if index_archive() is needed instead"""
+        self.feed(finished=True)
+        if not self.complete or self.unsupported:
+            return None
+        try:
+            with zipfile.ZipFile(self.archive_path, 'r') as archive:
+                expected = [(info.filename, info.file_size, info.CRC) for info in archive.infolist()
+                            if not info.is_dir() and is_font_member(info.filename)]
+        except (OSError, zipfile.BadZipFile):
+            return None
+        streamed = {(m['member'][0], m['size'], m['crc']): m for m in self.members}
+        if len(streamed) != len(self.members) or set(streamed) != set(expected):
+            return None
+        # Same order as index_archive(), which follows the central directory
+        return [streamed[key] for key in expected]
+
+
+def copy_member(archive_path, member, target):
+    """Stream one (possibly nested) archive member into a binary file object"""
+    archive = open_archive(archive_path)
+    try:
+        for name, source in archive.stream([member[0]]):
+            if len(member) == 1:
+                shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+                return
+            with tempfile.TemporaryDirectory() as scratch:
+                nested_path = Path(scratch) / Path(name).name
+                with open(nested_path, 'wb') as nested_file:
+                    shutil.copyfileobj(source, nested_file, COPY_CHUNK_SIZE)
+                copy_member(nested_path, member[1:], target)
+                return
+    finally:
+        archive.close()
+    raise Exception(f"Member not found in {Path(archive_path).name}: {member[0]}")
+
+
+def read_member(archive_path, member):
+    """Read one (possibly nested) archive member into memory"""
+    buffer = io.BytesIO()
+    copy_member(archive_path, member, buffer)
+    return buffer.getvalue()
+
+
+def extract_member(archive_path, member, dest_path):
+    """Extract a single (possibly nested) archive member to dest_path, which must not exist yet"""
+    dest_path = Path(dest_path)
+    target = open(dest_path, 'xb')
+    try:
+        with target:
+            copy_member(archive_path, member, target)
+    except Exception:
+        dest_path.unlink(missing_ok=True)
+        raise
+    return dest_path
+
+
+class ArchiveIndex:
+    """On-disk cache of the font members of downloaded archives"""
+
+    def __init__(self, index_path):
+        self.index_path = Path(index_path)
+        self.archives = {}
+        self.load()
+
+    def load(self):
+        try:
+            if self.index_path.exists():
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.archives = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load archive index: {e}")
+            self.archives = {}
+
+    def save(self):
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(self.archives, f)
+        except Exception as e:
+            print(f"Warning: Could not save archive index: {e}")
+
+    @staticmethod
+    def archive_key(archive_path):
+        stat_result = Path(archive_path).stat()
+        return f"{stat_result.st_size}:{stat_result.st_mtime_ns}"
+
+    def get(self, archive_path):
+        """Get the indexed members of an archive, or None if it isn't indexed or changed"""
+        record = self.archives.get(Path(archive_path).name)
+        try:
+            if record and record['key'] == self.archive_key(archive_path):
+                return record['members']
+        except OSError:
+            pass
+        return None
+
+    def put(self, archive_path, members):
+        self.archives[Path(archive_path).name] = {
+            'key': self.archive_key(archive_path),
+            'members': members,
+        }
+        self.save()
+
+    def discard(self, archive_path):
+        if self.archives.pop(Path(archive_path).name, None) is not None:
+            self.save()
+
+    def prune(self, archive_dir):
+        """Forget archives that no longer exist in archive_dir"""
+        stale = [name for name in self.archives if not (Path(archive_dir) / name).exists()]
+        for name in stale:
+            del self.archives[name]
+        if stale:
+            self.save()
+
+
+if QT_AVAILABLE:
+    class ArchiveIndexWorker(QThread):
+        """Indexes the font members of downloaded archives on a background thread"""
+        progress = pyqtSignal(int, int, str)
+        indexFinished = pyqtSignal(str, list, float)
+        indexFailed = pyqtSignal(str, str)
+
+        def __init__(self, archive_paths, parent=None):
+            super().__init__(parent)
+            self.archive_paths = [Path(p) for p in archive_paths]
+
+        def run(self):
+            for archive_path in self.archive_paths:
+                try:
+                    started = time.perf_counter()
+                    members = index_archive(archive_path, self.progress.emit)
+                    self.indexFinished.emit(str(archive_path), members, time.perf_counter() - started)
+                except Exception as e:
+                    self.indexFailed.emit(str(archive_path), str(e))
+
+    class StreamIndexWorker(QThread):
+        """Feeds a ZipStreamIndexer on a background thread
+
+        With finish=True the index is completed instead, falling back to
+        index_archive() when the streamed result can't be used; the signals
+        then match ArchiveIndexWorker's.
+        """
+        fed = pyqtSignal(str, int)
+        indexedWhileDownloading = pyqtSignal(str)
+        indexFinished = pyqtSignal(str, list, float)
+        indexFailed = pyqtSignal(str, str)
+
+        def __init__(self, indexer, finish=False, parent=None):
+            super().__init__(parent)
+            self.indexer = indexer
+            self.finish_index = finish
+
+        def run(self):
+            archive_path = str(self.indexer.archive_path)
+            if not self.finish_index:
+                self.fed.emit(archive_path, self.indexer.feed())
+                return
+            try:
+                started = time.perf_counter()
+                members = self.indexer.finish()
+                if members is not None:
+                    self.indexedWhileDownloading.emit(archive_path)
+                else:
+                    members = index_archive(self.indexer.archive_path)
+                self.indexFinished.emit(archive_path, members, time.perf_counter() - started)
+            except Exception as e:
+                self.indexFailed.emit(archive_path, str(e))
+
+    class MemberReadWorker(QThread):
+        """Reads one archive member into memory on a background thread, e.g. for a preview"""
+        memberRead = pyqtSignal(object, bytes)
+        readFailed = pyqtSignal(object, str)
+
+        def __init__(self, key, archive_path, member, parent=None):
+            super().__init__(parent)
+            self.key = key
+            self.archive_path = Path(archive_path)
+            self.member = tuple(member)
+
+        def run(self):
+            try:
+                self.memberRead.emit(self.key, read_member(self.archive_path, self.member))
+            except Exception as e:
+                self.readFailed.emit(self.key, str(e))
@@ -0,0 +1,361 @@
+"""
+CS2 Font Changer - Benchmark Suite
+Times the font, archive and ad blocking hot paths against a synthetic CS2 install and font corpus
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import stat
+import shutil
+import zipfile
+import argparse
+import platform
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from version import CURRENT_VERSION
+from files import create_configuration_files
+from font import FontManager, ContentHashIndex, collect_font_entries
+from archive import index_archive, extract_member
+from adblock import (DEFAULT_BLOCKED_PATTERNS, RequestMatcher, DecisionCache,
+                     parse_filter_list, synthetic_filter_list)
+
+try:
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    FONTTOOLS_AVAILABLE = True
+except ImportError:
+    FONTTOOLS_AVAILABLE = False
+
+LAYOUTS = ('game', 'direct')
+DEFAULT_FONT_COUNT = 50
+DEFAULT_GLYPH_COUNT = 200
+DEFAULT_ROUNDS = 5
+DEFAULT_FILTER_RULES = 50000
+RESULTS_FORMAT_VERSION = 1
+
+# Typical traffic of the font sites opened in the browser
+SAMPLE_REQUESTS = [
+    ("fonts.google.com", "https://fonts.google.com/specimen/roboto"),
+    ("fonts.gstatic.com", "https://fonts.gstatic.com/s/roboto/v30/kfomcnqeu92fr1mu4mxk.woff2"),
+    ("www.dafont.com", "https://www.dafont.com/theme.php?cat=101"),
+    ("img.dafont.com", "https://img.dafont.com/preview.php?text=cs2&ttf=foo0&ext=1&size=64"),
+    ("securepubads.g.doubleclick.net", "https://securepubads.g.doubleclick.net/tag/js/gpt.js"),
+    ("www.1001fonts.com", "https://www.1001fonts.com/download/foo.zip"),
+    ("cdn.taboola.com", "https://cdn.taboola.com/libtrc/loader.js"),
+    ("tracker12.adnetwork12.com", "https://tracker12.adnetwork12.com/pixel12/collect"),
+] * 50
+
+
+def remove_tree(path):
+    """rmtree that also removes the read-only files FontManager leaves behind"""
+    def make_writable(function, failed_path, exc_info):
+        os.chmod(failed_path, stat.S_IWRITE | stat.S_IREAD)
+        function(failed_path)
+    shutil.rmtree(path, onerror=make_writable)
+
+
+def create_fake_cs2_install(root, layout='game'):
+    """Lay out a CS2 install with stock font configuration and its setup directory
+
+    layout 'game' nests everything under game/ like a Steam install, 'direct'
+    puts csgo/ and core/ at the top like some older installs. Returns
+    (cs2_path, setup_dir).
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}, expected one of {LAYOUTS}")
+
+    root = Path(root)
+    cs2_path = root / f"cs2-{layout}"
+    setup_dir = root / f"setup-{layout}"
+    with redirect_stdout(io.StringIO()):
+        create_configuration_files(setup_dir)
+
+    game_dir = cs2_path / "game" if layout == 'game' else cs2_path
+    fonts_dir = game_dir / "csgo" / "panorama" / "fonts"
+    conf_d_dir = game_dir / "core" / "panorama" / "fonts" / "conf.d"
+    fonts_dir.mkdir(parents=True, exist_ok=True)
+    conf_d_dir.mkdir(parents=True, exist_ok=True)
+
+    # The stock files are what the .old templates restore
+    shutil.copy2(setup_dir / "fonts.conf.old", fonts_dir / "fonts.conf")
+    shutil.copy2(setup_dir / "42-repl-global.conf.old", conf_d_dir / "42-repl-global.conf")
+    stratum_placeholder = b"stratum2 uifont placeholder\n" * 64
+    (fonts_dir / "stratum2.uifont").write_bytes(stratum_placeholder)
+    (setup_dir / "stratum2.uifont").write_bytes(stratum_placeholder)
+    return cs2_path, setup_dir
+
+
+def build_font(family, glyph_count):
+    """TrueType font named family with glyph_count outline glyphs, returns the file bytes"""
+    glyph_names = [".notdef"] + [f"g{i:04d}" for i in range(glyph_count)]
+    cmap = {0x4E00 + i: f"g{i:04d}" for i in range(glyph_count)}
+    glyphs = {}
+    for index, name in enumerate(glyph_names):
+        pen = TTGlyphPen(None)
+        # A box with a notch whose position varies, so outlines differ between glyphs
+        notch = 100 + (index * 37) % 300
+        pen.moveTo((50, 0))
+        pen.lineTo((50, 700))
+        pen.lineTo((notch, 700))
+        pen.lineTo((notch, 500))
+        pen.lineTo((notch + 50, 500))
+        pen.lineTo((notch + 50, 700))
+        pen.lineTo((550, 700))
+        pen.lineTo((550, 0))
+        pen.closePath()
+        glyphs[name] = pen.glyph()
+
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(glyph_names)
+    builder.setupCharacterMap(cmap)
+    builder.setupGlyf(glyphs)
+    builder.setupHorizontalMetrics({name: (600, 50) for name in glyph_names})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({'familyName': family, 'styleName': "Regular"})
+    builder.setupOS2(sTypoAscender=800, sTypoDescender=-200, usWinAscent=800, usWinDescent=200)
+    builder.setupPost()
+
+    buffer = io.BytesIO()
+    builder.save(buffer)
+    return buffer.getvalue()
+
+
+def generate_font_corpus(directory, count=DEFAULT_FONT_COUNT, glyph_count=DEFAULT_GLYPH_COUNT):
+    """Write count distinct synthetic fonts to directory, returns {path: family}"""
+    if not FONTTOOLS_AVAILABLE:
+        raise RuntimeError("fonttools is required to generate the font corpus")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = {}
+    for i in range(count):
+        family = f"Bench Sans {i:04d}"
+        font_path = directory / f"BenchSans{i:04d}-Regular.ttf"
+        font_path.write_bytes(build_font(family, glyph_count))
+        corpus[font_path] = family
+    return corpus
+
+
+def measure(function, rounds, setup=None):
+    """Run function rounds times, with setup untimed before each run
+
+    Returns min/median/mean/max wall time in milliseconds. Output printed
+    by the code under test is swallowed so it doesn't skew the timings.
+    """
+    timings = []
+    for _ in range(rounds):
+        with redirect_stdout(io.StringIO()):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'rounds': rounds,
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'mean_ms': statistics.mean(timings),
+        'max_ms': max(timings),
+    }
+
+
+def benchmark_apply_restore(work_dir, corpus, rounds, results):
+    """apply_font_to_cs2 and restore_defaults on both install layouts"""
+    font_path = next(iter(corpus))
+    family = corpus[font_path]
+    for layout in LAYOUTS:
+        cs2_path, setup_dir = create_fake_cs2_install(work_dir, layout)
+        font_manager = FontManager(work_dir, cs2_path)
+
+        def apply():
+            font_manager.apply_font_to_cs2(family, font_path.name, font_path)
+
+        def restore():
+            font_manager.restore_defaults(setup_dir)
+
+        results[f'apply_font_to_cs2[{layout}]'] = measure(apply, rounds, setup=restore)
+        results[f'restore_defaults[{layout}]'] = measure(restore, rounds, setup=apply)
+        with redirect_stdout(io.StringIO()):
+            restore()
+
+
+def benchmark_font_library(work_dir, fonts_dir, corpus, rounds, results):
+    """get_font_internal_name over the corpus and the refresh_font_list work, cold and warm"""
+    font_manager = FontManager(work_dir)
+    font_paths = list(corpus)
+
+    def read_all_families():
+        for font_path in font_paths:
+            font_manager.get_font_internal_name(font_path)
+
+    results['get_font_internal_name'] = measure(read_all_families, rounds)
+    results['get_font_internal_name']['fonts'] = len(font_paths)
+
+    # Install the font listed last, so every family is read before it is found
+    cs2_path, setup_dir = create_fake_cs2_install(work_dir, 'game')
+    font_manager = FontManager(work_dir, cs2_path)
+    last_font = [font_file for font_file in fonts_dir.iterdir() if font_file in corpus][-1]
+    with redirect_stdout(io.StringIO()):
+        font_manager.apply_font_to_cs2(corpus[last_font], last_font.name, last_font)
+
+    index_path = work_dir / "hash_index.json"
+    hash_index = ContentHashIndex(index_path, [fonts_dir])
+
+    def drop_index():
+        index_path.unlink(missing_ok=True)
+        hash_index.files = {}
+
+    # The combo box needs Qt, everything it is filled from is collect_font_entries and the duplicate report
+    def refresh():
+        collect_font_entries(hash_index, fonts_dir, work_dir / "assets", work_dir / "dl", font_manager)
+        hash_index.duplicates()
+
+    results['refresh_font_list[cold]'] = measure(refresh, rounds, setup=drop_index)
+    results['refresh_font_list[warm]'] = measure(refresh, rounds)
+
+
+def benchmark_archives(work_dir, corpus, rounds, results):
+    """index_archive and extracting every member on a ZIP of the corpus, as applying fonts from it does"""
+    archive_path = work_dir / "corpus.zip"
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for font_path in corpus:
+            archive.write(font_path, f"fonts/{font_path.name}")
+    extract_dir = work_dir / "extracted"
+    members = [member['member'] for member in index_archive(archive_path)]
+
+    def clear_extract_dir():
+        if extract_dir.exists():
+            remove_tree(extract_dir)
+        extract_dir.mkdir()
+
+    def extract_all():
+        for member in members:
+            extract_member(archive_path, member, extract_dir / Path(member[-1]).name)
+
+    results['index_archive'] = measure(lambda: index_archive(archive_path), rounds)
+    results['index_archive']['archive_bytes'] = archive_path.stat().st_size
+    results['extract_member'] = measure(extract_all, rounds, setup=clear_extract_dir)
+    results['extract_member']['members'] = len(members)
+
+
+def benchmark_adblock(rule_count, rounds, results):
+    """Per-request cost of the compiled matcher and the decision cache with a synthetic filter list"""
+    lines = synthetic_filter_list(rule_count)
+
+    def compile_matcher():
+        parsed = parse_filter_list(lines)
+        return RequestMatcher(parsed[0], DEFAULT_BLOCKED_PATTERNS, parsed[1], parsed[2], parsed[3])
+
+    results['adblock_compile'] = measure(compile_matcher, rounds)
+    results['adblock_compile']['rules'] = rule_count
+    matcher = compile_matcher()
+
+    def match_all(should_block):
+        for host, url_lower in SAMPLE_REQUESTS:
+            should_block(host, url_lower)
+
+    for name, should_block in (('adblock_match', matcher.should_block),
+                               ('adblock_match[cached]', DecisionCache(matcher).should_block)):
+        stats = measure(lambda: match_all(should_block), rounds)
+        stats['requests'] = len(SAMPLE_REQUESTS)
+        stats['median_us_per_request'] = stats['median_ms'] * 1000 / len(SAMPLE_REQUESTS)
+        results[name] = stats
+
+
+def run_benchmarks(font_count=DEFAULT_FONT_COUNT, glyph_count=DEFAULT_GLYPH_COUNT, rounds=DEFAULT_ROUNDS,
+                   filter_rules=DEFAULT_FILTER_RULES, work_dir=None):
+    """Run the whole suite in a scratch directory, returns the results document"""
+    benchmarks = {}
+    skipped = []
+    scratch = Path(work_dir) if work_dir else Path(tempfile.mkdtemp(prefix="cs2fc-bench-"))
+    scratch.mkdir(parents=True, exist_ok=True)
+    try:
+        if FONTTOOLS_AVAILABLE:
+            fonts_dir = scratch / "fonts"
+            started = time.perf_counter()
+            corpus = generate_font_corpus(fonts_dir, font_count, glyph_count)
+            print(f"Generated {font_count} fonts in {time.perf_counter() - started:.1f} s")
+            benchmark_apply_restore(scratch, corpus, rounds, benchmarks)
+            benchmark_font_library(scratch, fonts_dir, corpus, rounds, benchmarks)
+            benchmark_archives(scratch, corpus, rounds, benchmarks)
+        else:
+            skipped += ['apply_font_to_cs2', 'restore_defaults', 'get_font_internal_name',
+                        'refresh_font_list', 'index_archive', 'extract_member']
+            print("Warning: fonttools not available - skipping font benchmarks")
+        benchmark_adblock(filter_rules, rounds, benchmarks)
+    finally:
+        if not work_dir:
+            remove_tree(scratch)
+
+    return {
+        'format': RESULTS_FORMAT_VERSION,
+        'version': CURRENT_VERSION,
+        'python': platform.python_version(),
+        'platform': f"{platform.system()} {platform.release()}; {platform.machine()}",
+        'time': int(time.time()),
+        'parameters': {
+            'fonts': font_count,
+            'glyphs': glyph_count,
+            'rounds': rounds,
+            'filter_rules': filter_rules,
+        },
+        'benchmarks': benchmarks,
+        'skipped': skipped,
+    }
+
+
+def compare_results(results, baseline):
+    """Lines comparing median times with a baseline results document"""
+    lines = []
+    if results['parameters'] != baseline.get('parameters'):
+        lines.append(f"Warning: parameters differ from the baseline ({baseline.get('parameters')})")
+    for name, stats in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous or not previous.get('median_ms'):
+            lines.append(f"  {name:<32} {stats['median_ms']:>10.2f} ms  (new)")
+            continue
+        ratio = stats['median_ms'] / previous['median_ms']
+        lines.append(f"  {name:<32} {stats['median_ms']:>10.2f} ms  vs {previous['median_ms']:.2f} ms  ({ratio:.2f}x)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CS2 Font Changer against a synthetic CS2 install and font corpus")
+    parser.add_argument('--fonts', type=int, default=DEFAULT_FONT_COUNT, help="Number of fonts in the corpus")
+    parser.add_argument('--glyphs', type=int, default=DEFAULT_GLYPH_COUNT, help="Glyphs per font, controls font size")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="Timed runs per benchmark")
+    parser.add_argument('--rules', type=int, default=DEFAULT_FILTER_RULES, help="Rules in the synthetic filter list")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--compare', metavar='BASELINE', help="Compare with an earlier results file")
+    parser.add_argument('--work-dir', help="Keep the synthetic install and corpus in this directory")
+    args = parser.parse_args()
+
+    if args.fonts < 1 or args.glyphs < 1 or args.rounds < 1:
+        parser.error("--fonts, --glyphs and --rounds must be at least 1")
+
+    results = run_benchmarks(args.fonts, args.glyphs, args.rounds, args.rules, args.work_dir)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare} (version {baseline.get('version')}):")
+        print("\n".join(compare_results(results, baseline)))
+    else:
+        for name, stats in results['benchmarks'].items():
+            print(f"  {name:<32} median {stats['median_ms']:>10.2f} ms  min {stats['min_ms']:>10.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,19 @@ CS2 Font Changer - Browser Component
 Handles the web browser interface for downloading fonts
 """
 
+import json
+import os
 import webbrowser
 from pathlib import Path
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+from archive import (SNIFF_WAIT, SNIFF_REJECT, SNIFF_UNAVAILABLE, sniff_file_type, sniff_partial_download,
+                     partial_download_path, reserve_download_path, read_file_header, describe_content)
+from adblock import (RequestMatcher, DecisionCache, LiteModeRules, DEFAULT_BLOCKED_DOMAINS, DEFAULT_BLOCKED_PATTERNS,
+                     DEFAULT_LITE_ALLOW_RULES, load_filter_lists)
+
 try:
     from PyQt5.QtWebEngineWidgets import *
     from PyQt5.QtWebEngineCore import *
@@ -18,56 +25,235 @@ except ImportError:
     print("Note: QtWebEngine not available. Install with: pip install PyQtWebEngine")
 
 
+# Named on-disk profile, so the HTTP cache and cookies survive between sessions
+PROFILE_NAME = "cs2-font-changer"
+HTTP_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+# Chromium renderer process models, from most to least memory hungry
+RENDERER_PROCESS_MODELS = {
+    'process-per-site-instance': "",
+    'process-per-site': "--process-per-site",
+    'single-process': "--single-process",
+}
+
+# Interrupted downloads are resumed this many times, waiting 2 s, 4 s, 8 s, ...
+MAX_DOWNLOAD_RETRIES = 3
+DOWNLOAD_RETRY_DELAY_MS = 2000
+
+DEFAULT_BROWSER_SETTINGS = {
+    'process_model': 'process-per-site',
+    'idle_release_minutes': 5,
+    'lite_mode': False,
+    'max_concurrent_downloads': 3,
+    'lite_allow': DEFAULT_LITE_ALLOW_RULES,
+}
+
+
+def load_browser_settings(app_dir):
+    """Load setup/browser_settings.json, writing the defaults on first use"""
+    settings = dict(DEFAULT_BROWSER_SETTINGS)
+    settings_path = Path(app_dir) / "setup" / "browser_settings.json"
+    try:
+        if settings_path.exists():
+            with open(settings_path, 'r', encoding='utf-8') as f:
+                settings.update(json.load(f))
+        else:
+            save_browser_settings(app_dir, settings)
+    except Exception as e:
+        print(f"Warning: Could not load browser settings: {e}")
+    if settings['process_model'] not in RENDERER_PROCESS_MODELS:
+        settings['process_model'] = DEFAULT_BROWSER_SETTINGS['process_model']
+    return settings
+
+
+def save_browser_settings(app_dir, settings):
+    """Write setup/browser_settings.json"""
+    try:
+        with open(Path(app_dir) / "setup" / "browser_settings.json", 'w', encoding='utf-8') as f:
+            json.dump(settings, f, indent=2)
+    except Exception as e:
+        print(f"Warning: Could not save browser settings: {e}")
+
+
+def apply_renderer_process_model(app_dir):
+    """Add the configured process model to the Chromium flags, before WebEngine starts"""
+    flag = RENDERER_PROCESS_MODELS[load_browser_settings(app_dir)['process_model']]
+    flags = os.environ.get('QTWEBENGINE_CHROMIUM_FLAGS', '')
+    if flag and flag not in flags.split():
+        os.environ['QTWEBENGINE_CHROMIUM_FLAGS'] = f"{flags} {flag}".strip()
+
+
+# Cookie consent auto-accept, injected by the profile into every page at DocumentReady.
+# A MutationObserver catches banners that are added after the document is parsed.
+COOKIE_CONSENT_SCRIPT = """
+(function() {
+    // Specific selectors for known font sites only
+    var cookieSelectors = [
+        // Google Fonts
+        'a[class*="callout"][class*="link"]',
+        'a[*ngcontent*][class*="gf-label-large"]',
+        
+        // DaFont
+        'button.sd-cmp-1bquj',
+        'button[class*="sd-cmp"]',
+        
+        // FontGet
+        '#accept-choices',
+        'div.sn-b-def.sn-three-btn',
+        
+        // 1001Fonts
+        '#accept-btn',
+        'button[mode="primary"][id="accept-btn"]',
+        
+        // Font Squirrel
+        'button.cky-btn.cky-btn-accept',
+        'button[data-cky-tag="accept-button"]'
+    ];
+    
+    function tryAccept() {
+        for (var i = 0; i < cookieSelectors.length; i++) {
+            try {
+                var elements = document.querySelectorAll(cookieSelectors[i]);
+                for (var j = 0; j < elements.length; j++) {
+                    var element = elements[j];
+                    if (element && element.offsetParent !== null && 
+                        element.style.display !== 'none' && !element.disabled &&
+                        element.style.visibility !== 'hidden') {
+                        
+                        var text = element.textContent.toLowerCase().trim();
+                        
+                        // Only click if text contains expected cookie acceptance terms
+                        if (text.includes('dismiss') || text.includes('accept') || 
+                            text.includes('agree') || text.includes('visit')) {
+                            
+                            // Handle special div elements (FontGet)
+                            if (element.tagName.toLowerCase() === 'div') {
+                                element.dispatchEvent(new MouseEvent('click', {
+                                    bubbles: true,
+                                    cancelable: true,
+                                    view: window
+                                }));
+                            }
+                            if (typeof element.click === 'function') {
+                                element.click();
+                            }
+                            return true;
+                        }
+                    }
+                }
+            } catch (e) {
+                // Silently continue on error
+            }
+        }
+        return false;
+    }
+    
+    if (tryAccept() || !document.documentElement) {
+        return;
+    }
+    
+    // Watch for late banners, checking at most once per frame and giving up after 15 seconds
+    var pending = false;
+    var observer = new MutationObserver(function() {
+        if (pending) {
+            return;
+        }
+        pending = true;
+        requestAnimationFrame(function() {
+            pending = false;
+            if (tryAccept()) {
+                observer.disconnect();
+            }
+        });
+    });
+    observer.observe(document.documentElement, {childList: true, subtree: true});
+    setTimeout(function() { observer.disconnect(); }, 15000);
+})();
+"""
+
+
 # Define classes conditionally
 if WEBENGINE_AVAILABLE:
     class AdBlocker(QWebEngineUrlRequestInterceptor):
-        """Simple adblocker using common ad domains"""
-        def __init__(self, parent=None):
+        """Adblocker using common ad domains plus any EasyList-style filter lists"""
+        def __init__(self, filter_dir=None, cache_dir=None, parent=None):
             super().__init__(parent)
-            # Common ad domains to block
-            self.blocked_domains = {
-                'googleadservices.com', 'googlesyndication.com', 'googletagmanager.com',
-                'doubleclick.net', 'amazon-adsystem.com', 'facebook.com/tr',
-                'google-analytics.com', 'googletagservices.com', 'adsystem.amazon.com',
-                'ads.yahoo.com', 'advertising.com', 'adsystem.amazon.co.uk',
-                'outbrain.com', 'taboola.com', 'revcontent.com', 'content.ad',
-                'popads.net', 'popcash.net', 'propellerads.com', 'exoclick.com',
-                'adnxs.com', 'rubiconproject.com', 'openx.net', 'pubmatic.com',
-                'criteo.com', 'adsystem.amazon.ca', 'adsystem.amazon.de'
-            }
+            self.blocked_domains = set(DEFAULT_BLOCKED_DOMAINS)
+            self.blocked_patterns = list(DEFAULT_BLOCKED_PATTERNS)
             
-            # Common ad URL patterns
-            self.blocked_patterns = [
-                'ads', 'advertisement', 'popup', 'banner', 'sponsor',
-                '/ads/', '/ad/', 'advert', 'promo', 'tracking'
-            ]
+            # Compile the rules once - interceptRequest runs for every request on the IO thread
+            self.matcher = None
+            if filter_dir and cache_dir:
+                try:
+                    self.matcher = load_filter_lists(filter_dir, cache_dir, self.blocked_domains, self.blocked_patterns)
+                except Exception as e:
+                    print(f"Warning: Could not load filter lists: {e}")
+            if self.matcher is None:
+                self.matcher = RequestMatcher(self.blocked_domains, self.blocked_patterns)
             
-        def interceptRequest(self, info):
-            url = info.requestUrl().toString()
-            host = info.requestUrl().host()
+            # Pages send most requests to a few hosts, so decisions are cached per host and path prefix
+            self.decisions = DecisionCache(self.matcher)
             
-            # Block known ad domains
-            for domain in self.blocked_domains:
-                if domain in host:
-                    info.block(True)
-                    return
+            # Lite mode blocks heavy resource types, toggled from the browser toolbar
+            self.lite_mode = False
+            self.lite_rules = LiteModeRules(DEFAULT_LITE_ALLOW_RULES)
+            self.lite_blocked = 0
+            self.lite_types = {
+                QWebEngineUrlRequestInfo.ResourceTypeImage: 'image',
+                QWebEngineUrlRequestInfo.ResourceTypeMedia: 'media',
+                QWebEngineUrlRequestInfo.ResourceTypeFontResource: 'font',
+            }
+            
+        def set_lite_mode(self, enabled, allow_rules=None):
+            if allow_rules is not None:
+                self.lite_rules = LiteModeRules(allow_rules)
+            self.lite_mode = enabled
+            
+        def stats_text(self):
+            text = self.decisions.stats_text()
+            if self.lite_mode:
+                text += f" | 🪶 Lite blocked {self.lite_blocked}"
+            return text
             
-            # Block common ad patterns
-            url_lower = url.lower()
-            for pattern in self.blocked_patterns:
-                if pattern in url_lower:
+        def interceptRequest(self, info):
+            request_url = info.requestUrl()
+            host = request_url.host().lower()
+            if self.decisions.should_block(host, request_url.toString().lower()):
+                info.block(True)
+            elif self.lite_mode:
+                resource_type = self.lite_types.get(info.resourceType())
+                if resource_type and self.lite_rules.should_block(host, resource_type):
+                    self.lite_blocked += 1
                     info.block(True)
-                    return
 
     class DownloadManager(QObject):
-        """Handle file downloads from the web browser"""
+        """Handle file downloads from the web browser
+
+        Downloads are queued: at most max_concurrent run at once and the rest
+        are paused until a slot frees up. Interrupted downloads are resumed
+        with WebEngine's resume API, up to MAX_DOWNLOAD_RETRIES times.
+        """
         downloadFinished = pyqtSignal(str)
         downloadStarted = pyqtSignal(str)
+        downloadRejected = pyqtSignal(str, str, int)  # filename, content description, bytes avoided (-1 if unknown)
+        downloadProgress = pyqtSignal(str, int, int)  # file path, received bytes, total bytes
+        downloadUpdated = pyqtSignal(int, str, int, int, str)  # id, filename, received, total, status
         
-        def __init__(self, download_dir):
+        def __init__(self, download_dir, max_concurrent=DEFAULT_BROWSER_SETTINGS['max_concurrent_downloads']):
             super().__init__()
             self.download_dir = Path(download_dir)
             self.download_dir.mkdir(exist_ok=True)
+            self.max_concurrent = max(1, max_concurrent)
+            self.downloads = {}  # id -> {'item', 'file_path', 'filename', 'retries'}
+            self.queue = []  # ids paused until a slot is free
+            self.unsniffed = set()  # ids of downloads whose first bytes were not checked yet
+            
+        @property
+        def active_downloads(self):
+            return len(self.downloads)
+            
+        def running_count(self):
+            return len(self.downloads) - len(self.queue)
             
         def handle_download(self, download_item):
             """Handle a download item from the browser"""
@@ -82,48 +268,182 @@ if WEBENGINE_AVAILABLE:
                 download_item.cancel()
                 return
                 
-            # Set download path
-            file_path = self.download_dir / filename
+            # Set download path, numbered if an earlier or running download already has the name
+            file_path = reserve_download_path(self.download_dir, filename,
+                                              [download['filename'] for download in self.downloads.values()])
+            filename = file_path.name
             download_item.setPath(str(file_path))
             
             # Emit started signal
             self.downloadStarted.emit(filename)
             
-            # Connect signals
-            download_item.finished.connect(lambda: self.on_download_finished(str(file_path), filename))
+            # Connect signals; the content is checked as soon as the first bytes arrive
+            download_id = download_item.id()
+            self.downloads[download_id] = {'item': download_item, 'file_path': file_path, 'filename': filename, 'retries': 0}
+            self.unsniffed.add(download_id)
+            download_item.downloadProgress.connect(
+                lambda received, total: self.on_download_progress(download_item, file_path, filename, received, total))
+            download_item.finished.connect(lambda: self.on_download_finished(download_item, str(file_path), filename))
             download_item.accept()
             
-        def on_download_finished(self, file_path, filename):
-            """Called when download is finished"""
+            # Wait for a free slot
+            if self.running_count() > self.max_concurrent:
+                download_item.pause()
+                self.queue.append(download_id)
+                self.update_item(download_id, "Queued")
+            else:
+                self.update_item(download_id, "Downloading")
+                
+        def update_item(self, download_id, status):
+            """Report the progress and status of a download to the download panel"""
+            download = self.downloads.get(download_id)
+            if download:
+                item = download['item']
+                self.downloadUpdated.emit(download_id, download['filename'], item.receivedBytes(), item.totalBytes(), status)
+                
+        def start_queued(self):
+            """Resume queued downloads while there are free slots"""
+            while self.queue and self.running_count() < self.max_concurrent:
+                download_id = self.queue.pop(0)
+                if download_id in self.downloads:
+                    self.downloads[download_id]['item'].resume()
+                    self.update_item(download_id, "Downloading")
+                    
+        def cancel_download(self, download_id):
+            """Cancel a running or queued download (download panel)"""
+            download = self.downloads.get(download_id)
+            if download:
+                if download_id in self.queue:
+                    self.queue.remove(download_id)
+                download['item'].cancel()
+            
+        def on_download_progress(self, download_item, file_path, filename, received, total):
+            """Sniff the first bytes, then pass progress on so archives can be indexed while downloading"""
+            self.sniff_download(download_item, file_path, filename)
+            if download_item.id() not in self.unsniffed and download_item.state() == QWebEngineDownloadItem.DownloadInProgress:
+                self.downloadProgress.emit(str(file_path), received, total)
+                self.update_item(download_item.id(), "Downloading")
+            
+        def sniff_download(self, download_item, file_path, filename):
+            """Cancel a download whose first bytes are not a font or archive
+
+            The bytes are read from the .download file WebEngine is writing,
+            so the download is cancelled long before it completes.
+            """
+            download_id = download_item.id()
+            if download_id not in self.unsniffed:
+                return
+            verdict, header = sniff_partial_download(file_path, download_item.receivedBytes())
+            if verdict == SNIFF_WAIT:
+                return
+            
+            self.unsniffed.discard(download_id)
+            if verdict == SNIFF_UNAVAILABLE:
+                # Checked by on_download_finished() instead
+                self.downloads[download_id]['sniff_on_finish'] = True
+                print(f"Warning: Could not read {filename} while downloading, checking it when finished")
+            elif verdict == SNIFF_REJECT:
+                received = download_item.receivedBytes()
+                total = download_item.totalBytes()
+                avoided = total - received if total > 0 else -1
+                self.downloads[download_id]['rejected'] = True
+                download_item.cancel()
+                self.downloadRejected.emit(filename, describe_content(header), avoided)
+            
+        def on_download_finished(self, download_item, file_path, filename):
+            """Called when download is finished, cancelled or interrupted"""
+            download_id = download_item.id()
+            download = self.downloads.get(download_id)
+            if download is None:
+                return
+            state = download_item.state()
+            
+            # Interrupted downloads (network errors) are resumed after a growing delay
+            if state == QWebEngineDownloadItem.DownloadInterrupted and download['retries'] < MAX_DOWNLOAD_RETRIES:
+                download['retries'] += 1
+                delay = DOWNLOAD_RETRY_DELAY_MS * 2 ** (download['retries'] - 1)
+                self.update_item(download_id, f"Retrying ({download['retries']}/{MAX_DOWNLOAD_RETRIES}): "
+                                              f"{download_item.interruptReasonString()}")
+                QTimer.singleShot(delay, lambda: self.retry_download(download_id))
+                return
+            
+            del self.downloads[download_id]
+            if download_id in self.queue:
+                self.queue.remove(download_id)
+            unsniffed = download_id in self.unsniffed or download.get('sniff_on_finish')
+            self.unsniffed.discard(download_id)
+            self.start_queued()
+            
+            if state != QWebEngineDownloadItem.DownloadCompleted:
+                # Only the partial file is ours, file_path is created when the download completes
+                partial_download_path(file_path).unlink(missing_ok=True)
+                if download.get('rejected'):
+                    status = "Not a font"
+                elif state == QWebEngineDownloadItem.DownloadCancelled:
+                    status = "Cancelled"
+                else:
+                    status = f"Failed: {download_item.interruptReasonString()}"
+                self.downloadUpdated.emit(download_id, filename, download_item.receivedBytes(), download_item.totalBytes(), status)
+                return
+            
+            # Small files can finish before a progress update was sniffed
+            if unsniffed:
+                header = read_file_header(file_path) or b''
+                if sniff_file_type(header) is None:
+                    Path(file_path).unlink(missing_ok=True)
+                    self.downloadUpdated.emit(download_id, filename, 0, 0, "Not a font")
+                    self.downloadRejected.emit(filename, describe_content(header), 0)
+                    return
+            
+            self.downloadUpdated.emit(download_id, filename, download_item.receivedBytes(), download_item.totalBytes(), "Done")
             self.downloadFinished.emit(file_path)
             # Also update parent status if available
             if hasattr(self, '_parent') and self._parent:
                 self._parent.update_download_status(f"📥 Downloaded: {filename}")
+                
+        def retry_download(self, download_id):
+            """Resume an interrupted download where it stopped"""
+            download = self.downloads.get(download_id)
+            if download and download['item'].state() == QWebEngineDownloadItem.DownloadInterrupted:
+                if download_id in self.queue:
+                    # Still waiting for a slot, start_queued() resumes it
+                    self.update_item(download_id, "Queued")
+                    return
+                download['item'].resume()
+                self.update_item(download_id, "Downloading")
 
 else:
     # Dummy classes when WebEngine is not available
     class AdBlocker:
-        def __init__(self, parent=None):
+        def __init__(self, filter_dir=None, cache_dir=None, parent=None):
             pass
     
     class DownloadManager(QObject):
         downloadFinished = pyqtSignal(str)
         downloadStarted = pyqtSignal(str)
+        downloadRejected = pyqtSignal(str, str, int)
+        downloadProgress = pyqtSignal(str, int, int)
+        downloadUpdated = pyqtSignal(int, str, int, int, str)
         
-        def __init__(self, download_dir):
+        def __init__(self, download_dir, max_concurrent=3):
             super().__init__()
             self.download_dir = Path(download_dir)
+            self.active_downloads = 0
 
 
 class BrowserWindow(QMainWindow):
     """Separate browser window with adblocker"""
     downloadCompleted = pyqtSignal(str)
     downloadStarted = pyqtSignal(str)
+    downloadRejected = pyqtSignal(str, str, int)
+    downloadProgress = pyqtSignal(str, int, int)
     windowClosed = pyqtSignal()  # Signal when window is closed
     
-    def __init__(self, download_dir):
+    def __init__(self, download_dir, app_dir=None):
         super().__init__()
         self.download_dir = download_dir
+        self.app_dir = Path(app_dir) if app_dir else None
+        self.settings = load_browser_settings(self.app_dir) if self.app_dir else dict(DEFAULT_BROWSER_SETTINGS)
         self.setWindowTitle("Font Browser - CS2 Font Downloader")
         self.setMinimumSize(1000, 700)
         self.resize(1200, 800)
@@ -135,14 +455,54 @@ class BrowserWindow(QMainWindow):
         self.download_status_timer.timeout.connect(self.allow_status_clear)
         self.status_clear_allowed = True
         
+        # Closing only hides the window so it can be reused; shutdown() really closes it
+        self.shutting_down = False
+        
         # Set window icon and styling
         self.setup_window_style()
         self.setup_ui()
         
     def closeEvent(self, event):
-        """Handle window close event"""
+        """Handle window close event - hide and keep the page for the next open"""
+        if self.shutting_down:
+            event.accept()
+            return
+        event.ignore()
+        self.hide()
         self.windowClosed.emit()  # Emit signal when window is closed
-        event.accept()  # Accept the close event
+        
+    def hideEvent(self, event):
+        """Start the idle countdown that releases the web engine"""
+        super().hideEvent(event)
+        if WEBENGINE_AVAILABLE and not self.shutting_down and self.settings['idle_release_minutes'] > 0:
+            self.idle_timer.start(int(self.settings['idle_release_minutes'] * 60 * 1000))
+            
+    def showEvent(self, event):
+        """Stop the idle countdown and restore the web engine if it was released"""
+        super().showEvent(event)
+        if WEBENGINE_AVAILABLE:
+            self.idle_timer.stop()
+            if self.browser is None:
+                self.restore_web_view()
+        
+    def shutdown(self):
+        """Close the window for good (application exit)"""
+        self.shutting_down = True
+        self.close()
+        
+    def create_profile(self):
+        """Create the browser profile, stored on disk when an app dir is known"""
+        if not self.app_dir:
+            return QWebEngineProfile(self)
+        
+        browser_dir = self.app_dir / "browser"
+        profile = QWebEngineProfile(PROFILE_NAME, self)
+        profile.setPersistentStoragePath(str(browser_dir / "storage"))
+        profile.setCachePath(str(browser_dir / "cache"))
+        profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+        profile.setHttpCacheMaximumSize(HTTP_CACHE_MAX_BYTES)
+        profile.setPersistentCookiesPolicy(QWebEngineProfile.AllowPersistentCookies)
+        return profile
         
     def setup_window_style(self):
         """Setup window styling"""
@@ -195,47 +555,55 @@ class BrowserWindow(QMainWindow):
         layout.setContentsMargins(0, 0, 0, 0)
         
         if WEBENGINE_AVAILABLE:
-            # Create custom profile with adblocker
-            self.profile = QWebEngineProfile()
-            
-            # Setup adblocker
-            self.ad_blocker = AdBlocker()
-            self.profile.setUrlRequestInterceptor(self.ad_blocker)
-            
-            # Create browser with custom profile
-            self.browser = QWebEngineView()
-            self.page = QWebEnginePage(self.profile, self.browser)
-            self.browser.setPage(self.page)
+            # Setup adblocker with the filter lists from /filters/
+            if self.app_dir:
+                self.ad_blocker = AdBlocker(self.app_dir / "filters", self.app_dir / "setup" / "filter_cache")
+            else:
+                self.ad_blocker = AdBlocker()
+            self.ad_blocker.set_lite_mode(self.settings['lite_mode'], self.settings['lite_allow'])
             
             # Setup download manager
-            self.download_manager = DownloadManager(self.download_dir)
+            self.download_manager = DownloadManager(self.download_dir, self.settings['max_concurrent_downloads'])
             self.download_manager._parent = self  # Set parent reference
             self.download_manager.downloadFinished.connect(self.downloadCompleted.emit)
             self.download_manager.downloadStarted.connect(self.downloadStarted.emit)
-            self.profile.downloadRequested.connect(self.download_manager.handle_download)
+            self.download_manager.downloadRejected.connect(self.on_download_rejected)
+            self.download_manager.downloadProgress.connect(self.downloadProgress.emit)
+            self.download_manager.downloadUpdated.connect(self.on_download_updated)
+            
+            # Download panel, docked below the page
+            self.create_download_panel()
             
             # Setup toolbar
             self.create_toolbar()
             
-            # Add browser to layout
-            layout.addWidget(self.browser)
-            
-            # Load Google Fonts as default
+            # Create the profile, page and view, and load Google Fonts as default
+            self.web_layout = layout
+            self.profile = None
+            self.page = None
+            self.browser = None
+            self.saved_history = None
+            self.saved_url = None
+            self.create_web_view()
             self.browser.load(QUrl("https://fonts.google.com"))
             
+            # Release the web engine after the window has been hidden for a while
+            self.idle_timer = QTimer(self)
+            self.idle_timer.setSingleShot(True)
+            self.idle_timer.timeout.connect(self.release_web_view)
+            
             # Setup status bar
             self.status_label = QLabel(self.last_download_status)
             self.status_label.setStyleSheet("color: #f39c12")
             self.statusBar().addWidget(self.status_label)
             
-            # Connect page signals
-            self.browser.loadStarted.connect(self.on_load_started)
-            self.browser.loadProgress.connect(self.on_load_progress)
-            self.browser.loadFinished.connect(self.on_load_finished)
-            self.browser.urlChanged.connect(self.on_url_changed)
-            
-            # Auto-accept cookies
-            self.setup_cookie_auto_accept()
+            # Ad blocking counters, refreshed once a second
+            self.adblock_label = QLabel(self.ad_blocker.stats_text())
+            self.adblock_label.setStyleSheet("color: #b0b0b0")
+            self.statusBar().addPermanentWidget(self.adblock_label)
+            self.adblock_stats_timer = QTimer(self)
+            self.adblock_stats_timer.timeout.connect(self.update_adblock_stats)
+            self.adblock_stats_timer.start(1000)
             
         else:
             # Fallback message
@@ -244,6 +612,112 @@ class BrowserWindow(QMainWindow):
             label.setStyleSheet("color: #ffffff; font-size: 16px;")
             layout.addWidget(label)
             
+    def create_web_view(self):
+        """Create the profile, page and view (again after release_web_view)"""
+        # Create custom profile with adblocker
+        self.profile = self.create_profile()
+        self.profile.setUrlRequestInterceptor(self.ad_blocker)
+        self.profile.downloadRequested.connect(self.download_manager.handle_download)
+        
+        self.apply_autoplay_setting()
+        
+        # Cookie consent script runs inside every page, no timers or round trips needed
+        consent_script = QWebEngineScript()
+        consent_script.setName("cookie-consent")
+        consent_script.setSourceCode(COOKIE_CONSENT_SCRIPT)
+        consent_script.setInjectionPoint(QWebEngineScript.DocumentReady)
+        consent_script.setWorldId(QWebEngineScript.ApplicationWorld)
+        consent_script.setRunsOnSubFrames(False)
+        self.profile.scripts().insert(consent_script)
+        
+        # Create browser with custom profile
+        self.browser = QWebEngineView()
+        self.page = QWebEnginePage(self.profile, self.browser)
+        self.browser.setPage(self.page)
+        self.web_layout.addWidget(self.browser)
+        
+        # Connect page signals
+        self.browser.loadStarted.connect(self.on_load_started)
+        self.browser.loadProgress.connect(self.on_load_progress)
+        self.browser.loadFinished.connect(self.on_load_finished)
+        self.browser.urlChanged.connect(self.on_url_changed)
+        
+    def release_web_view(self):
+        """Free the page, view and profile (and their renderer processes) while hidden
+
+        The current URL and navigation history are kept so restore_web_view()
+        can bring the user back to where they left off.
+        """
+        if self.browser is None or self.isVisible():
+            return
+        if self.download_manager.active_downloads:
+            # Downloads belong to the profile, try again later
+            self.idle_timer.start(60 * 1000)
+            return
+        
+        self.saved_url = self.browser.url()
+        try:
+            self.saved_history = QByteArray()
+            stream = QDataStream(self.saved_history, QIODevice.WriteOnly)
+            stream << self.browser.history()
+        except Exception as e:
+            print(f"Warning: Could not save browser history: {e}")
+            self.saved_history = None
+        
+        self.web_layout.removeWidget(self.browser)
+        self.browser.setPage(None)
+        self.page.deleteLater()
+        self.browser.deleteLater()
+        self.profile.deleteLater()
+        self.page = None
+        self.browser = None
+        self.profile = None
+        self.status_label.setText("💤 Browser released while idle")
+        
+    def restore_web_view(self):
+        """Recreate the web engine and return to the saved URL and history"""
+        self.create_web_view()
+        restored = False
+        if self.saved_history is not None:
+            try:
+                stream = QDataStream(self.saved_history, QIODevice.ReadOnly)
+                stream >> self.browser.history()
+                restored = True
+            except Exception as e:
+                print(f"Warning: Could not restore browser history: {e}")
+        if not restored:
+            self.browser.load(self.saved_url if self.saved_url and self.saved_url.isValid() else QUrl("https://fonts.google.com"))
+        self.saved_history = None
+        self.saved_url = None
+        self.status_label.setText(self.last_download_status)
+        
+    def set_lite_mode(self, enabled):
+        """Toggle lite mode: block images, media and web fonts (except allowed sites) and autoplay"""
+        self.settings['lite_mode'] = enabled
+        if self.app_dir:
+            save_browser_settings(self.app_dir, self.settings)
+        self.ad_blocker.set_lite_mode(enabled)
+        if self.profile is not None:
+            self.apply_autoplay_setting()
+        if self.browser is not None:
+            self.browser.reload()
+        self.update_download_status("🪶 Lite mode on" if enabled else "🪶 Lite mode off")
+        
+    def apply_autoplay_setting(self):
+        """No autoplay in lite mode, otherwise Qt's default (which also requires a user gesture)"""
+        settings = self.profile.settings()
+        if self.settings['lite_mode']:
+            settings.setAttribute(QWebEngineSettings.PlaybackRequiresUserGesture, True)
+        else:
+            settings.resetAttribute(QWebEngineSettings.PlaybackRequiresUserGesture)
+        
+    def set_process_model(self, process_model):
+        """Store the renderer process model, used from the next launch"""
+        self.settings['process_model'] = process_model
+        if self.app_dir:
+            save_browser_settings(self.app_dir, self.settings)
+        self.update_download_status(f"⚙️ Process model '{process_model}' applies after a restart")
+        
     def on_url_changed(self, url):
         """Handle URL changes - only clear download status if timer allows"""
         if hasattr(self, 'status_label') and self.status_clear_allowed:
@@ -261,6 +735,80 @@ class BrowserWindow(QMainWindow):
             self.download_status_timer.stop()  # Stop any existing timer
             self.download_status_timer.start(5000)  # Start 5-second timer
             
+    def update_adblock_stats(self):
+        """Show the ad blocker's request and cache counters in the status bar"""
+        if hasattr(self, 'adblock_label'):
+            self.adblock_label.setText(self.ad_blocker.stats_text())
+            
+    def create_download_panel(self):
+        """Dock listing queued, running and finished downloads with their progress"""
+        self.download_dock = QDockWidget("Downloads", self)
+        self.download_dock.setObjectName("downloads")
+        self.download_dock.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.RightDockWidgetArea)
+        
+        self.download_list = QTreeWidget()
+        self.download_list.setColumnCount(4)
+        self.download_list.setHeaderLabels(["File", "Progress", "Status", ""])
+        self.download_list.setRootIsDecorated(False)
+        self.download_list.setColumnWidth(0, 280)
+        self.download_list.setColumnWidth(1, 220)
+        self.download_list.setStyleSheet("""
+            QTreeWidget {
+                background: #2d2d2d;
+                color: #ffffff;
+                border: none;
+            }
+            QHeaderView::section {
+                background: #3e3e3e;
+                color: #b0b0b0;
+                border: none;
+                padding: 4px;
+            }
+        """)
+        self.download_rows = {}
+        
+        self.download_dock.setWidget(self.download_list)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.download_dock)
+        self.download_dock.hide()
+        
+    def on_download_updated(self, download_id, filename, received, total, status):
+        """Add or update a row of the download panel"""
+        row = self.download_rows.get(download_id)
+        if row is None:
+            row = QTreeWidgetItem([filename, "", status, ""])
+            self.download_list.addTopLevelItem(row)
+            progress_bar = QProgressBar()
+            progress_bar.setTextVisible(True)
+            self.download_list.setItemWidget(row, 1, progress_bar)
+            cancel_button = QPushButton("✖")
+            cancel_button.setToolTip("Cancel download")
+            cancel_button.setFixedWidth(30)
+            cancel_button.clicked.connect(lambda: self.download_manager.cancel_download(download_id))
+            self.download_list.setItemWidget(row, 3, cancel_button)
+            self.download_rows[download_id] = row
+            self.download_dock.show()
+            
+        progress_bar = self.download_list.itemWidget(row, 1)
+        if total > 0:
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(int(received * 100 / total))
+            progress_bar.setFormat(f"%p% ({received / (1024 * 1024):.1f} / {total / (1024 * 1024):.1f} MB)")
+        elif status == "Done":
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(100)
+        else:
+            progress_bar.setRange(0, 0)  # Unknown size
+        row.setText(2, status)
+        
+        # Finished rows can't be cancelled any more
+        if status in ("Done", "Cancelled", "Not a font") or status.startswith("Failed"):
+            self.download_list.itemWidget(row, 3).setEnabled(False)
+        
+    def on_download_rejected(self, filename, content, avoided):
+        """Show a cancelled non-font download in the status bar and pass it on"""
+        self.update_download_status(f"⛔ Cancelled {filename}: {content}, not a font")
+        self.downloadRejected.emit(filename, content, avoided)
+        
     def allow_status_clear(self):
         """Called by timer after 5 seconds to allow status clearing"""
         self.status_clear_allowed = True
@@ -276,12 +824,12 @@ class BrowserWindow(QMainWindow):
         # Back button
         back_action = toolbar.addAction("←")
         back_action.setToolTip("Go Back")
-        back_action.triggered.connect(lambda: [self.browser.back(), self._clear_processed_urls()])
+        back_action.triggered.connect(lambda: self.browser.back())
         
         # Forward button
         forward_action = toolbar.addAction("→")
         forward_action.setToolTip("Go Forward")
-        forward_action.triggered.connect(lambda: [self.browser.forward(), self._clear_processed_urls()])
+        forward_action.triggered.connect(lambda: self.browser.forward())
         
         toolbar.addSeparator()
         
@@ -296,6 +844,34 @@ class BrowserWindow(QMainWindow):
         
         toolbar.addSeparator()
         
+        # Download panel toggle
+        downloads_action = toolbar.addAction("📥 Downloads")
+        downloads_action.setToolTip("Show or hide the download panel")
+        downloads_action.triggered.connect(lambda: self.download_dock.setVisible(not self.download_dock.isVisible()))
+        
+        # Lite mode toggle
+        lite_action = toolbar.addAction("🪶 Lite")
+        lite_action.setToolTip("Lite mode: block images, video and web fonts (font previews stay allowed)")
+        lite_action.setCheckable(True)
+        lite_action.setChecked(self.settings['lite_mode'])
+        lite_action.toggled.connect(self.set_lite_mode)
+        
+        # Renderer process model setting
+        process_button = QToolButton()
+        process_button.setText("⚙️ Processes")
+        process_button.setToolTip("Renderer process model (applies after a restart)")
+        process_button.setPopupMode(QToolButton.InstantPopup)
+        process_menu = QMenu(process_button)
+        process_group = QActionGroup(process_menu)
+        for process_model in RENDERER_PROCESS_MODELS:
+            action = process_menu.addAction(process_model)
+            action.setCheckable(True)
+            action.setChecked(process_model == self.settings['process_model'])
+            action.triggered.connect(lambda checked, model=process_model: self.set_process_model(model))
+            process_group.addAction(action)
+        process_button.setMenu(process_menu)
+        toolbar.addWidget(process_button)
+        
         # Download info
         download_label = QLabel("📥 Downloads → /DL/ | 🔒 URL: Read-only")
         download_label.setStyleSheet("color: #b0b0b0; font-size: 12px; padding: 5px;")
@@ -325,108 +901,6 @@ class BrowserWindow(QMainWindow):
             if hasattr(self, 'url_bar') and hasattr(self, 'browser'):
                 current_url = self.browser.url().toString()
                 self.url_bar.setText(current_url)
-            # Auto-accept cookies after page loads
-            self.auto_accept_cookies()
-            
-    def setup_cookie_auto_accept(self):
-        """Setup automatic cookie acceptance"""
-        # This will be called after page loads
-        pass
-        
-    def auto_accept_cookies(self):
-        """Automatically accept cookies on the current page - targeted approach"""
-        if not WEBENGINE_AVAILABLE or not hasattr(self, 'browser'):
-            return
-            
-        # Only run on initial page load, not on every page change
-        current_url = self.browser.url().toString()
-        if not hasattr(self, '_processed_urls'):
-            self._processed_urls = set()
-        
-        # Don't process the same URL multiple times
-        if current_url in self._processed_urls:
-            return
-            
-        self._processed_urls.add(current_url)
-        
-        # Targeted cookie acceptance script for specific font sites only
-        cookie_script = """
-        (function() {
-            // Specific selectors for known font sites only
-            var cookieSelectors = [
-                // Google Fonts
-                'a[class*="callout"][class*="link"]',
-                'a[*ngcontent*][class*="gf-label-large"]',
-                
-                // DaFont
-                'button.sd-cmp-1bquj',
-                'button[class*="sd-cmp"]',
-                
-                // FontGet
-                '#accept-choices',
-                'div.sn-b-def.sn-three-btn',
-                
-                // 1001Fonts
-                '#accept-btn',
-                'button[mode="primary"][id="accept-btn"]',
-                
-                // Font Squirrel
-                'button.cky-btn.cky-btn-accept',
-                'button[data-cky-tag="accept-button"]'
-            ];
-            
-            var clicked = false;
-            
-            // Try specific selectors only
-            for (var i = 0; i < cookieSelectors.length && !clicked; i++) {
-                try {
-                    var elements = document.querySelectorAll(cookieSelectors[i]);
-                    for (var j = 0; j < elements.length && !clicked; j++) {
-                        var element = elements[j];
-                        if (element && element.offsetParent !== null && 
-                            element.style.display !== 'none' && !element.disabled &&
-                            element.style.visibility !== 'hidden') {
-                            
-                            var text = element.textContent.toLowerCase().trim();
-                            
-                            // Only click if text contains expected cookie acceptance terms
-                            if (text.includes('dismiss') || text.includes('accept') || 
-                                text.includes('agree') || text.includes('visit')) {
-                                
-                                // Handle special div elements (FontGet)
-                                if (element.tagName.toLowerCase() === 'div') {
-                                    var event = new MouseEvent('click', {
-                                        bubbles: true,
-                                        cancelable: true,
-                                        view: window
-                                    });
-                                    element.dispatchEvent(event);
-                                    
-                                    if (typeof element.click === 'function') {
-                                        element.click();
-                                    }
-                                } else {
-                                    element.click();
-                                }
-                                
-                                clicked = true;
-                            }
-                        }
-                    }
-                } catch (e) {
-                    // Silently continue on error
-                }
-            }
-        })();
-        """
-        
-        # Execute with delay for DOM to be ready
-        QTimer.singleShot(500, lambda: self.browser.page().runJavaScript(cookie_script))
-        
-    def _clear_processed_urls(self):
-        """Clear processed URLs to allow cookie acceptance on manual navigation"""
-        if hasattr(self, '_processed_urls'):
-            self._processed_urls.clear()
             
     def create_font_sites_menu(self, toolbar):
         """Create font sites dropdown menu"""
@@ -488,7 +962,6 @@ class BrowserWindow(QMainWindow):
             action = menu.addAction(name)
             action.triggered.connect(lambda checked, u=url, n=name: [
                 self.browser.load(QUrl(u)), 
-                self._clear_processed_urls(),
                 self.setWindowTitle(f"{n} Browser - CS2 Font Downloader")
             ])
         
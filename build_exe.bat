@@ -12,7 +12,7 @@ echo.
 
 REM Install/upgrade required packages
 echo Installing dependencies...
-pip install --upgrade pyinstaller PyQt5 fonttools requests
+pip install --upgrade pyinstaller PyQt5 fonttools requests bsdiff4 zstandard
 echo.
 
 REM Build with PyInstaller using spec file
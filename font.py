@@ -7,8 +7,11 @@ import os
 import stat
 import shutil
 import filecmp
+import hashlib
+import json
 import re
 from pathlib import Path
+from tracing import tracer, traced
 
 try:
     from fontTools.ttLib import TTFont
@@ -18,6 +21,250 @@ except ImportError:
     print("Warning: fonttools library not available")
 
 
+def read_font_family(font_file):
+    """Read the font family name (nameID 1) from a font path or binary file object"""
+    if not FONTTOOLS_AVAILABLE:
+        print("Error: fonttools not available - cannot read font metadata")
+        return None
+        
+    try:
+        font = TTFont(font_file)
+        name_table = font['name']
+        
+        # Try to get the font family name (nameID 1)
+        for record in name_table.names:
+            if record.nameID == 1 and record.platformID == 3:  # Microsoft platform
+                font_name = record.toUnicode()
+                return font_name
+        
+        # Fallback: try other name IDs
+        for record in name_table.names:
+            if record.nameID == 1:
+                try:
+                    font_name = record.toUnicode()
+                    return font_name
+                except:
+                    continue
+        
+        return None
+    except Exception as e:
+        print(f"Error reading font metadata from {font_file}: {e}")
+        return None
+
+
+class FontEntry:
+    """A font file shown in the font selection list"""
+    __slots__ = ('source', 'path', 'member', 'family', 'hash', 'installed')
+
+    # Display prefix for each source directory
+    LABELS = {
+        'installed': "✅ [installed]",
+        'assets': "⭐ [assets]",
+        'fonts': "📁 [fonts]",
+        'dl': "🔥 [dl]",
+        'archive': "📦 [archive]",
+    }
+
+    def __init__(self, source, path, family=None, hash=None, installed=False, member=None):
+        self.source = source
+        self.path = Path(path)
+        # Member path inside the archive at self.path (one name per nesting level)
+        self.member = tuple(member) if member else None
+        self.family = family
+        self.hash = hash
+        self.installed = installed
+
+    @property
+    def filename(self):
+        return Path(self.member[-1]).name if self.member else self.path.name
+
+    @property
+    def display_text(self):
+        label = self.LABELS['installed'] if self.installed else self.LABELS[self.source]
+        if self.member:
+            return f"{label} {self.path.name} › {self.filename}"
+        return f"{label} {self.path.name}"
+
+    def __repr__(self):
+        return f"FontEntry({self.source!r}, {self.display_text!r})"
+
+
+def hash_bytes(data):
+    """SHA-256 content hash of in-memory font data"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path):
+    """SHA-256 content hash of a font file"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(256 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentHashIndex:
+    """Content hashes of the font files in the library directories
+
+    Hashes are cached on disk and only recomputed when a file's size or
+    modification time changes, so rescanning the library stays cheap.
+    Directories are given in priority order; files in the first one
+    (assets) are never deleted by dedupe().
+    """
+
+    def __init__(self, index_path, directories):
+        self.index_path = Path(index_path)
+        self.directories = [Path(d) for d in directories]
+        self.files = {}
+        self.by_hash = {}
+        self.load()
+
+    def load(self):
+        try:
+            if self.index_path.exists():
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.files = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load content hash index: {e}")
+            self.files = {}
+
+    def save(self):
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(self.files, f)
+        except Exception as e:
+            print(f"Warning: Could not save content hash index: {e}")
+
+    def scan(self):
+        """Rehash new or changed font files and drop removed ones"""
+        files = {}
+        changed = False
+        for directory in self.directories:
+            if not directory.exists():
+                continue
+            for font_file in directory.iterdir():
+                if font_file.suffix.lower() not in ('.ttf', '.otf') or not font_file.is_file():
+                    continue
+                stat_result = font_file.stat()
+                key = f"{stat_result.st_size}:{stat_result.st_mtime_ns}"
+                record = self.files.get(str(font_file))
+                if not record or record['key'] != key:
+                    record = {'key': key, 'sha256': hash_file(font_file)}
+                    changed = True
+                files[str(font_file)] = record
+        changed = changed or files.keys() != self.files.keys()
+        self.files = files
+        self.rebuild()
+        if changed:
+            self.save()
+
+    def rebuild(self):
+        self.by_hash = {}
+        for path, record in self.files.items():
+            self.by_hash.setdefault(record['sha256'], []).append(Path(path))
+
+    def get_hash(self, file_path):
+        record = self.files.get(str(file_path))
+        return record['sha256'] if record else None
+
+    def find(self, digest, exclude=None, within=None):
+        """Find an existing font file with the given content hash"""
+        for path in self.by_hash.get(digest, []):
+            if exclude and path == Path(exclude):
+                continue
+            if within and path.parent != Path(within):
+                continue
+            if path.exists():
+                return path
+        return None
+
+    def duplicates(self):
+        """Groups of byte-identical font files, ordered by directory priority"""
+        rank = {directory: i for i, directory in enumerate(self.directories)}
+        return [sorted(paths, key=lambda p: (rank.get(p.parent, len(rank)), p.name.lower()))
+                for paths in self.by_hash.values() if len(paths) > 1]
+
+    def dedupe(self, protected=()):
+        """Delete all but one copy of every duplicate group
+
+        The copy in the highest-priority directory is kept, unless one of
+        the copies is protected (e.g. the installed font). Returns the
+        removed paths.
+        """
+        protected = {Path(p) for p in protected}
+        removed = []
+        for paths in self.duplicates():
+            keep = next((p for p in paths if p in protected), paths[0])
+            for path in paths:
+                if path == keep or path in protected or path.parent == self.directories[0]:
+                    continue
+                try:
+                    path.unlink()
+                    removed.append(path)
+                except Exception as e:
+                    print(f"Warning: Could not remove duplicate {path.name}: {e}")
+        if removed:
+            self.scan()
+        return removed
+
+
+def scan_font_dir(source, directory, hash_index=None):
+    """List font files in a directory as FontEntry records"""
+    entries = []
+    directory = Path(directory)
+    if directory.exists():
+        for font_file in directory.iterdir():
+            if font_file.suffix.lower() in ('.ttf', '.otf') and font_file.is_file():
+                entries.append(FontEntry(source, font_file, hash=hash_index.get_hash(font_file) if hash_index else None))
+    return entries
+
+
+def collect_font_entries(hash_index, fonts_dir, assets_dir, dl_dir, font_manager=None, archive_entries=()):
+    """Entries of the font selection list in display order
+
+    Rehashes the library, then lists the installed font first (found by
+    reading families until it matches), Asimovian from assets, the fonts in
+    /fonts/ and /dl/ once per filename, and last the archive members whose
+    bytes aren't listed yet. The GUI fills its combo box from this.
+    """
+    entries = []
+    added_files = set()  # Track added filenames to avoid duplicates
+    
+    # Update content hashes of new or changed font files
+    hash_index.scan()
+    
+    fonts_entries = scan_font_dir("fonts", fonts_dir, hash_index)
+    asimovian_path = Path(assets_dir) / "Asimovian-Regular.ttf"
+    assets_entries = ([FontEntry("assets", asimovian_path, hash=hash_index.get_hash(asimovian_path))]
+                      if asimovian_path.exists() else [])
+    
+    # Try to find the file for the font currently installed in CS2
+    installed_font = font_manager.get_currently_installed_font() if font_manager else None
+    if installed_font:
+        for entry in fonts_entries + scan_font_dir("assets", assets_dir, hash_index):
+            entry.family = font_manager.get_font_internal_name(entry.path)
+            if entry.family == installed_font:
+                entry.installed = True
+                entries.append(entry)
+                added_files.add(entry.filename.lower())
+                break
+    
+    for entry in assets_entries + fonts_entries + scan_font_dir("dl", dl_dir, hash_index):
+        if entry.filename.lower() not in added_files:
+            entries.append(entry)
+            added_files.add(entry.filename.lower())
+    
+    # Fonts inside downloaded archives, skipping members whose bytes are already in the library
+    added_hashes = {entry.hash for entry in entries if entry.hash}
+    for entry in archive_entries:
+        if entry.hash not in added_hashes:
+            entries.append(entry)
+            if entry.hash:
+                added_hashes.add(entry.hash)
+    return entries
+
+
 class FontManager:
     """Core font management functionality"""
     
@@ -40,33 +287,7 @@ class FontManager:
         
     def get_font_internal_name(self, ttf_path):
         """Get the internal font name from a TTF file using fonttools"""
-        if not FONTTOOLS_AVAILABLE:
-            print("Error: fonttools not available - cannot read font metadata")
-            return None
-            
-        try:
-            font = TTFont(ttf_path)
-            name_table = font['name']
-            
-            # Try to get the font family name (nameID 1)
-            for record in name_table.names:
-                if record.nameID == 1 and record.platformID == 3:  # Microsoft platform
-                    font_name = record.toUnicode()
-                    return font_name
-            
-            # Fallback: try other name IDs
-            for record in name_table.names:
-                if record.nameID == 1:
-                    try:
-                        font_name = record.toUnicode()
-                        return font_name
-                    except:
-                        continue
-            
-            return None
-        except Exception as e:
-            print(f"Error reading font metadata from {ttf_path}: {e}")
-            return None
+        return read_font_family(ttf_path)
     
     def get_currently_installed_font(self):
         """Get the currently installed custom font name"""
@@ -132,6 +353,7 @@ class FontManager:
             
         return fonts_conf_path, repl_global_path, cs2_fonts_dir
     
+    @traced("analyze_current_fonts")
     def analyze_current_fonts(self, fonts_conf_path, repl_global_path):
         """Analyze current font configuration"""
         current_fonts = set()
@@ -170,10 +392,14 @@ class FontManager:
         # Filter out ignored system fonts
         filtered_fonts = [font for font in current_fonts if font not in self.ignored_fonts]
         
+        tracer.current().set(font_names=len(filtered_fonts), font_files=len(current_fontfiles))
         return filtered_fonts, current_fontfiles
     
+    @traced("apply_font_configuration")
     def apply_font_configuration(self, font_name, font_filename):
         """Apply font configuration without copying files (used for first install)"""
+        span = tracer.current()
+        span.set(font=font_name, file=font_filename)
         fonts_conf_path, repl_global_path, cs2_fonts_dir = self.get_cs2_paths()
         
         # Get current configuration for replacement
@@ -195,6 +421,8 @@ class FontManager:
             self.set_readonly(fonts_conf_path)
             self.set_readonly(repl_global_path)
             
+            span.set(replacements=repl_replacements + font_replacements + file_replacements)
+            span.add('files_touched', 2)
             print(f"Font configuration updated:")
             print(f"  - 42-repl-global.conf: {repl_replacements} replacements")
             print(f"  - fonts.conf: {font_replacements} font names, {file_replacements} file patterns")
@@ -202,6 +430,7 @@ class FontManager:
         except Exception as e:
             raise Exception(f"Failed to update font configuration: {e}")
     
+    @traced("rewrite 42-repl-global.conf")
     def replace_font_in_repl_global(self, file_path, current_font_names, new_font_name):
         """Replace font names in 42-repl-global.conf"""
         try:
@@ -235,11 +464,13 @@ class FontManager:
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(content)
             
+            tracer.current().set(replacements=replacements_made, bytes_written=len(content.encode('utf-8')))
             return replacements_made
         except Exception as e:
             print(f"Error updating {file_path}: {e}")
             return 0
     
+    @traced("rewrite fonts.conf")
     def replace_font_in_fonts_conf(self, file_path, current_font_names, current_fontfiles, new_font_name, new_font_filename):
         """Replace font names and filename in fonts.conf"""
         try:
@@ -288,13 +519,17 @@ class FontManager:
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(content)
             
+            tracer.current().set(font_replacements=font_replacements, file_replacements=file_replacements,
+                                 bytes_written=len(content.encode('utf-8')))
             return font_replacements, file_replacements
         except Exception as e:
             print(f"Error updating {file_path}: {e}")
             return 0, 0
     
+    @traced("clean_cs2_fonts")
     def clean_cs2_fonts(self, cs2_fonts_dir):
         """Remove old custom fonts from CS2 directory that match fonts in /fonts/ directory"""
+        span = tracer.current()
         try:
             if not cs2_fonts_dir.exists():
                 return 0
@@ -317,19 +552,24 @@ class FontManager:
                     if cs2_font.name.lower() in our_fonts:
                         try:
                             self.remove_readonly(cs2_font)
+                            font_size = cs2_font.stat().st_size
                             cs2_font.unlink()
                             removed_count += 1
+                            span.add('bytes_removed', font_size)
                             print(f"Removed old font from CS2: {cs2_font.name}")
                         except Exception as e:
                             print(f"Warning: Could not remove {cs2_font.name}: {e}")
             
+            span.set(files_removed=removed_count, library_fonts=len(our_fonts))
             return removed_count
         except Exception as e:
             print(f"Error during CS2 font cleanup: {e}")
             return 0
     
+    @traced("restore_defaults")
     def restore_defaults(self, setup_dir):
         """Restore CS2 to default fonts by copying original backups from setup directory"""
+        span = tracer.current()
         if not self.cs2_path:
             raise Exception("CS2 path not set")
             
@@ -355,6 +595,7 @@ class FontManager:
             if config_file.exists():
                 self.remove_readonly(config_file)
                 config_file.unlink()
+                span.add('files_touched')
                 print(f"Deleted custom config file: {config_file.name}")
         
         # Remove any existing .old files in CS2 directory
@@ -365,6 +606,7 @@ class FontManager:
             if old_file.exists():
                 self.remove_readonly(old_file)
                 old_file.unlink()
+                span.add('files_touched')
                 print(f"Deleted existing .old file: {old_file.name}")
         
         # Restore fonts.conf from setup backup (without .old extension)
@@ -372,6 +614,7 @@ class FontManager:
             fonts_conf_path.parent.mkdir(parents=True, exist_ok=True)
             shutil.copy2(fonts_conf_backup, fonts_conf_path)
             files_restored += 1
+            span.add('bytes_copied', fonts_conf_path.stat().st_size)
             print(f"Restored fonts.conf from setup backup")
         else:
             raise Exception("fonts.conf.old not found in setup directory")
@@ -381,6 +624,7 @@ class FontManager:
             repl_global_path.parent.mkdir(parents=True, exist_ok=True)
             shutil.copy2(repl_global_backup, repl_global_path)
             files_restored += 1
+            span.add('bytes_copied', repl_global_path.stat().st_size)
             print(f"Restored 42-repl-global.conf from setup backup")
         else:
             raise Exception("42-repl-global.conf.old not found in setup directory")
@@ -395,6 +639,8 @@ class FontManager:
                 stratum_path.unlink()
             self.remove_readonly(stratum_backup_cs2)
             stratum_backup_cs2.rename(stratum_path)
+            span.set(stratum_source="cs2 .old")
+            span.add('files_touched')
             print("Restored stratum2.uifont from CS2 backup (.old file)")
         elif stratum_backup_source.exists():
             # If no .old in CS2 dir, copy from /setup
@@ -402,12 +648,16 @@ class FontManager:
                 self.remove_readonly(stratum_path)
                 stratum_path.unlink()
             shutil.copy2(stratum_backup_source, stratum_path)
+            span.add('bytes_copied', stratum_path.stat().st_size)
+            span.set(stratum_source="setup")
+            span.add('files_touched')
             print("Restored stratum2.uifont from setup directory")
         else:
             print("Warning: No stratum2.uifont backup found")
         
         # Clean up any custom font files from CS2 directory
         removed_fonts = self.clean_cs2_fonts(cs2_fonts_dir)
+        span.add('files_touched', removed_fonts)
         if removed_fonts > 0:
             print(f"Removed {removed_fonts} custom font files from CS2 directory")
 
@@ -429,10 +679,15 @@ class FontManager:
         except Exception as e:
             print(f"Warning: Could not reset first install flag: {e}")
         
+        span.set(files_restored=files_restored)
+        span.add('files_touched', files_restored)
         return files_restored
     
+    @traced("apply_font_to_cs2")
     def apply_font_to_cs2(self, font_name, font_filename, font_path):
         """Apply font to CS2 configuration"""
+        span = tracer.current()
+        span.set(font=font_name, file=font_filename)
         if not self.cs2_path:
             raise Exception("CS2 path not set")
             
@@ -446,15 +701,20 @@ class FontManager:
         
         # Clean up old fonts from CS2 directory before applying new one
         removed_count = self.clean_cs2_fonts(cs2_fonts_dir)
+        span.add('files_touched', removed_count)
         if removed_count > 0:
             print(f"Cleaned up {removed_count} old font files from CS2 directory")
         
         # Copy font file to CS2 fonts directory
-        dest_font_path = cs2_fonts_dir / font_filename
-        if dest_font_path.exists():
-            self.remove_readonly(dest_font_path)
-            dest_font_path.unlink()
-        shutil.copy2(font_path, dest_font_path)
+        with tracer.span("copy_font", file=font_filename) as copy_span:
+            dest_font_path = cs2_fonts_dir / font_filename
+            if dest_font_path.exists():
+                self.remove_readonly(dest_font_path)
+                dest_font_path.unlink()
+            shutil.copy2(font_path, dest_font_path)
+            copy_span.set(bytes_copied=dest_font_path.stat().st_size)
+        span.set(bytes_copied=copy_span.attributes['bytes_copied'])
+        span.add('files_touched')
         print(f"Copied font file to CS2: {font_filename}")
         
         # Update extension pattern in fonts.conf if needed
@@ -473,9 +733,11 @@ class FontManager:
                     extension_updated = True
                 
                 if extension_updated:
-                    self.remove_readonly(fonts_conf_path)
-                    with open(fonts_conf_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
+                    with tracer.span("rewrite fonts.conf extension", extension=font_extension):
+                        self.remove_readonly(fonts_conf_path)
+                        with open(fonts_conf_path, 'w', encoding='utf-8') as f:
+                            f.write(content)
+                    span.add('files_touched')
                     print(f"Updated font extension pattern: {font_extension}")
                     
         except Exception as e:
@@ -500,6 +762,8 @@ class FontManager:
             self.set_readonly(fonts_conf_path)
             self.set_readonly(repl_global_path)
             
+            span.set(replacements=repl_replacements + font_replacements + file_replacements)
+            span.add('files_touched', 2)
             print(f"Font configuration updated:")
             print(f"  - 42-repl-global.conf: {repl_replacements} replacements")
             print(f"  - fonts.conf: {font_replacements} font names, {file_replacements} file patterns")
@@ -6,8 +6,9 @@ Contains the primary user interface components
 import os
 import re
 import shutil
-import zipfile
 import sys
+import time
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
 
@@ -16,8 +17,17 @@ from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
 from browser import BrowserWindow
-from font import FontManager
+from font import FontManager, FontEntry, ContentHashIndex, collect_font_entries, hash_file
+from archive import (ArchiveIndex, ArchiveIndexWorker, MemberReadWorker, StreamIndexWorker, ZipStreamIndexer,
+                     get_archive_backend, is_archive, extract_member, reserve_font_path)
 from version import CURRENT_VERSION
+from tracing import tracer
+
+# New bytes needed before a downloading ZIP is scanned for more fonts
+STREAM_FEED_BYTES = 256 * 1024
+
+# Archive members kept in memory for the font preview
+PREVIEW_CACHE_SIZE = 8
 
 
 class ModernButton(QPushButton):
@@ -138,6 +148,16 @@ class CS2FontChangerGUI(QMainWindow):
         self.browser_window = None
         self.font_manager = None
         self.default_font_family = None
+        self.index_workers = []
+        self.indexing_archives = set()
+        self.stream_indexers = {}
+        self.stream_workers = {}  # One running StreamIndexWorker per download path
+        self.stream_finish_pending = {}  # Indexers to finish once their running feed is done
+        self.preview_cache = OrderedDict()
+        self.preview_workers = {}
+        self.archive_index = ArchiveIndex(self.setup_dir / "archive_index.json")
+        self.hash_index = ContentHashIndex(self.setup_dir / "hash_index.json",
+                                           [self.assets_dir, self.fonts_dir, self.dl_dir])
         
         # Set application icon
         self.setup_app_icon()
@@ -164,9 +184,9 @@ class CS2FontChangerGUI(QMainWindow):
     def closeEvent(self, event):
         """Handle main window close event - terminate entire application"""
         try:
-            # Close browser window if it exists
-            if self.browser_window and self.browser_window.isVisible():
-                self.browser_window.close()
+            # Close browser window if it exists (it is only hidden while the app runs)
+            if self.browser_window:
+                self.browser_window.shutdown()
                 self.browser_window = None
             
             # Accept the close event and quit the application
@@ -597,8 +617,9 @@ class CS2FontChangerGUI(QMainWindow):
             # Update the font list items
             self.font_list.clear()
             for i in range(self.font_combo.count()):
-                item_text = self.font_combo.itemText(i)
-                self.font_list.addItem(item_text)
+                item = QListWidgetItem(self.font_combo.itemText(i))
+                item.setData(Qt.UserRole, self.font_combo.itemData(i))
+                self.font_list.addItem(item)
                 
             # Select current item
             current_index = self.font_combo.currentIndex()
@@ -625,12 +646,8 @@ class CS2FontChangerGUI(QMainWindow):
     def on_font_selected(self, item):
         """Handle font selection from custom dropdown"""
         try:
-            # Find the corresponding index in the combo box
-            selected_text = item.text()
-            for i in range(self.font_combo.count()):
-                if self.font_combo.itemText(i) == selected_text:
-                    self.font_combo.setCurrentIndex(i)
-                    break
+            # List rows mirror the combo box items one to one
+            self.font_combo.setCurrentIndex(self.font_list.row(item))
                     
             # Hide the dropdown
             self.hide_custom_dropdown()
@@ -709,10 +726,24 @@ class CS2FontChangerGUI(QMainWindow):
             }
         """)
         
-        # Center the clear button
+        # Remove byte-identical font copies in one go
+        dedupe_btn = ModernButton("Remove Duplicates", button_type="normal")
+        dedupe_btn.clicked.connect(self.remove_duplicate_fonts)
+        dedupe_btn.setToolTip("Delete byte-identical copies of fonts in /fonts/ and /dl/")
+        dedupe_btn.setStyleSheet(clear_btn.styleSheet())
+        
+        # Timed spans of font operations, for chrome://tracing or Perfetto
+        trace_btn = ModernButton("Export Trace", button_type="normal")
+        trace_btn.clicked.connect(self.export_trace)
+        trace_btn.setToolTip("Save timings of apply/restore operations as Chrome trace JSON")
+        trace_btn.setStyleSheet(clear_btn.styleSheet())
+        
+        # Center the log buttons
         clear_layout = QHBoxLayout()
         clear_layout.addStretch()
         clear_layout.addWidget(clear_btn)
+        clear_layout.addWidget(dedupe_btn)
+        clear_layout.addWidget(trace_btn)
         clear_layout.addStretch()
         
         logs_layout.addWidget(self.log_text, 1)
@@ -896,23 +927,31 @@ class CS2FontChangerGUI(QMainWindow):
         """Toggle browser window"""
         try:
             if self.browser_window is None or not self.browser_window.isVisible():
-                # Create and show browser window
-                self.browser_window = BrowserWindow(self.dl_dir)
-                self.browser_window.downloadCompleted.connect(self.on_download_completed)
-                self.browser_window.downloadStarted.connect(self.on_download_started)
-                self.browser_window.windowClosed.connect(self.on_browser_window_closed)
+                started = time.perf_counter()
+                reused = self.browser_window is not None
+                
+                # Create the browser window once, later opens just show it again
+                if not reused:
+                    self.browser_window = BrowserWindow(self.dl_dir, self.app_dir)
+                    self.browser_window.downloadCompleted.connect(self.on_download_completed)
+                    self.browser_window.downloadStarted.connect(self.on_download_started)
+                    self.browser_window.downloadRejected.connect(self.on_download_rejected)
+                    self.browser_window.downloadProgress.connect(self.on_download_progress)
+                    self.browser_window.windowClosed.connect(self.on_browser_window_closed)
                 self.browser_window.show()
+                self.browser_window.raise_()
+                self.browser_window.activateWindow()
+                elapsed_ms = (time.perf_counter() - started) * 1000
                 
                 self.download_btn.setText("🔴 Close Browser")
                 self.download_btn.button_type = "danger"
                 self.download_btn.setup_style()
                 self.download_status.setText("Browser window is open")
-                self.log_message("<span style='color: #3498db'>Browser</span> Font browser window opened")
+                self.log_message(f"<span style='color: #3498db'>Browser</span> Font browser window opened "
+                                 f"({'reused' if reused else 'created'} in {elapsed_ms:.0f} ms)")
             else:
-                # Close browser window
-                if self.browser_window:
-                    self.browser_window.close()
-                    self.browser_window = None
+                # Hide browser window, it is kept for the next open
+                self.browser_window.hide()
                 
                 self.download_btn.setText("🌐 Open Font Browser")
                 self.download_btn.button_type = "primary"
@@ -925,30 +964,81 @@ class CS2FontChangerGUI(QMainWindow):
             
     def on_download_started(self, filename):
         """Handle download started"""
+        self.stream_indexers.pop(str(self.dl_dir / filename), None)
         self.log_message(f"<span style='color: #f39c12'>Download</span> Download started: <strong>{filename}</strong>")
         
+    def on_download_progress(self, file_path, received, total):
+        """Index the fonts of a ZIP download while it is still arriving"""
+        if not file_path.lower().endswith('.zip'):
+            return
+        indexer = self.stream_indexers.get(file_path)
+        if indexer is None:
+            indexer = self.stream_indexers[file_path] = ZipStreamIndexer(file_path)
+        if file_path in self.stream_workers or received - indexer.fed_size < STREAM_FEED_BYTES:
+            return
+        self.start_stream_worker(indexer)
+        
+    def start_stream_worker(self, indexer, finish=False):
+        """Feed or finish a streamed ZIP index on a background thread"""
+        file_path = str(indexer.archive_path)
+        worker = StreamIndexWorker(indexer, finish, self)
+        worker.fed.connect(self.on_stream_fed)
+        worker.indexedWhileDownloading.connect(
+            lambda path: self.log_message(f"<span style='color: #f39c12'>Archive</span> Indexed <strong>{Path(path).name}</strong> while downloading"))
+        worker.indexFinished.connect(self.on_index_finished)
+        worker.indexFailed.connect(self.on_index_failed)
+        worker.finished.connect(lambda: self.on_stream_worker_done(file_path, worker))
+        self.stream_workers[file_path] = worker
+        worker.start()
+        
+    def on_stream_fed(self, file_path, found):
+        """Show how many fonts a ZIP download has revealed so far"""
+        indexer = self.stream_indexers.get(file_path)
+        if found and indexer:
+            self.download_status.setText(f"Indexing fonts while downloading... {len(indexer.members)}")
+        
+    def on_stream_worker_done(self, file_path, worker):
+        """Start finishing an index that had to wait for the last feed"""
+        if self.stream_workers.get(file_path) is worker:
+            del self.stream_workers[file_path]
+        indexer = self.stream_finish_pending.pop(file_path, None)
+        if indexer:
+            self.start_stream_worker(indexer, finish=True)
+        
+    def on_download_rejected(self, filename, content, avoided):
+        """Handle a download cancelled because its content is not a font or archive"""
+        self.stream_indexers.pop(str(self.dl_dir / filename), None)
+        if avoided > 0:
+            saved = f"{avoided / (1024 * 1024):.1f} MB not downloaded" if avoided >= 1024 * 1024 else f"{avoided / 1024:.0f} KB not downloaded"
+        elif avoided == 0:
+            saved = "already complete"
+        else:
+            saved = "size unknown"
+        self.log_message(f"<span style='color: #e74c3c'>Cancelled</span> <strong>{filename}</strong> is {content}, "
+                         f"not a font ({saved})")
+        
     def on_download_completed(self, file_path):
         """Handle completed download"""
         file_path = Path(file_path)
         self.log_message(f"<span style='color: #2ecc71'>Success</span> Download completed: <strong>{file_path.name}</strong>")
         
-        # Process the file
-        self.process_downloaded_file(file_path)
-        
-        # Auto-refresh font list and select the downloaded font
-        self.refresh_font_list()
-        
-        # Try to auto-select the downloaded font
+        # Process the file (archives are imported in the background)
+        if self.process_downloaded_file(file_path):
+            # Auto-refresh font list and select the downloaded font
+            self.refresh_font_list()
+            self.select_downloaded_font(file_path.stem)
+            
+    def select_downloaded_font(self, stem):
+        """Try to auto-select a downloaded font by file name"""
         for i in range(self.font_combo.count()):
-            item_text = self.font_combo.itemText(i)
-            if file_path.stem.lower() in item_text.lower():
+            entry = self.font_combo.itemData(i)
+            if isinstance(entry, FontEntry) and stem.lower() in entry.filename.lower():
                 self.font_combo.setCurrentIndex(i)
-                self.log_message(f"<span style='color: #3498db'>Auto-Select</span> Selected downloaded font: <strong>{file_path.name}</strong>")
+                self.log_message(f"<span style='color: #3498db'>Auto-Select</span> Selected downloaded font: <strong>{entry.filename}</strong>")
                 break
         
     def on_browser_window_closed(self):
-        """Handle when browser window is closed manually"""
-        self.browser_window = None
+        """Handle when browser window is closed manually (it is hidden, not destroyed)"""
         self.download_btn.setText("🌐 Open Font Browser")
         self.download_btn.button_type = "primary"
         self.download_btn.setup_style()
@@ -957,137 +1047,153 @@ class CS2FontChangerGUI(QMainWindow):
         self.refresh_font_list()
         
     def process_downloaded_file(self, file_path):
-        """Process a downloaded font file"""
+        """Process a downloaded font file, returns True if it is ready to use"""
         try:
             file_path = Path(file_path)
             
-            if file_path.suffix.lower() == '.zip':
-                self.log_message(f"<span style='color: #f39c12'>Archive</span> Extracting ZIP archive: <strong>{file_path.name}</strong>")
-                
-                # Extract zip file with improved directory handling
-                with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                    extracted_fonts = 0
-                    for file in zip_ref.namelist():
-                        if file.lower().endswith(('.ttf', '.otf')) and not file.startswith('__MACOSX/'):
-                            # Extract font file to temp location first
-                            zip_ref.extract(file, self.dl_dir)
-                            extracted_path = self.dl_dir / file
-                            
-                            # Always move to root of dl directory, flattening structure
-                            final_path = self.dl_dir / Path(file).name
-                            
-                            # Handle file conflicts
-                            counter = 1
-                            original_final_path = final_path
-                            while final_path.exists():
-                                stem = original_final_path.stem
-                                suffix = original_final_path.suffix
-                                final_path = self.dl_dir / f"{stem}_{counter}{suffix}"
-                                counter += 1
-                            
-                            # Move file to final location
-                            if extracted_path != final_path:
-                                shutil.move(extracted_path, final_path)
-                                
-                            extracted_fonts += 1
-                            self.log_message(f"<span style='color: #2ecc71'>  Font</span> Extracted font: <code>{final_path.name}</code>")
-                
-                if extracted_fonts > 0:
-                    self.log_message(f"<span style='color: #2ecc71'>Success</span> Successfully extracted <strong>{extracted_fonts}</strong> font file(s)")
-                    # Remove zip file
-                    file_path.unlink()
-                    
-                    # Clean up empty directories created during extraction
-                    self.cleanup_empty_dirs(self.dl_dir)
-                                
-                    self.refresh_font_list()
+            backend = get_archive_backend(file_path)
+            
+            # ZIP downloads were indexed while they arrived, the rest and the central directory
+            # are checked on a worker, after the feed that may still be running
+            indexer = self.stream_indexers.pop(str(file_path), None)
+            if backend and indexer:
+                self.indexing_archives.add(str(file_path))
+                if str(file_path) in self.stream_workers:
+                    self.stream_finish_pending[str(file_path)] = indexer
                 else:
-                    self.log_message(f"<span style='color: #f39c12'>Warning</span> No font files found in <code>{file_path.name}</code>")
+                    self.start_stream_worker(indexer, finish=True)
+                return False
+                    
+            if backend:
+                self.log_message(f"<span style='color: #f39c12'>Archive</span> Indexing {backend.name.upper()} archive: <strong>{file_path.name}</strong>")
+                
+                # Fonts stay inside the archive until one of them is applied
+                self.start_archive_indexing([file_path])
+                return False
                     
             elif file_path.suffix.lower() in ['.ttf', '.otf']:
+                # Drop downloads that are byte-identical to a font we already have
+                self.hash_index.scan()
+                existing = self.hash_index.find(self.hash_index.get_hash(file_path), exclude=file_path)
+                if existing:
+                    file_path.unlink()
+                    self.hash_index.scan()
+                    self.log_message(f"<span style='color: #3498db'>Duplicate</span> <strong>{file_path.name}</strong> is identical to "
+                                     f"<code>{existing.name}</code> - skipped")
+                    self.refresh_font_list()
+                    self.select_downloaded_font(existing.stem)
+                    return False
                 self.log_message(f"<span style='color: #2ecc71'>Font</span> Font file ready: <strong>{file_path.name}</strong>")
-                self.refresh_font_list()
+                return True
                 
         except Exception as e:
             self.log_message(f"<span style='color: #e74c3c'>Error</span> Error processing download: {e}")
+        return False
             
-    def cleanup_empty_dirs(self, directory):
-        """Recursively remove empty directories"""
-        try:
-            for root, dirs, files in os.walk(directory, topdown=False):
-                for dir_name in dirs:
-                    dir_path = Path(root) / dir_name
-                    try:
-                        # Only remove if empty and not the main /dl/ directory
-                        if dir_path != directory and not any(dir_path.iterdir()):
-                            dir_path.rmdir()
-                            self.log_message(f"<span style='color: #3498db'>Cleanup</span> Removed empty directory: <code>{dir_name}</code>")
-                    except:
-                        pass
-        except Exception as e:
-            self.log_message(f"<span style='color: #f39c12'>Warning</span> Warning during directory cleanup: {e}")
+    def start_archive_indexing(self, archive_paths):
+        """Index the font members of archives on a background thread"""
+        archive_paths = [Path(p) for p in archive_paths if str(p) not in self.indexing_archives]
+        if not archive_paths:
+            return
+        self.indexing_archives.update(str(p) for p in archive_paths)
+        
+        worker = ArchiveIndexWorker(archive_paths, self)
+        worker.progress.connect(self.on_index_progress)
+        worker.indexFinished.connect(self.on_index_finished)
+        worker.indexFailed.connect(self.on_index_failed)
+        worker.finished.connect(lambda: self.index_workers.remove(worker))
+        self.index_workers.append(worker)
+        worker.start()
             
-    def refresh_font_list(self):
-        """Refresh the font selection dropdown with currently installed font first"""
-        fonts = []
-        added_files = set()  # Track added filenames to avoid duplicates
-        
-        # Get currently installed font from CS2
-        current_installed_font = None
-        current_installed_filename = None
-        if self.font_manager:
-            current_installed_font = self.font_manager.get_currently_installed_font()
+    def on_index_progress(self, done, total, filename):
+        """Handle progress of a background archive index"""
+        self.download_status.setText(f"Indexing fonts... {done}/{total}")
+        
+    def on_index_finished(self, archive_path, members, elapsed):
+        """Handle a finished background archive index"""
+        self.indexing_archives.discard(archive_path)
+        archive_path = Path(archive_path)
+        self.download_status.setText("Browser window is open" if self.browser_window and self.browser_window.isVisible()
+                                     else "Click to open font browser")
+        
+        if not archive_path.exists():
+            return
+        self.archive_index.put(archive_path, members)
+        
+        if members:
+            self.log_message(f"<span style='color: #2ecc71'>Success</span> Indexed <strong>{len(members)}</strong> font file(s) "
+                             f"in <code>{archive_path.name}</code> ({archive_path.suffix.lower()}, {elapsed:.2f}s)")
+            self.refresh_font_list()
+            
+            # Select the first font of the new archive
+            for i in range(self.font_combo.count()):
+                entry = self.font_combo.itemData(i)
+                if isinstance(entry, FontEntry) and entry.member and entry.path == archive_path:
+                    self.font_combo.setCurrentIndex(i)
+                    self.log_message(f"<span style='color: #3498db'>Auto-Select</span> Selected downloaded font: <strong>{entry.filename}</strong>")
+                    break
+        else:
+            self.log_message(f"<span style='color: #f39c12'>Warning</span> No font files found in <code>{archive_path.name}</code>")
+            
+    def on_index_failed(self, archive_path, error):
+        """Handle a failed background archive index"""
+        self.indexing_archives.discard(archive_path)
+        self.download_status.setText("Browser window is open" if self.browser_window and self.browser_window.isVisible()
+                                     else "Click to open font browser")
+        self.log_message(f"<span style='color: #e74c3c'>Error</span> Error processing download {Path(archive_path).name}: {error}")
+        
+        # Remember the failure so the archive isn't re-indexed on every refresh
+        if Path(archive_path).exists():
+            self.archive_index.put(archive_path, [])
             
-            # Try to find the filename for the installed font
-            if current_installed_font:
-                for check_dir in [self.fonts_dir, self.assets_dir]:
-                    for pattern in ["*.ttf", "*.TTF", "*.otf", "*.OTF"]:
-                        for font_file in check_dir.glob(pattern):
-                            if self.font_manager.get_font_internal_name(font_file) == current_installed_font:
-                                current_installed_filename = font_file.name
-                                added_files.add(font_file.name.lower())  # Mark as added to avoid duplicates
-                                break
-                        if current_installed_filename:
-                            break
-                    if current_installed_filename:
-                        break
-        
-        # First, add currently installed font with checkmark and filename
-        if current_installed_font and current_installed_filename:
-            fonts.append(f"✅ [installed] {current_installed_filename}")
-            self.log_message(f"<span style='color: #5FE3B1'>Info</span> Currently installed font: <strong>{current_installed_font}</strong>")
-        
-        # Second, add Asimovian font from assets (if not currently installed)
-        asimovian_path = self.assets_dir / "Asimovian-Regular.ttf"
-        if asimovian_path.exists():
-            asimovian_name = "Asimovian-Regular.ttf"
-            if asimovian_name.lower() not in added_files:
-                fonts.append(f"⭐ [assets] {asimovian_name}")
-                added_files.add(asimovian_name.lower())
-        
-        # Third, add fonts from /fonts/ directory (skip if already installed)
-        if self.fonts_dir.exists():
-            for pattern in ["*.ttf", "*.TTF", "*.otf", "*.OTF"]:
-                for font_file in self.fonts_dir.glob(pattern):
-                    if font_file.name.lower() not in added_files:
-                        fonts.append(f"📁 [fonts] {font_file.name}")
-                        added_files.add(font_file.name.lower())
-        
-        # Fourth, add fonts from /dl/ directory
+    def scan_archive_entries(self):
+        """List indexed archive members in /dl/ and queue unindexed archives"""
+        entries = []
+        pending = []
         if self.dl_dir.exists():
-            for pattern in ["*.ttf", "*.TTF", "*.otf", "*.OTF"]:
-                for font_file in self.dl_dir.glob(pattern):
-                    if font_file.name.lower() not in added_files:
-                        fonts.append(f"🔥 [dl] {font_file.name}")
-                        added_files.add(font_file.name.lower())
+            self.archive_index.prune(self.dl_dir)
+            for archive_path in sorted(self.dl_dir.iterdir()):
+                if not archive_path.is_file() or not is_archive(archive_path):
+                    continue
+                members = self.archive_index.get(archive_path)
+                if members is None:
+                    pending.append(archive_path)
+                    continue
+                for member in members:
+                    entries.append(FontEntry("archive", archive_path, family=member['family'],
+                                             hash=member.get('sha256'), member=member['member']))
+        if pending:
+            self.start_archive_indexing(pending)
+        return entries
+            
+    def current_font_entry(self):
+        """Get the FontEntry for the current combo box selection"""
+        entry = self.font_combo.currentData()
+        return entry if isinstance(entry, FontEntry) else None
+        
+    def refresh_font_list(self):
+        """Refresh the font selection dropdown with currently installed font first"""
+        entries = collect_font_entries(self.hash_index, self.fonts_dir, self.assets_dir, self.dl_dir,
+                                       self.font_manager, self.scan_archive_entries())
+        if entries and entries[0].installed:
+            self.log_message(f"<span style='color: #5FE3B1'>Info</span> Currently installed font: <strong>{entries[0].family}</strong>")
+        
+        # Report byte-identical copies of the same font
+        duplicate_groups = self.hash_index.duplicates()
+        if duplicate_groups:
+            duplicate_count = sum(len(group) - 1 for group in duplicate_groups)
+            self.log_message(f"<span style='color: #f39c12'>Duplicates</span> Found <strong>{duplicate_count}</strong> duplicate font file(s): "
+                             + ", ".join(f"<code>{group[0].name}</code>" for group in duplicate_groups)
+                             + " - use 'Remove Duplicates' to clean up")
         
         # Update combo box
         # Temporarily disconnect signals to prevent double preview updates
         self.font_combo.currentTextChanged.disconnect()
         
         self.font_combo.clear()
-        if fonts:
-            self.font_combo.addItems(fonts)
+        if entries:
+            for entry in entries:
+                self.font_combo.addItem(entry.display_text, entry)
             
             # Reconnect signals
             self.font_combo.currentTextChanged.connect(self.update_font_preview)
@@ -1097,7 +1203,7 @@ class CS2FontChangerGUI(QMainWindow):
             self.update_font_preview()
             self.update_delete_button_state()
             
-            self.log_message(f"<span style='color: #3498db'>Refresh</span> Font list refreshed - Found <strong>{len(fonts)}</strong> available fonts")
+            self.log_message(f"<span style='color: #3498db'>Refresh</span> Font list refreshed - Found <strong>{len(entries)}</strong> available fonts")
         else:
             self.font_combo.addItem("No fonts available")
             
@@ -1118,47 +1224,56 @@ class CS2FontChangerGUI(QMainWindow):
             QMessageBox.warning(self, "Font Manager Error", "Font manager not initialized")
             return
             
-        selected = self.font_combo.currentText()
-        if not selected or selected == "No fonts available":
+        entry = self.current_font_entry()
+        if not entry:
             QMessageBox.warning(self, "Font Required", "Please select a font to apply")
             return
         
         # Check if currently installed font is selected
-        if selected.startswith("✅ [installed]"):
+        if entry.installed:
             QMessageBox.information(self, "Already Installed", "This font is already installed in CS2.")
             return
             
         try:
-            # Parse selection to determine source directory
-            if selected.startswith("⭐ [assets]"):
-                source_dir = self.assets_dir
-                filename = selected.replace("⭐ [assets] ", "")
-            elif selected.startswith("✅ [installed]"):
-                source_dir = self.fonts_dir  # Installed fonts are in fonts directory
-                filename = selected.replace("✅ [installed] ", "")
-            elif selected.startswith("🔥 [dl]"):
-                source_dir = self.dl_dir
-                filename = selected.replace("🔥 [dl] ", "")
-            else:
-                source_dir = self.fonts_dir
-                filename = selected.replace("📁 [fonts] ", "")
-                
-            font_path = source_dir / filename
+            filename = entry.filename
+            font_path = entry.path
             
             if not font_path.exists():
                 QMessageBox.critical(self, "File Error", f"Font file not found: {filename}")
                 return
             
+            # Reuse an identical copy already in /fonts/ instead of writing another one
+            existing = self.hash_index.find(entry.hash, within=self.fonts_dir) if entry.hash and entry.source != "fonts" else None
+            if existing:
+                self.log_message(f"<span style='color: #3498db'>Duplicate</span> Identical font already in /fonts/: <code>{existing.name}</code>")
+                if entry.source == "dl":
+                    font_path.unlink()
+                filename = existing.name
+                font_path = existing
+                
+            # Archive members are extracted on their own, the archive stays in /dl/
+            elif entry.member:
+                dest_path = self.library_destination(filename, entry.hash)
+                filename = dest_path.name
+                if dest_path.exists():
+                    self.log_message(f"<span style='color: #3498db'>Duplicate</span> Identical font already in /fonts/: <code>{filename}</code>")
+                else:
+                    extract_member(font_path, entry.member, dest_path)
+                    self.log_message(f"<span style='color: #3498db'>Extract</span> Font extracted to /fonts/ from <code>{font_path.name}</code>: <code>{filename}</code>")
+                font_path = dest_path
+                
             # If not from fonts directory, copy it there first
-            if source_dir != self.fonts_dir:
-                dest_path = self.fonts_dir / filename
+            elif entry.source != "fonts":
+                dest_path = self.library_destination(filename, entry.hash or hash_file(font_path))
+                filename = dest_path.name
                 if dest_path.exists():
-                    dest_path.unlink()
-                shutil.copy2(font_path, dest_path)
-                self.log_message(f"<span style='color: #3498db'>Copy</span> Font copied to /fonts/: <code>{filename}</code>")
+                    self.log_message(f"<span style='color: #3498db'>Duplicate</span> Identical font already in /fonts/: <code>{filename}</code>")
+                else:
+                    shutil.copy2(font_path, dest_path)
+                    self.log_message(f"<span style='color: #3498db'>Copy</span> Font copied to /fonts/: <code>{filename}</code>")
                 
                 # Remove from original location (except assets)
-                if source_dir != self.assets_dir:
+                if entry.source != "assets":
                     try:
                         font_path.unlink()
                         self.log_message(f"<span style='color: #2ecc71'>Cleanup</span> Removed from source directory")
@@ -1169,7 +1284,7 @@ class CS2FontChangerGUI(QMainWindow):
                 font_path = dest_path
                 
             # Get font internal name
-            internal_name = self.font_manager.get_font_internal_name(font_path)
+            internal_name = entry.family or self.font_manager.get_font_internal_name(font_path)
             if not internal_name:
                 QMessageBox.critical(self, "Font Error", f"Could not read font metadata from: {filename}")
                 return
@@ -1180,6 +1295,7 @@ class CS2FontChangerGUI(QMainWindow):
             self.font_manager.apply_font_to_cs2(internal_name, filename, font_path)
             
             self.log_message(f"<span style='color: #2ecc71'>Success</span> Font applied successfully!")
+            self.log_span(tracer.last("apply_font_to_cs2"))
             
             # Refresh font list to update currently installed status BEFORE showing success dialog
             self.refresh_font_list()
@@ -1191,37 +1307,67 @@ class CS2FontChangerGUI(QMainWindow):
             self.log_message(f"<span style='color: #e74c3c'>Error</span> Error applying font: {e}")
             QMessageBox.critical(self, "Application Error", f"Failed to apply font:\n\n{str(e)}")
             
+    def library_destination(self, filename, digest):
+        """Path in /fonts/ for a font with the given content hash
+
+        An existing file of the same name is reused only if it has the same
+        content, a different font is never overwritten but gets a numbered name.
+        """
+        self.fonts_dir.mkdir(parents=True, exist_ok=True)
+        dest_path = self.fonts_dir / filename
+        if not dest_path.exists() or (digest and hash_file(dest_path) == digest):
+            return dest_path
+        taken_names = {p.name.lower() for p in self.fonts_dir.iterdir()}
+        return reserve_font_path(self.fonts_dir, filename, taken_names)
+        
+    def preview_key(self, entry):
+        """Cache key for an archive member, changes when the archive is replaced"""
+        return (str(entry.path), entry.path.stat().st_mtime_ns, entry.member)
+        
+    def load_preview_member(self, key, entry):
+        """Read an archive member for the preview on a background thread"""
+        if key in self.preview_workers:
+            return
+        worker = MemberReadWorker(key, entry.path, entry.member, self)
+        worker.memberRead.connect(self.on_preview_member_read)
+        worker.readFailed.connect(lambda key, error: self.log_message(
+            f"<span style='color: #f39c12'>⚠️</span> Could not update font preview: {error}"))
+        worker.finished.connect(lambda: self.preview_workers.pop(key, None))
+        self.preview_workers[key] = worker
+        worker.start()
+        
+    def on_preview_member_read(self, key, data):
+        """Cache a member read for the preview and show it if it is still selected"""
+        self.preview_cache[key] = data
+        while len(self.preview_cache) > PREVIEW_CACHE_SIZE:
+            self.preview_cache.popitem(last=False)
+        entry = self.current_font_entry()
+        if entry and entry.member and entry.path.exists() and self.preview_key(entry) == key:
+            self.update_font_preview()
+        
     def update_font_preview(self):
         """Update font preview with selected font"""
         try:
-            selected = self.font_combo.currentText()
-            if not selected or selected == "No fonts available":
+            entry = self.current_font_entry()
+            if not entry:
                 # Use default font if no selection
                 self.update_title_font()
                 return
             
-            # Parse selection to get font file path
-            font_path = None
-            if selected.startswith("✅ [installed]"):
-                # For installed font, look for the filename in fonts directory
-                filename = selected.replace("✅ [installed] ", "")
-                font_path = self.fonts_dir / filename
-                # If not in fonts, check assets
-                if not font_path.exists():
-                    font_path = self.assets_dir / filename
-            elif selected.startswith("⭐ [assets]"):
-                filename = selected.replace("⭐ [assets] ", "")
-                font_path = self.assets_dir / filename
-            elif selected.startswith("📁 [fonts]"):
-                filename = selected.replace("📁 [fonts] ", "")
-                font_path = self.fonts_dir / filename
-            elif selected.startswith("🔥 [dl]"):
-                filename = selected.replace("🔥 [dl] ", "")
-                font_path = self.dl_dir / filename
-            
-            if font_path and font_path.exists():
-                # Load font into Qt font database
-                font_id = QFontDatabase.addApplicationFont(str(font_path))
+            font_path = entry.path
+            if font_path.exists():
+                # Load font into Qt font database (archive members straight from memory)
+                if entry.member:
+                    key = self.preview_key(entry)
+                    data = self.preview_cache.get(key)
+                    if data is None:
+                        # Shown once the background read finishes
+                        self.load_preview_member(key, entry)
+                        return
+                    self.preview_cache.move_to_end(key)
+                    font_id = QFontDatabase.addApplicationFontFromData(QByteArray(data))
+                else:
+                    font_id = QFontDatabase.addApplicationFont(str(font_path))
                 if font_id != -1:
                     font_families = QFontDatabase.applicationFontFamilies(font_id)
                     if font_families:
@@ -1236,16 +1382,12 @@ class CS2FontChangerGUI(QMainWindow):
     
     def update_delete_button_state(self):
         """Update delete button state based on selected font"""
-        selected = self.font_combo.currentText()
-        
-        # Disable for Asimovian font (any variant) or no selection
-        is_asimovian = (selected.startswith("⭐ [assets]") or 
-                       (selected.startswith("✅ [installed]") and "Asimovian" in selected) or
-                       selected.endswith("Asimovian-Regular.ttf"))
+        entry = self.current_font_entry()
         
-        should_disable = (not selected or 
-                         selected == "No fonts available" or 
-                         is_asimovian)
+        # Disable for the bundled Asimovian font and the copy made when reverting to it
+        should_disable = (entry is None or
+                          entry.source == "assets" or
+                          (entry.source == "fonts" and entry.filename == "Asimovian-Regular.ttf"))
         
         if should_disable:
             self.delete_btn.setEnabled(False)
@@ -1287,76 +1429,27 @@ class CS2FontChangerGUI(QMainWindow):
             
     def delete_selected_font(self):
         """Delete the selected font with confirmation"""
-        selected = self.font_combo.currentText()
-        if not selected or selected == "No fonts available":
+        entry = self.current_font_entry()
+        if not entry:
             QMessageBox.warning(self, "No Selection", "Please select a font to delete")
             return
             
-        # Extract font information with more robust parsing
-        source_dir = None
-        filename = ""
-        is_installed = selected.startswith("✅ [installed]")
-        
-        # Debug logging
-        self.log_message(f"<span style='color: #3498db'>Debug</span> Attempting to delete: '{selected}'")
-        
-        # Parse the selection more robustly
-        if is_installed:
-            # Extract filename directly from display text
-            filename = selected.replace("✅ [installed] ", "").strip()
-            source_dir = self.fonts_dir
-            
-            # Verify the file exists in fonts directory
-            font_path = source_dir / filename
-            if not font_path.exists():
-                # Try to find it in any directory
-                found = False
-                for check_dir in [self.fonts_dir, self.assets_dir, self.dl_dir]:
-                    potential_path = check_dir / filename
-                    if potential_path.exists():
-                        source_dir = check_dir
-                        found = True
-                        break
-                
-                if not found:
-                    QMessageBox.warning(self, "File Not Found", f"Could not locate font file: {filename}")
-                    return
-                    
-        elif "⭐ [assets]" in selected:
-            filename = selected.split("⭐ [assets] ", 1)[-1].strip()
-            source_dir = self.assets_dir
-        elif "📁 [fonts]" in selected:
-            filename = selected.split("📁 [fonts] ", 1)[-1].strip()
-            source_dir = self.fonts_dir
-        elif "🔥 [dl]" in selected:
-            filename = selected.split("🔥 [dl] ", 1)[-1].strip()
-            source_dir = self.dl_dir
-        else:
-            # Fallback parsing - try to extract filename from any format
-            parts = selected.split("] ", 1)
-            if len(parts) == 2:
-                filename = parts[1].strip()
-                # Try to determine source directory based on file existence
-                for check_dir in [self.dl_dir, self.fonts_dir, self.assets_dir]:
-                    if (check_dir / filename).exists():
-                        source_dir = check_dir
-                        break
-        
-        # Debug logging for extracted values
-        self.log_message(f"<span style='color: #3498db'>Debug</span> Extracted filename: '{filename}', source_dir: {source_dir}")
-        
-        if not filename or not source_dir:
-            QMessageBox.warning(self, "Error", f"Could not parse font selection: '{selected}'")
-            return
-            
+        filename = entry.filename
+        is_installed = entry.installed
+        
         # Verify the file actually exists
-        font_path = source_dir / filename
+        font_path = entry.path
         if not font_path.exists():
             QMessageBox.warning(self, "File Not Found", f"Font file does not exist: {font_path}")
             return
             
         # Confirmation dialog
-        if is_installed:
+        if entry.member:
+            reply = QMessageBox.question(self, "Delete Archive", 
+                                       f"'{filename}' is inside the downloaded archive '{font_path.name}'.\n\n"
+                                       f"Are you sure you want to delete the whole archive?",
+                                       QMessageBox.Yes | QMessageBox.No)
+        elif is_installed:
             reply = QMessageBox.question(self, "Delete Installed Font", 
                                        f"This will delete the currently installed font '{filename}' and revert CS2 to the Asimovian font.\n\n"
                                        f"Are you sure you want to continue?",
@@ -1371,8 +1464,11 @@ class CS2FontChangerGUI(QMainWindow):
             
         try:
             # Delete from source directory
-            font_path = source_dir / filename
-            if font_path.exists():
+            if entry.member:
+                font_path.unlink()
+                self.archive_index.discard(font_path)
+                self.log_message(f"<span style='color: #e74c3c'>Deleted</span> Removed archive: <code>{font_path.name}</code>")
+            elif font_path.exists():
                 font_path.unlink()
                 self.log_message(f"<span style='color: #e74c3c'>Deleted</span> Removed font file: <code>{filename}</code>")
             
@@ -1411,6 +1507,57 @@ class CS2FontChangerGUI(QMainWindow):
             self.log_message(f"<span style='color: #e74c3c'>Error</span> Error deleting font: {e}")
             QMessageBox.critical(self, "Delete Error", f"Failed to delete font:\n\n{str(e)}")
             
+    def remove_duplicate_fonts(self):
+        """Delete byte-identical font copies, keeping one of each"""
+        self.hash_index.scan()
+        duplicate_groups = self.hash_index.duplicates()
+        if not duplicate_groups:
+            QMessageBox.information(self, "No Duplicates", "No duplicate font files found.")
+            return
+            
+        duplicate_count = sum(len(group) - 1 for group in duplicate_groups)
+        reply = QMessageBox.question(self, "Remove Duplicates", 
+                                   f"Found {duplicate_count} duplicate font file(s) in {len(duplicate_groups)} group(s).\n\n"
+                                   f"One copy of each font is kept (assets first, then /fonts/, then /dl/).\n\n"
+                                   f"Are you sure you want to delete the other copies?",
+                                   QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+            
+        # Never remove the file behind the installed font
+        protected = [self.font_combo.itemData(i).path for i in range(self.font_combo.count())
+                     if isinstance(self.font_combo.itemData(i), FontEntry) and self.font_combo.itemData(i).installed]
+        removed = self.hash_index.dedupe(protected)
+        for path in removed:
+            self.log_message(f"<span style='color: #e74c3c'>Deleted</span> Removed duplicate: <code>{path.parent.name}/{path.name}</code>")
+        self.log_message(f"<span style='color: #2ecc71'>Success</span> Removed <strong>{len(removed)}</strong> duplicate font file(s)")
+        self.refresh_font_list()
+            
+    def log_span(self, span):
+        """Log how long a traced operation took and what it did"""
+        if span is None:
+            return
+        details = ", ".join(f"{key.replace('_', ' ')}: {value}" for key, value in span.attributes.items()
+                            if isinstance(value, int))
+        self.log_message(f"<span style='color: #3498db'>Timing</span> {span.name} took <strong>{span.duration_ms:.1f} ms</strong>"
+                         + (f" ({details})" if details else ""))
+    
+    def export_trace(self):
+        """Save the recorded spans as Chrome trace JSON"""
+        if not tracer.finished():
+            QMessageBox.information(self, "No Trace", "Apply or restore a font first, nothing has been traced yet.")
+            return
+        default_path = self.app_dir / f"trace-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+        path, _ = QFileDialog.getSaveFileName(self, "Export Trace", str(default_path), "Chrome Trace (*.json)")
+        if not path:
+            return
+        try:
+            span_count = tracer.export_chrome_trace(path)
+            self.log_message(f"<span style='color: #2ecc71'>Success</span> Exported {span_count} spans to <code>{path}</code> "
+                             f"(open in chrome://tracing or ui.perfetto.dev)")
+        except Exception as e:
+            self.log_message(f"<span style='color: #e74c3c'>Error</span> Could not export trace: {e}")
+    
     def open_app_folder(self):
         """Open the application folder in file explorer"""
         try:
@@ -1446,6 +1593,7 @@ class CS2FontChangerGUI(QMainWindow):
             files_restored = self.font_manager.restore_defaults(self.setup_dir)
             
             self.log_message(f"<span style='color: #2ecc71'>Success</span> Restoration completed - {files_restored} files restored")
+            self.log_span(tracer.last("restore_defaults"))
             
             # Show success message and exit application
             result = QMessageBox.information(self, "Restoration Complete", 
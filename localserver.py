@@ -0,0 +1,247 @@
+"""
+CS2 Font Changer - Local Stand-in Server
+Serves update files over HTTP on localhost so the updater can be exercised offline
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import zipfile
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+DEFAULT_PORT = 8765
+RELEASE_API_PATH = "latest.json"
+
+RANGE_PATTERN = re.compile(r'bytes=(\d+)-(\d*)$')
+
+
+class StandInHandler(SimpleHTTPRequestHandler):
+    """Static file handler with HTTP Range, ETag and optional dropped connections
+
+    When the server's drop_after is set, the first response for every file
+    is cut off after that many bytes, like a flaky connection would.
+    """
+
+    # Keep-alive, so clients that reuse connections can be tested
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_head(self):
+        path = Path(self.translate_path(self.path))
+        range_header = self.headers.get('Range')
+        if not path.is_file():
+            return super().send_head()
+
+        stat = path.stat()
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        if etag in (self.headers.get('If-None-Match') or ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return None
+
+        start, end = 0, size - 1
+        match = RANGE_PATTERN.match(range_header or '')
+        if match:
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(int(match.group(2)), size - 1)
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return None
+
+        f = open(path, 'rb')
+        f.seek(start)
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Type', self.guess_type(str(path)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(end - start + 1))
+        if match:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        self.remaining = end - start + 1
+        return f
+
+    def do_POST(self):
+        """Stand-in analytics endpoint: records one JSON object per POST like cs2fc.php, failing the first fail_posts requests"""
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.server.take_post_failure():
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        try:
+            event = json.loads(body)
+        except ValueError:
+            event = None
+        if not isinstance(event, dict):
+            self.send_response(400)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        with self.server.lock:
+            self.server.received_events.append(event)
+            self.server.post_clients.add(self.client_address)
+        self.send_response(204)
+        self.end_headers()
+
+    def copyfile(self, source, outputfile):
+        remaining = getattr(self, 'remaining', None)
+        drop_after = self.server.take_drop(self.path)
+        sent = 0
+        while remaining is None or sent < remaining:
+            chunk_size = 64 * 1024 if remaining is None else min(64 * 1024, remaining - sent)
+            if drop_after is not None:
+                chunk_size = min(chunk_size, drop_after - sent)
+                if chunk_size <= 0:
+                    # Simulate a dropped connection
+                    self.close_connection = True
+                    return
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            sent += len(chunk)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded HTTP server for a directory, see StandInHandler"""
+
+    daemon_threads = True
+
+    def __init__(self, directory, port=DEFAULT_PORT, drop_after=None, quiet=True, fail_posts=0):
+        super().__init__(('127.0.0.1', port), partial(StandInHandler, directory=str(directory)))
+        self.directory = Path(directory)
+        self.drop_after = drop_after
+        self.dropped_paths = set()
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.fail_posts = fail_posts
+        self.received_events = []  # One event per POST
+        self.post_clients = set()  # Client addresses that POSTed, one per connection
+
+    def handle_error(self, request, client_address):
+        # Clients that cancel or give up on a download reset the connection, which is expected here
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def take_drop(self, path):
+        """Byte count after which to drop this response, only once per path"""
+        if self.drop_after is None:
+            return None
+        with self.lock:
+            if path in self.dropped_paths:
+                return None
+            self.dropped_paths.add(path)
+        return self.drop_after
+
+    def take_post_failure(self):
+        """Whether to fail this POST, counting down fail_posts"""
+        with self.lock:
+            if self.fail_posts > 0:
+                self.fail_posts -= 1
+                return True
+        return False
+
+    def start_background(self):
+        """Serve on a daemon thread, returns the thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def publish_release(source_dir, release_dir, version, base_url):
+    """Lay out a GitHub-like release of source_dir in release_dir for the updater
+
+    Writes the release API response (latest.json), a zipball, the source
+    manifest and the raw files it points to. Point the updater at it with
+    CS2FC_RELEASE_API_URL=<base_url>/latest.json.
+    """
+    from updater import MANIFEST_ASSET_NAME, build_source_manifest, sha256_file
+
+    source_dir = Path(source_dir)
+    release_dir = Path(release_dir)
+    files_dir = release_dir / "files"
+    if files_dir.exists():
+        shutil.rmtree(files_dir)
+    files_dir.mkdir(parents=True)
+
+    manifest = build_source_manifest(source_dir, version)
+    manifest['base_url'] = "files/"
+    manifest_path = release_dir / MANIFEST_ASSET_NAME
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    # GitHub zipballs wrap everything in a single top-level directory
+    zipball_path = release_dir / "source.zip"
+    with zipfile.ZipFile(zipball_path, 'w', zipfile.ZIP_DEFLATED) as zipball:
+        for relative_path in manifest['files']:
+            destination = files_dir / relative_path
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source_dir / relative_path, destination)
+            zipball.write(source_dir / relative_path, f"cs2-font-changer-{version}/{relative_path}")
+
+    release = {
+        'tag_name': f"v{version}",
+        'zipball_url': f"{base_url}/source.zip",
+        'body': f"Stand-in release {version} served from {source_dir.resolve()}",
+        'assets': [{
+            'name': MANIFEST_ASSET_NAME,
+            'browser_download_url': f"{base_url}/{MANIFEST_ASSET_NAME}",
+            'size': manifest_path.stat().st_size,
+            'digest': f"sha256:{sha256_file(manifest_path)}",
+        }],
+    }
+    with open(release_dir / RELEASE_API_PATH, 'w', encoding='utf-8') as f:
+        json.dump(release, f, indent=2)
+    return release
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in server for testing the CS2 Font Changer updater")
+    parser.add_argument('directory', nargs='?', help="Directory to serve (a temporary one with --release)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--drop-after', type=int, help="Cut off the first response of every file after this many bytes")
+    parser.add_argument('--release', metavar='SOURCE_DIR', help="Publish SOURCE_DIR as a release before serving")
+    parser.add_argument('--version', default="99.0.0", help="Version of the published release")
+    parser.add_argument('--fail-posts', type=int, default=0, help="Answer the first N analytics POSTs with 503")
+    args = parser.parse_args()
+
+    directory = args.directory or (tempfile.mkdtemp(prefix="cs2fc-release-") if args.release else os.getcwd())
+    server = StandInServer(directory, args.port, args.drop_after, quiet=False, fail_posts=args.fail_posts)
+    if args.release:
+        publish_release(args.release, directory, args.version, server.base_url)
+        print(f"Published {args.release} as version {args.version}")
+        print(f"Run the updater with CS2FC_RELEASE_API_URL={server.base_url}/{RELEASE_API_PATH}")
+    print(f"Serving {Path(directory).resolve()} at {server.base_url}")
+    print(f"POSTs are accepted as a stand-in analytics endpoint (CS2FC_ANALYTICS_URL={server.base_url}/analytics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,7 @@ Handles application initialization and startup logic
 
 import os
 import sys
-import json
-import threading
-import platform
 from pathlib import Path
-from urllib.request import Request, urlopen
 from version import CURRENT_VERSION
 
 try:
@@ -60,52 +56,20 @@ def show_first_install_dialog():
     return msg.exec_() == QMessageBox.Yes
 
 
-# Analytics configuration
-ANALYTICS_URL = "https://conspiracy.moe/cs2fc.php"
-
-def send_analytics():
-    system = platform.system()
-    release = platform.release()
-    machine = platform.machine()
-    pyver = f"Python/{platform.python_version()}"
-
-    def analytics_request():
-        try:
-            # Determine if running from EXE
-            is_exe = getattr(sys, 'frozen', False) or any(
-                (Path(__file__).parent / exe_name).exists() 
-                for exe_name in ["main.exe", "CS2FontChanger.exe"]
-            )
-            
-            # Prepare analytics data
-            analytics_data = {
-                'version': CURRENT_VERSION,
-                'platform': f"{system} {release}; {machine}",
-                'python': f'{pyver}',
-                'is_exe': "YES" if is_exe else "NO"
-            }
-            
-            # Create request
-            request = Request(
-                ANALYTICS_URL,
-                data=json.dumps(analytics_data).encode('utf-8'),
-                headers={
-                    'Content-Type': 'application/json'
-                }
-            )
-            
-            with urlopen(request, timeout=5) as response:
-                pass
-                
-        except Exception:
-            pass
-    
-    # Run analytics in background thread
-    thread = threading.Thread(target=analytics_request, daemon=True)
-    thread.start()
-
-
 def main():
+    # "CS2FontChanger.exe rollback [...]" restores a backup snapshot, see updater.py
+    if sys.argv[1:2] == ['rollback']:
+        from updater import main as updater_main
+        updater_main()
+        return
+    
+    # Swap in an update downloaded during the last session before the QApplication or any window exists.
+    # PyQt5 is already imported at this point, that's fine: the swap only renames files in the install
+    # folder, and Qt's own files come from site-packages or the EXE's _MEI folder, never from there
+    from updater import apply_staged_update, relaunch_application
+    if apply_staged_update():
+        relaunch_application()
+    
     if os.name == 'nt':
         try:
             import ctypes
@@ -235,6 +199,10 @@ def main():
             # User chose No - exit immediately
             sys.exit(0)
     
+    # Renderer process model must be in the Chromium flags before WebEngine starts
+    from browser import apply_renderer_process_model
+    apply_renderer_process_model(app_dir)
+    
     # Import GUI only after first install check
     from gui import CS2FontChangerGUI
     from updater import check_for_updates_silent
@@ -247,8 +215,10 @@ def main():
     
     window.show()
     
-    # Send analytics after application is fully initialized
-    send_analytics()
+    # Queue the launch event for a background flusher; whatever it hasn't sent when the
+    # application exits stays in the spool and goes out after the next launch
+    from analytics import send_analytics
+    send_analytics(app_dir / "setup")
     
     # Run application
     sys.exit(app.exec_())
@@ -158,7 +158,7 @@ def setup_application(app_dir, work_dir=None):
     print(f"Setting up application directory: {app_dir}")
     
     # Create required directories
-    directories = ["dl", "fonts", "setup", "assets"]
+    directories = ["dl", "fonts", "setup", "assets", "filters"]
     for dir_name in directories:
         dir_path = app_dir / dir_name
         dir_path.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The modules live flat at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def stand_in_server():
+    """Start localserver.StandInServer instances on free ports, shut down after the test"""
+    from localserver import StandInServer
+
+    servers = []
+
+    def start(directory, **kwargs):
+        server = StandInServer(directory, port=0, **kwargs)
+        server.start_background()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def updater_home(tmp_path, monkeypatch):
+    """Point the updater's setup directory (APPDATA or ~/.config) into tmp_path"""
+    import updater
+
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.setenv('APPDATA', str(home))
+    monkeypatch.setattr(updater, 'RETRY_DELAY', 0)
+    return updater.get_updater_setup_dir()
@@ -0,0 +1,64 @@
+import http.client
+
+import pytest
+
+import analytics
+
+
+@pytest.fixture
+def endpoint(tmp_path, stand_in_server):
+    server = stand_in_server(tmp_path)
+    return server, f"{server.base_url}/analytics"
+
+
+def make_spool(tmp_path, url, count):
+    spool = analytics.AnalyticsSpool(tmp_path, url)
+    events = [{'version': "1.0", 'time': number} for number in range(count)]
+    for event in events:
+        assert spool.record(event)
+    return spool, events
+
+
+def test_flush_posts_one_object_per_request_over_one_connection(tmp_path, endpoint):
+    server, url = endpoint
+    spool, events = make_spool(tmp_path, url, 3)
+
+    assert spool.flush()
+    assert server.received_events == events
+    assert len(server.post_clients) == 1
+    assert not spool.spool_path.exists() and not spool.sending_path.exists()
+
+
+def test_failed_flush_keeps_unsent_events_ahead_of_new_ones(tmp_path, endpoint):
+    server, url = endpoint
+    server.fail_posts = 1
+    spool, events = make_spool(tmp_path, url, 2)
+
+    with pytest.raises(http.client.HTTPException):
+        spool.flush()
+    assert spool.pending_events() == events
+
+    # Recorded while the first flush was backing off, goes to a fresh spool
+    late_event = {'version': "1.0", 'time': 99}
+    spool.record(late_event)
+    assert not spool.flush()  # The .sending file first, the new spool is left for the next round
+    assert spool.flush()
+    assert server.received_events == events + [late_event]
+
+
+def test_flusher_thread_retries_until_sent(tmp_path, endpoint, monkeypatch):
+    server, url = endpoint
+    server.fail_posts = 2
+    monkeypatch.setattr(analytics, 'RETRY_DELAY', 0)
+    spool, events = make_spool(tmp_path, url, 2)
+
+    spool.start(lambda: {'version': "1.0", 'time': 2}, delay=0).join(timeout=10)
+    assert server.received_events == events + [{'version': "1.0", 'time': 2}]
+    assert spool.pending_events() == []
+
+
+def test_torn_spool_lines_are_skipped(tmp_path):
+    spool, events = make_spool(tmp_path, "http://127.0.0.1:9/analytics", 1)
+    with open(spool.spool_path, 'a', encoding='utf-8') as f:
+        f.write('{"version": "1.')
+    assert spool.pending_events() == events
@@ -0,0 +1,111 @@
+import hashlib
+import os
+
+import pytest
+
+import updater
+
+OLD_EXE = os.urandom(64 * 1024) * 4
+NEW_EXE = OLD_EXE[:100000] + os.urandom(2000) + OLD_EXE[100000:]
+NEW_SHA256 = hashlib.sha256(NEW_EXE).hexdigest()
+
+FORMATS = [
+    pytest.param('bsdiff', marks=pytest.mark.skipif(not updater.BSDIFF_AVAILABLE, reason="bsdiff4 not installed")),
+    pytest.param('zstpatch', marks=pytest.mark.skipif(not updater.ZSTD_AVAILABLE, reason="zstandard not installed")),
+]
+
+
+@pytest.mark.parametrize("patch_format", FORMATS)
+def test_patch_round_trip(tmp_path, patch_format):
+    old_path, new_path = tmp_path / "old.exe", tmp_path / "new.exe"
+    old_path.write_bytes(OLD_EXE)
+    new_path.write_bytes(NEW_EXE)
+    patch_path = tmp_path / f"update.{patch_format}"
+
+    updater.create_delta_patch(old_path, new_path, patch_path, patch_format)
+    updater.apply_delta_patch(old_path, patch_path, tmp_path / "rebuilt.exe", patch_format)
+
+    assert (tmp_path / "rebuilt.exe").read_bytes() == NEW_EXE
+    assert patch_path.stat().st_size < len(NEW_EXE) // 10
+
+
+def test_find_delta_asset_matches_versions_and_formats(monkeypatch):
+    monkeypatch.setattr(updater, 'BSDIFF_AVAILABLE', True)
+    monkeypatch.setattr(updater, 'ZSTD_AVAILABLE', False)
+    assets = [
+        {'name': "CS2FontChanger-1.0.0-to-2.0.0.zstpatch"},
+        {'name': "CS2FontChanger-0.9.0-to-2.0.0.bsdiff"},
+        {'name': "CS2FontChanger-v1.0.0-to-v2.0.0.bsdiff"},
+    ]
+    asset, patch_format = updater.find_delta_asset(assets, "1.0.0", "v2.0.0")
+    assert asset is assets[2]
+    assert patch_format == 'bsdiff'
+    assert updater.find_delta_asset(assets, "1.1.0", "2.0.0") == (None, None)
+
+
+@pytest.fixture
+def delta_release(tmp_path, stand_in_server, updater_home):
+    """A stand-in release serving a patch from OLD_EXE to NEW_EXE, returns a function building release_info"""
+    www = tmp_path / "www"
+    www.mkdir()
+    install_dir = tmp_path / "install"
+    install_dir.mkdir()
+    current_exe = install_dir / "CS2FontChanger.exe"
+    current_exe.write_bytes(OLD_EXE)
+    server = stand_in_server(www)
+
+    def release_info(patch_format, patch_data=None):
+        patch_path = www / f"update.{patch_format}"
+        if patch_data is None:
+            (tmp_path / "new.exe").write_bytes(NEW_EXE)
+            updater.create_delta_patch(current_exe, tmp_path / "new.exe", patch_path, patch_format)
+        else:
+            patch_path.write_bytes(patch_data)
+        return current_exe, {
+            'version': "2.0.0",
+            'exe_url': f"{server.base_url}/CS2FontChanger.exe",
+            'exe_sha256': NEW_SHA256,
+            'exe_size': len(NEW_EXE),
+            'delta_url': f"{server.base_url}/{patch_path.name}",
+            'delta_format': patch_format,
+            'delta_sha256': updater.sha256_file(patch_path),
+        }
+
+    return release_info
+
+
+@pytest.mark.parametrize("patch_format", FORMATS)
+def test_download_delta_update_rebuilds_exe(tmp_path, delta_release, patch_format):
+    current_exe, release_info = delta_release(patch_format)
+    new_exe_path = tmp_path / "staged" / "CS2FontChanger.exe"
+    new_exe_path.parent.mkdir()
+
+    auto_updater = updater.AutoUpdater()
+    assert auto_updater.download_delta_update(release_info, current_exe, new_exe_path)
+    assert new_exe_path.read_bytes() == NEW_EXE
+    assert "saved" in auto_updater.delta_report
+    assert list(new_exe_path.parent.iterdir()) == [new_exe_path]  # The patch itself is removed
+
+
+@pytest.mark.parametrize("patch_format", FORMATS)
+def test_wrong_patch_result_falls_back(tmp_path, delta_release, patch_format):
+    current_exe, release_info = delta_release(patch_format)
+    release_info['exe_sha256'] = "0" * 64  # The patch applies, but not to the expected EXE
+    new_exe_path = tmp_path / "CS2FontChanger.exe"
+
+    assert not updater.AutoUpdater().download_delta_update(release_info, current_exe, new_exe_path)
+    assert not new_exe_path.exists()
+
+
+def test_corrupt_patch_falls_back(tmp_path, delta_release):
+    current_exe, release_info = delta_release('bsdiff', patch_data=b"BSDIFF40" + os.urandom(200))
+    new_exe_path = tmp_path / "CS2FontChanger.exe"
+
+    assert not updater.AutoUpdater().download_delta_update(release_info, current_exe, new_exe_path)
+    assert not new_exe_path.exists()
+
+
+def test_no_delta_without_expected_hash(tmp_path, delta_release):
+    current_exe, release_info = delta_release('bsdiff', patch_data=b"unused")
+    release_info['exe_sha256'] = None
+    assert not updater.AutoUpdater().download_delta_update(release_info, current_exe, tmp_path / "new.exe")
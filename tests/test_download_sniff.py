@@ -0,0 +1,96 @@
+import pytest
+
+from archive import (SNIFF_ACCEPT, SNIFF_REJECT, SNIFF_UNAVAILABLE, SNIFF_WAIT, partial_download_path,
+                     reserve_download_path, sniff_partial_download)
+
+HTML_PAGE = b"<!DOCTYPE html><html><body>" + b"x" * 4096
+FONT_HEADER = b"\x00\x01\x00\x00" + b"\x00" * 4096
+
+
+def start_download(tmp_path, name, first_bytes):
+    """A download in progress: only the .download file WebEngine writes exists"""
+    file_path = tmp_path / name
+    partial_download_path(file_path).write_bytes(first_bytes)
+    return file_path
+
+
+def test_partial_path_is_next_to_target(tmp_path):
+    assert partial_download_path(tmp_path / "font.zip") == tmp_path / "font.zip.download"
+
+
+def test_html_rejected_while_in_progress(tmp_path):
+    file_path = start_download(tmp_path, "font.zip", HTML_PAGE[:512])
+    verdict, header = sniff_partial_download(file_path, 512)
+    assert verdict == SNIFF_REJECT
+    assert header.startswith(b"<!DOC")
+    assert not file_path.exists()
+
+
+def test_font_accepted_while_in_progress(tmp_path):
+    file_path = start_download(tmp_path, "font.ttf", FONT_HEADER[:64])
+    assert sniff_partial_download(file_path, 64)[0] == SNIFF_ACCEPT
+
+
+def test_waits_for_enough_bytes(tmp_path):
+    file_path = start_download(tmp_path, "font.ttf", b"\x00\x01")
+    assert sniff_partial_download(file_path, 2)[0] == SNIFF_WAIT
+    # Received but not flushed to disk yet
+    assert sniff_partial_download(file_path, 64)[0] == SNIFF_WAIT
+
+
+def test_earlier_file_with_the_same_name_is_not_read(tmp_path):
+    file_path = tmp_path / "font.ttf"
+    file_path.write_bytes(FONT_HEADER[:64])
+    assert sniff_partial_download(file_path, 64)[0] == SNIFF_UNAVAILABLE
+
+
+def test_new_downloads_never_reuse_a_taken_name(tmp_path):
+    (tmp_path / "Font.ttf").write_bytes(FONT_HEADER)
+    partial_download_path(tmp_path / "font_1.ttf").write_bytes(b"")
+    assert reserve_download_path(tmp_path, "font.ttf", ["FONT_2.ttf"]) == tmp_path / "font_3.ttf"
+    assert reserve_download_path(tmp_path, "other.zip") == tmp_path / "other.zip"
+
+
+def test_missing_file_is_not_retried_forever(tmp_path):
+    assert sniff_partial_download(tmp_path / "font.zip", 1024)[0] == SNIFF_UNAVAILABLE
+
+
+class FakeDownloadItem:
+    """The parts of QWebEngineDownloadItem DownloadManager.sniff_download uses"""
+
+    def __init__(self, received, total):
+        self.received = received
+        self.total = total
+        self.cancelled = False
+
+    def id(self):
+        return 1
+
+    def receivedBytes(self):
+        return self.received
+
+    def totalBytes(self):
+        return self.total
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def test_download_manager_cancels_non_font_before_completion(tmp_path):
+    browser = pytest.importorskip("browser")
+    if not browser.WEBENGINE_AVAILABLE:
+        pytest.skip("QtWebEngine not available")
+
+    manager = browser.DownloadManager(tmp_path)
+    file_path = start_download(tmp_path, "font.zip", HTML_PAGE[:1024])
+    item = FakeDownloadItem(received=1024, total=10 * 1024 * 1024)
+    manager.downloads[item.id()] = {'item': item, 'file_path': file_path, 'filename': file_path.name, 'retries': 0}
+    manager.unsniffed.add(item.id())
+    rejected = []
+    manager.downloadRejected.connect(lambda *args: rejected.append(args))
+
+    manager.sniff_download(item, file_path, file_path.name)
+
+    assert item.cancelled
+    assert manager.downloads[item.id()]['rejected']
+    assert rejected == [("font.zip", "an HTML page", 10 * 1024 * 1024 - 1024)]
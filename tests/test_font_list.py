@@ -0,0 +1,48 @@
+from font import ContentHashIndex, FontEntry, collect_font_entries, hash_bytes
+
+
+class InstalledFont:
+    """Stands in for FontManager, with families named after the file stems"""
+
+    def __init__(self, family):
+        self.family = family
+
+    def get_currently_installed_font(self):
+        return self.family
+
+    def get_font_internal_name(self, font_path):
+        return font_path.stem
+
+
+def make_library(tmp_path):
+    dirs = {name: tmp_path / name for name in ("assets", "fonts", "dl")}
+    for directory in dirs.values():
+        directory.mkdir()
+    (dirs["assets"] / "Asimovian-Regular.ttf").write_bytes(b"asimovian")
+    (dirs["fonts"] / "Alpha.ttf").write_bytes(b"alpha")
+    (dirs["fonts"] / "Beta.otf").write_bytes(b"beta")
+    (dirs["dl"] / "Beta.otf").write_bytes(b"beta from dl")
+    (dirs["dl"] / "Gamma.ttf").write_bytes(b"gamma")
+    hash_index = ContentHashIndex(tmp_path / "hash_index.json", dirs.values())
+    return hash_index, dirs
+
+
+def test_installed_font_first_then_each_filename_once(tmp_path):
+    hash_index, dirs = make_library(tmp_path)
+    archive = dirs["dl"] / "pack.zip"
+    archive_entries = [FontEntry("archive", archive, hash=hash_bytes(b"alpha"), member=["Alpha.ttf"]),
+                       FontEntry("archive", archive, hash=hash_bytes(b"asimovian"), member=["Asimovian.ttf"]),
+                       FontEntry("archive", archive, hash=hash_bytes(b"delta"), member=["Delta.ttf"])]
+
+    entries = collect_font_entries(hash_index, dirs["fonts"], dirs["assets"], dirs["dl"],
+                                   InstalledFont("Beta"), archive_entries)
+    assert entries[0].installed and entries[0].path == dirs["fonts"] / "Beta.otf"
+    assert [(entry.source, entry.filename) for entry in entries[1:]] == [
+        ("assets", "Asimovian-Regular.ttf"), ("fonts", "Alpha.ttf"), ("dl", "Gamma.ttf"), ("archive", "Delta.ttf")]
+
+
+def test_without_an_installed_font_nothing_is_parsed(tmp_path):
+    hash_index, dirs = make_library(tmp_path)
+    entries = collect_font_entries(hash_index, dirs["fonts"], dirs["assets"], dirs["dl"])
+    assert not any(entry.installed or entry.family for entry in entries)
+    assert all(entry.hash for entry in entries)
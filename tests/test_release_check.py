@@ -0,0 +1,91 @@
+import json
+import socket
+import time
+
+import pytest
+
+import updater
+
+RELEASE = {'tag_name': "v99.0.0", 'zipball_url': "http://127.0.0.1/source.zip", 'assets': [], 'body': ""}
+
+
+@pytest.fixture
+def requests_made(monkeypatch):
+    """If-None-Match header of every release check"""
+    headers = []
+    urlopen = updater.urlopen
+
+    def recording_urlopen(request, *args, **kwargs):
+        headers.append(request.get_header('If-none-match'))
+        return urlopen(request, *args, **kwargs)
+
+    monkeypatch.setattr(updater, 'urlopen', recording_urlopen)
+    return headers
+
+
+@pytest.fixture
+def release_api(tmp_path, stand_in_server, updater_home, monkeypatch):
+    www = tmp_path / "www"
+    www.mkdir()
+    (www / "latest.json").write_text(json.dumps(RELEASE))
+    server = stand_in_server(www)
+    monkeypatch.setattr(updater, 'GITHUB_API_URL', f"{server.base_url}/latest.json")
+    return www
+
+
+def unused_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_cached_within_interval_and_revalidated_with_etag(release_api, requests_made):
+    auto_updater = updater.AutoUpdater()
+    assert auto_updater.fetch_release_data() == RELEASE
+    assert auto_updater.fetch_release_data() == RELEASE
+    assert requests_made == [None]
+
+    # Past the interval the ETag is sent and the 304 keeps the cached release
+    assert auto_updater.fetch_release_data(force=True) == RELEASE
+    assert len(requests_made) == 2 and requests_made[1]
+
+
+def test_network_error_backs_off(updater_home, monkeypatch, requests_made):
+    monkeypatch.setattr(updater, 'GITHUB_API_URL', f"http://127.0.0.1:{unused_port()}/latest.json")
+    auto_updater = updater.AutoUpdater()
+
+    assert auto_updater.fetch_release_data() is None
+    cache = auto_updater.load_release_cache()
+    assert cache['failures'] == 1
+    assert cache['backoff_until'] >= time.time() + updater.RELEASE_BACKOFF_BASE - 1
+
+    # The next launch doesn't try again while backing off
+    assert auto_updater.fetch_release_data() is None
+    assert len(requests_made) == 1
+    assert auto_updater.get_latest_release_info() is None
+
+
+def test_network_error_serves_cached_release(release_api, monkeypatch, requests_made):
+    auto_updater = updater.AutoUpdater()
+    auto_updater.fetch_release_data()
+    cache = auto_updater.load_release_cache()
+    cache['checked_at'] = 0  # Interval expired
+    auto_updater.save_release_cache(cache)
+
+    def timing_out(*args, **kwargs):
+        raise TimeoutError("timed out")
+
+    monkeypatch.setattr(updater, 'urlopen', timing_out)
+    assert auto_updater.fetch_release_data() == RELEASE
+    assert auto_updater.load_release_cache()['failures'] == 1
+
+
+def test_backoff_grows_and_resets_after_success(release_api, monkeypatch):
+    auto_updater = updater.AutoUpdater()
+    monkeypatch.setattr(updater.random, 'uniform', lambda low, high: 0)
+    cache = {}
+    delays = [auto_updater.back_off(cache, 0) for _ in range(3)]
+    assert delays == [updater.RELEASE_BACKOFF_BASE, 2 * updater.RELEASE_BACKOFF_BASE, 4 * updater.RELEASE_BACKOFF_BASE]
+
+    assert auto_updater.fetch_release_data(force=True) == RELEASE
+    assert auto_updater.load_release_cache()['failures'] == 0
@@ -0,0 +1,111 @@
+import hashlib
+import os
+
+import pytest
+
+import updater
+
+PAYLOAD = os.urandom(300 * 1024)
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+@pytest.fixture
+def serve(tmp_path, monkeypatch, stand_in_server):
+    """Serve update.bin from a stand-in server, returns (url, server)"""
+    monkeypatch.setattr(updater, 'RETRY_DELAY', 0)
+
+    def start(drop_after=None):
+        root = tmp_path / "www"
+        root.mkdir(exist_ok=True)
+        (root / "update.bin").write_bytes(PAYLOAD)
+        server = stand_in_server(root, drop_after=drop_after)
+        return f"{server.base_url}/update.bin", server
+
+    return start
+
+
+@pytest.fixture
+def requests_made(monkeypatch):
+    """Range header of every request download_resumable makes"""
+    ranges = []
+    urlopen = updater.urlopen
+
+    def recording_urlopen(request, *args, **kwargs):
+        ranges.append(request.get_header('Range'))
+        return urlopen(request, *args, **kwargs)
+
+    monkeypatch.setattr(updater, 'urlopen', recording_urlopen)
+    return ranges
+
+
+def test_resumes_after_dropped_connection(tmp_path, serve, requests_made):
+    url, server = serve(drop_after=100 * 1024)
+    destination = tmp_path / "update.bin"
+
+    digest = updater.download_resumable(url, destination, expected_sha256=PAYLOAD_SHA256)
+
+    assert digest == PAYLOAD_SHA256
+    assert destination.read_bytes() == PAYLOAD
+    assert not (tmp_path / "update.bin.part").exists()
+    assert requests_made == [None, f"bytes={100 * 1024}-"]
+
+
+def test_resumes_from_existing_part_file(tmp_path, serve, requests_made):
+    url, server = serve()
+    destination = tmp_path / "update.bin"
+    (tmp_path / "update.bin.part").write_bytes(PAYLOAD[:5000])
+
+    assert updater.download_resumable(url, destination, expected_sha256=PAYLOAD_SHA256) == PAYLOAD_SHA256
+    assert requests_made == ["bytes=5000-"]
+
+
+def test_complete_part_file_is_verified_not_restarted(tmp_path, serve, requests_made):
+    url, server = serve()
+    destination = tmp_path / "update.bin"
+    (tmp_path / "update.bin.part").write_bytes(PAYLOAD)
+
+    # The server answers 416 with Content-Range: bytes */<size>
+    assert updater.download_resumable(url, destination, expected_sha256=PAYLOAD_SHA256) == PAYLOAD_SHA256
+    assert requests_made == [f"bytes={len(PAYLOAD)}-"]
+    assert destination.read_bytes() == PAYLOAD
+
+
+def test_complete_part_file_with_expected_size_makes_no_request(tmp_path, serve, requests_made):
+    url, server = serve()
+    (tmp_path / "update.bin.part").write_bytes(PAYLOAD)
+
+    updater.download_resumable(url, tmp_path / "update.bin", expected_sha256=PAYLOAD_SHA256,
+                               expected_size=len(PAYLOAD))
+    assert requests_made == []
+
+
+def test_stale_part_file_of_same_size_is_replaced(tmp_path, serve, requests_made):
+    url, server = serve()
+    (tmp_path / "update.bin.part").write_bytes(b"x" * len(PAYLOAD))
+
+    assert updater.download_resumable(url, tmp_path / "update.bin", expected_sha256=PAYLOAD_SHA256) == PAYLOAD_SHA256
+    assert requests_made == [f"bytes={len(PAYLOAD)}-", None]
+
+
+def test_checksum_mismatch_discards_download(tmp_path, serve):
+    url, server = serve()
+    with pytest.raises(updater.ChecksumMismatch):
+        updater.download_resumable(url, tmp_path / "update.bin", expected_sha256="0" * 64)
+    assert not (tmp_path / "update.bin").exists()
+    assert not (tmp_path / "update.bin.part").exists()
+
+
+def test_local_disk_errors_are_not_retried(tmp_path, serve, requests_made):
+    url, server = serve()
+    with pytest.raises(FileNotFoundError):
+        updater.download_resumable(url, tmp_path / "missing-dir" / "update.bin")
+    assert requests_made == [None]
+
+
+def test_network_errors_give_up_after_max_attempts(tmp_path, serve, requests_made):
+    url, server = serve()
+    server.shutdown()
+    server.server_close()
+    with pytest.raises(updater.URLError):
+        updater.download_resumable(url, tmp_path / "update.bin", max_attempts=3)
+    assert len(requests_made) == 3
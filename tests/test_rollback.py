@@ -0,0 +1,40 @@
+import pytest
+
+import updater
+
+
+def install_version(install_dir, version):
+    """Replace main.py the way an update does, snapshotting the old file first"""
+    main_py = install_dir / "main.py"
+    if main_py.exists():
+        old_version = main_py.read_text()
+        snapshot_dir = updater.new_snapshot(install_dir, old_version)
+        updater.move_file(main_py, snapshot_dir / "main.py")
+        updater.finish_snapshot(snapshot_dir, old_version)
+    main_py.write_text(version)
+
+
+@pytest.fixture
+def install_dir(tmp_path):
+    for version in ("1", "2", "3"):
+        install_version(tmp_path, version)
+    return tmp_path
+
+
+def test_repeated_rollback_keeps_going_back(install_dir):
+    updater.rollback_snapshot(install_dir)
+    assert (install_dir / "main.py").read_text() == "2"
+    updater.rollback_snapshot(install_dir)
+    assert (install_dir / "main.py").read_text() == "1"
+
+    with pytest.raises(Exception, match="No older backup snapshots"):
+        updater.rollback_snapshot(install_dir)
+    assert (install_dir / "main.py").read_text() == "1"
+
+
+def test_a_rollback_is_undone_by_name(install_dir):
+    updater.rollback_snapshot(install_dir)
+    (undo_dir, info), = [snapshot for snapshot in updater.list_snapshots(install_dir) if snapshot[1].get('undoes')]
+
+    updater.rollback_snapshot(install_dir, undo_dir.name)
+    assert (install_dir / "main.py").read_text() == "3"
@@ -0,0 +1,184 @@
+import json
+
+import pytest
+
+import updater
+from localserver import RELEASE_API_PATH, publish_release
+
+OLD_FILES = {
+    "main.py": "print('old main')\n",
+    "font.py": "FONT = 1\n",
+    "assets/readme.txt": "unchanged\n",
+    "removed_later.py": "x = 1\n",
+}
+NEW_FILES = {
+    "main.py": "print('new main')\n",
+    "font.py": "FONT = 1\n",
+    "assets/readme.txt": "unchanged\n",
+    "assets/extra/new.txt": "added\n",
+}
+
+
+def write_tree(root, files):
+    for relative_path, text in files.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return root
+
+
+def read_tree(root):
+    return {path.relative_to(root).as_posix(): path.read_text() for path in root.rglob('*')
+            if path.is_file() and not updater.MANIFEST_EXCLUDED_NAMES.intersection(path.relative_to(root).parts)}
+
+
+def test_build_source_manifest_skips_build_output(tmp_path):
+    write_tree(tmp_path, {"main.py": "a", "__pycache__/main.cpython-311.pyc": "b", "dist/x.exe": "c",
+                          "update.bin.part": "d", "backup_snapshots/1/main.py": "e"})
+    manifest = updater.build_source_manifest(tmp_path, "1.0")
+    assert list(manifest['files']) == ["main.py"]
+    assert manifest['files']["main.py"]['size'] == 1
+
+
+def test_changed_manifest_files(tmp_path):
+    write_tree(tmp_path / "old", OLD_FILES)
+    manifest = updater.build_source_manifest(write_tree(tmp_path / "new", NEW_FILES), "2.0")
+    assert sorted(updater.changed_manifest_files(manifest, tmp_path / "old")) == ["assets/extra/new.txt", "main.py"]
+
+
+@pytest.mark.parametrize("relative_path", ["../evil.py", "/etc/passwd", "assets/../../evil.py"])
+def test_manifest_target_refuses_escaping_paths(tmp_path, relative_path):
+    with pytest.raises(ValueError):
+        updater.manifest_target(tmp_path, relative_path)
+
+
+@pytest.fixture
+def source_release(tmp_path, stand_in_server, updater_home, monkeypatch):
+    """NEW_FILES published as release 99.0.0 and an AutoUpdater for an install of OLD_FILES"""
+    release_dir = tmp_path / "release"
+    release_dir.mkdir()
+    server = stand_in_server(release_dir)
+    publish_release(write_tree(tmp_path / "new", NEW_FILES), release_dir, "99.0.0", server.base_url)
+    monkeypatch.setattr(updater, 'GITHUB_API_URL', f"{server.base_url}/{RELEASE_API_PATH}")
+
+    auto_updater = updater.AutoUpdater()
+    auto_updater.is_exe = False
+    auto_updater.current_dir = write_tree(tmp_path / "install", OLD_FILES)
+    return auto_updater, release_dir
+
+
+def test_release_info_includes_manifest(source_release):
+    auto_updater, release_dir = source_release
+    release_info = auto_updater.get_latest_release_info(force=True)
+    assert release_info['needs_update']
+    assert release_info['manifest_url'].endswith(updater.MANIFEST_ASSET_NAME)
+    assert release_info['manifest_sha256'] == updater.sha256_file(release_dir / updater.MANIFEST_ASSET_NAME)
+
+
+def test_staged_manifest_update_fetches_only_changed_files(source_release):
+    auto_updater, release_dir = source_release
+    release_info = auto_updater.get_latest_release_info(force=True)
+
+    auto_updater.stage_update(release_info)
+    install_dir = auto_updater.current_dir
+    assert auto_updater.stage_dir.parent == install_dir  # Same volume, so applying is a rename
+    with open(auto_updater.stage_dir / updater.STAGED_INFO_NAME, encoding='utf-8') as f:
+        staged = json.load(f)
+    assert sorted(target for _, target, _ in staged['files']) == ["assets/extra/new.txt", "main.py"]
+
+    assert updater.apply_staged_update(install_dir)
+    assert read_tree(install_dir) == {**OLD_FILES, **NEW_FILES}  # Files missing from the release are kept
+    assert not auto_updater.stage_dir.exists()
+
+    snapshot_dir, info = updater.list_snapshots(install_dir)[-1]
+    assert info['files'] == ["main.py"]
+    assert (snapshot_dir / "main.py").read_text() == OLD_FILES["main.py"]
+
+
+def test_tampered_manifest_is_rejected(source_release):
+    auto_updater, release_dir = source_release
+    release_info = auto_updater.get_latest_release_info(force=True)
+    release_info['manifest_sha256'] = "0" * 64
+
+    with pytest.raises(updater.ChecksumMismatch):
+        auto_updater.stage_update(release_info)
+    assert not (auto_updater.stage_dir / updater.STAGED_INFO_NAME).exists()
+    assert not updater.apply_staged_update(auto_updater.current_dir)
+
+
+def test_without_manifest_the_zipball_is_staged(source_release):
+    auto_updater, release_dir = source_release
+    release_info = auto_updater.get_latest_release_info(force=True)
+    release_info['manifest_url'] = None
+
+    auto_updater.stage_update(release_info)
+    assert updater.apply_staged_update(auto_updater.current_dir)
+    assert read_tree(auto_updater.current_dir) == {**OLD_FILES, **NEW_FILES}
+
+
+def test_tampered_file_fails_staging(source_release):
+    auto_updater, release_dir = source_release
+    (release_dir / "files" / "main.py").write_text("print('tampered')\n")
+    release_info = auto_updater.get_latest_release_info(force=True)
+
+    with pytest.raises(updater.ChecksumMismatch):
+        auto_updater.stage_update(release_info)
+    assert read_tree(auto_updater.current_dir) == OLD_FILES
+
+
+def test_source_checkouts_are_asked_before_staging(updater_home):
+    auto_updater = updater.AutoUpdater()
+    assert auto_updater.stage_updates == auto_updater.is_exe
+
+
+def test_frozen_relaunch_resets_the_pyinstaller_environment(monkeypatch):
+    launched = []
+    monkeypatch.setattr(updater.sys, 'frozen', True, raising=False)
+    monkeypatch.setattr(updater.sys, 'argv', ["CS2FontChanger.exe", "--flag"])
+    monkeypatch.setattr(updater.subprocess, 'Popen', lambda args, env=None: launched.append((args, env)))
+    monkeypatch.setenv('_MEIPASS2', "C:/Temp/_MEI1234")
+    monkeypatch.setenv('_PYI_APPLICATION_HOME_DIR', "C:/Temp/_MEI1234")
+
+    with pytest.raises(SystemExit):
+        updater.relaunch_application()
+    (args, env), = launched
+    assert args == [updater.sys.executable, "--flag"]
+    assert env['PYINSTALLER_RESET_ENVIRONMENT'] == "1"
+    assert '_MEIPASS2' not in env and '_PYI_APPLICATION_HOME_DIR' not in env
+
+
+def test_interrupted_staging_resumes_for_the_same_version(source_release, monkeypatch):
+    auto_updater, release_dir = source_release
+    release_info = auto_updater.get_latest_release_info(force=True)
+    real_download = updater.download_resumable
+    urls = []
+
+    def dropped_after_two(url, destination, *args, **kwargs):
+        urls.append(url)
+        if len(urls) > 2:
+            raise ConnectionError("connection dropped")
+        return real_download(url, destination, *args, **kwargs)
+
+    monkeypatch.setattr(updater, 'download_resumable', dropped_after_two)
+    with pytest.raises(ConnectionError):
+        auto_updater.stage_update(release_info)
+    assert (auto_updater.stage_dir / updater.STAGING_INFO_NAME).exists()
+    first_file = urls[1]
+
+    urls.clear()
+    auto_updater.stage_update(release_info)  # Manifest and the missing file only
+    assert len(urls) == 2 and first_file not in urls
+    assert not (auto_updater.stage_dir / updater.STAGING_INFO_NAME).exists()
+    assert updater.apply_staged_update(auto_updater.current_dir)
+    assert read_tree(auto_updater.current_dir) == {**OLD_FILES, **NEW_FILES}
+
+
+def test_staging_of_another_version_starts_over(source_release):
+    auto_updater, release_dir = source_release
+    leftover = auto_updater.stage_dir / "files" / "main.py.part"
+    leftover.parent.mkdir(parents=True)
+    leftover.write_text("partial")
+    (auto_updater.stage_dir / updater.STAGING_INFO_NAME).write_text('{"version": "98.0.0"}')
+
+    auto_updater.stage_update(auto_updater.get_latest_release_info(force=True))
+    assert not leftover.exists()
@@ -0,0 +1,57 @@
+import json
+import threading
+
+import pytest
+
+from tracing import NULL_SPAN, traced, tracer
+
+
+@pytest.fixture(autouse=True)
+def empty_tracer():
+    tracer.clear()
+    yield
+    tracer.clear()
+
+
+@traced("apply_font")
+def apply_font(fail=False):
+    tracer.current().set(font="Alpha")
+    with tracer.span("copy_font", files=1) as span:
+        span.add('bytes_copied', 10)
+        span.add('bytes_copied', 5)
+    tracer.current().add('files_touched')
+    if fail:
+        raise OSError("disk full")
+    return "done"
+
+
+def test_nested_spans_export_as_chrome_trace(tmp_path):
+    assert apply_font() == "done"
+    trace_path = tmp_path / "trace.json"
+    assert tracer.export_chrome_trace(trace_path) == 2
+
+    with open(trace_path, encoding='utf-8') as f:
+        events = json.load(f)['traceEvents']
+    inner, outer = [event for event in events if event['ph'] == 'X']
+    assert (inner['name'], outer['name']) == ("copy_font", "apply_font")  # Inner spans finish first
+    assert inner['args'] == {'files': 1, 'bytes_copied': 15}
+    assert outer['args'] == {'font': "Alpha", 'files_touched': 1}
+    assert outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+    assert inner['tid'] == outer['tid'] == threading.get_ident()
+
+    thread_name, = [event for event in events if event['ph'] == 'M']
+    assert thread_name['tid'] == outer['tid'] and thread_name['args']['name'] == threading.current_thread().name
+
+
+def test_errors_are_recorded_and_reraised():
+    with pytest.raises(OSError):
+        apply_font(fail=True)
+    assert tracer.last("apply_font").attributes['error'] == "OSError: disk full"
+
+
+def test_outside_a_span_attributes_go_nowhere():
+    assert tracer.current() is NULL_SPAN
+    tracer.current().set(font="Alpha")
+    tracer.current().add('bytes_copied', 10)
+    assert tracer.finished() == []
+    assert not [event for event in tracer.to_chrome_trace()['traceEvents'] if event['ph'] == 'X']
@@ -0,0 +1,115 @@
+import hashlib
+import io
+import os
+import zipfile
+import zlib
+
+import pytest
+
+from archive import ZipStreamIndexer, partial_download_path
+
+FONTS = {
+    "fonts/Alpha-Regular.ttf": os.urandom(3000) + b"glyf" * 2000,
+    "fonts/Beta-Bold.otf": b"OTTO" + bytes(range(256)) * 40,
+    "readme.txt": b"not a font " * 50,
+    "Gamma.ttf": b"\x00\x01\x00\x00" * 700,
+}
+
+
+class Unseekable(io.RawIOBase):
+    """Write-only stream, makes zipfile write data descriptors (flag bit 3)"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+
+def build_zip(method, streamed=False):
+    target = Unseekable() if streamed else io.BytesIO()
+    with zipfile.ZipFile(target, 'w', method) as archive:
+        for name, data in FONTS.items():
+            archive.writestr(name, data)
+    return (target.buffer if streamed else target).getvalue()
+
+
+def download_in_chunks(tmp_path, data, chunk_size):
+    """Feed the indexer while the archive arrives in .download, then rename it like WebEngine does"""
+    file_path = tmp_path / "pack.zip"
+    file_path.write_bytes(build_zip(zipfile.ZIP_STORED))  # An earlier download of the same name is never read
+    partial_path = partial_download_path(file_path)
+    indexer = ZipStreamIndexer(file_path)
+    assert indexer.feed() == 0  # Nothing on disk yet is not an error
+    assert not indexer.unsupported
+
+    found_during_download = 0
+    with open(partial_path, 'wb') as f:
+        for start in range(0, len(data), chunk_size):
+            f.write(data[start:start + chunk_size])
+            f.flush()
+            found_during_download += indexer.feed()
+    os.replace(partial_path, file_path)
+    return indexer, found_during_download
+
+
+def expected_members():
+    return sorted((name, len(data), zlib.crc32(data)) for name, data in FONTS.items() if name.endswith(('.ttf', '.otf')))
+
+
+@pytest.mark.parametrize("method", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 4096, 10 ** 6])
+def test_sized_members_in_truncated_chunks(tmp_path, method, chunk_size):
+    indexer, found = download_in_chunks(tmp_path, build_zip(method), chunk_size)
+    assert not indexer.unsupported
+    assert indexer.complete
+    assert found == 3
+    members = indexer.finish()
+    assert sorted((m['member'][0], m['size'], m['crc']) for m in members) == expected_members()
+    assert all(m['sha256'] == hashlib.sha256(FONTS[m['member'][0]]).hexdigest() for m in members)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 13, 512, 10 ** 6])
+def test_data_descriptor_members(tmp_path, chunk_size):
+    data = build_zip(zipfile.ZIP_DEFLATED, streamed=True)
+    assert zipfile.ZipFile(io.BytesIO(data)).infolist()[0].flag_bits & 0x08
+    indexer, found = download_in_chunks(tmp_path, data, chunk_size)
+    assert not indexer.unsupported
+    assert found == 3
+    assert sorted((m['member'][0], m['size'], m['crc']) for m in indexer.finish()) == expected_members()
+
+
+def test_stored_member_with_descriptor_falls_back(tmp_path):
+    # A stored member's end can't be found without its size, index_archive() has to do it
+    indexer, found = download_in_chunks(tmp_path, build_zip(zipfile.ZIP_STORED, streamed=True), 4096)
+    assert indexer.unsupported
+    assert indexer.finish() is None
+
+
+def test_corrupt_member_falls_back(tmp_path):
+    data = bytearray(build_zip(zipfile.ZIP_STORED))
+    data[100] ^= 0xFF  # Inside the first member's data, its CRC no longer matches
+    indexer, found = download_in_chunks(tmp_path, bytes(data), 4096)
+    assert indexer.unsupported
+    assert indexer.finish() is None
+
+
+def test_non_font_members_are_skipped_unread(tmp_path):
+    target = io.BytesIO()
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("specimen.png", os.urandom(1024 * 1024))
+        archive.writestr("Font.ttf", FONTS["Gamma.ttf"])
+    data = target.getvalue()
+
+    file_path = tmp_path / "pack.zip"
+    indexer = ZipStreamIndexer(file_path)
+    partial_download_path(file_path).write_bytes(data[:1000])
+    assert indexer.feed() == 0
+    assert indexer.offset > indexer.fed_size  # Past the specimen without having read it
+
+    partial_download_path(file_path).write_bytes(data)
+    assert indexer.feed() == 1
+    assert indexer.complete and not indexer.unsupported
@@ -0,0 +1,176 @@
+"""
+CS2 Font Changer - Tracing
+Lightweight timed spans with attributes, exportable as Chrome trace JSON (chrome://tracing, Perfetto)
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+MAX_SPANS = 10000  # Oldest spans are dropped beyond this
+
+# CS2FC_TRACE_FILE writes the trace there when the process exits
+TRACE_FILE_ENV = 'CS2FC_TRACE_FILE'
+
+
+class Span:
+    """One timed operation, attributes are shown as args in the trace viewer"""
+
+    __slots__ = ('name', 'start_ns', 'end_ns', 'thread_id', 'attributes')
+
+    def __init__(self, name, attributes=None):
+        self.name = name
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.thread_id = threading.get_ident()
+        self.attributes = dict(attributes or {})
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key, amount=1):
+        """Increment a counter attribute such as bytes_copied or files_touched"""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    @property
+    def duration_ms(self):
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def __repr__(self):
+        return f"Span({self.name!r}, {self.duration_ms:.2f} ms, {self.attributes})"
+
+
+class _NullSpan:
+    """Stand-in returned by current() outside any span, so callers never need to check"""
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects finished spans in a bounded buffer
+
+    Spans nest per thread; the viewer reconstructs the nesting from the
+    timestamps, so only start, duration and thread are recorded.
+    """
+
+    def __init__(self, max_spans=MAX_SPANS):
+        self.spans = deque(maxlen=max_spans)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.epoch_ns = time.perf_counter_ns()
+        self.thread_names = {}
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time the enclosed block, exceptions are recorded as an error attribute and re-raised"""
+        span = Span(name, attributes)
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            stack.pop()
+            with self.lock:
+                self.spans.append(span)
+                if span.thread_id not in self.thread_names:
+                    self.thread_names[span.thread_id] = threading.current_thread().name
+
+    def current(self):
+        """Innermost open span on this thread"""
+        stack = self._stack()
+        return stack[-1] if stack else NULL_SPAN
+
+    def finished(self, name=None):
+        """Finished spans, optionally only those with name, oldest first"""
+        with self.lock:
+            return [span for span in self.spans if name is None or span.name == name]
+
+    def last(self, name):
+        """Most recently finished span with name, or None"""
+        spans = self.finished(name)
+        return spans[-1] if spans else None
+
+    def clear(self):
+        with self.lock:
+            self.spans.clear()
+
+    def to_chrome_trace(self):
+        """Trace Event Format dict with one complete ("X") event per span"""
+        pid = os.getpid()
+        with self.lock:
+            spans = list(self.spans)
+            thread_names = dict(self.thread_names)
+
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id, 'args': {'name': name}}
+                  for thread_id, name in thread_names.items()]
+        for span in spans:
+            events.append({
+                'name': span.name,
+                'cat': 'cs2fc',
+                'ph': 'X',
+                'ts': (span.start_ns - self.epoch_ns) / 1000,
+                'dur': (span.end_ns - span.start_ns) / 1000,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': span.attributes,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        """Write the trace as JSON, returns the number of spans written"""
+        trace = self.to_chrome_trace()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, default=str)
+        return sum(1 for event in trace['traceEvents'] if event['ph'] == 'X')
+
+
+tracer = Tracer()
+
+
+def traced(name=None):
+    """Decorator that runs the function inside a span, use tracer.current() to set attributes"""
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _export_at_exit():
+    trace_file = os.environ.get(TRACE_FILE_ENV)
+    if trace_file and tracer.finished():
+        try:
+            tracer.export_chrome_trace(Path(trace_file))
+        except OSError as e:
+            print(f"Warning: Could not write trace to {trace_file}: {e}")
+
+
+atexit.register(_export_at_exit)
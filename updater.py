@@ -6,6 +6,10 @@ Automatically downloads and replaces EXE or source code
 import os
 import sys
 import json
+import hashlib
+import argparse
+import http.client
+import ssl
 import shutil
 import zipfile
 import tempfile
@@ -13,14 +17,52 @@ import subprocess
 import threading
 import re
 import time
-from pathlib import Path
-from urllib.request import urlopen, urlretrieve, Request
+import random
+from pathlib import Path, PurePosixPath
+from urllib.parse import quote, urljoin
+from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 from version import CURRENT_VERSION
 
 # Configuration
 GITHUB_REPO = "conspiracy1337/cs2-font-changer"
-GITHUB_API_URL = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
+# CS2FC_RELEASE_API_URL points the updater at another release API, e.g. localserver.py --release
+GITHUB_API_URL = os.environ.get('CS2FC_RELEASE_API_URL',
+                                f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest")
+GITHUB_RAW_URL = f"https://raw.githubusercontent.com/{GITHUB_REPO}"
+
+# Release checks
+RELEASE_CHECK_TIMEOUT = 15
+RELEASE_CHECK_INTERVAL = 6 * 60 * 60  # Serve the cached release JSON for this long
+RELEASE_BACKOFF_BASE = 15 * 60  # Doubled after every rate-limited check
+RELEASE_BACKOFF_MAX = 24 * 60 * 60
+
+# Incremental source updates
+MANIFEST_ASSET_NAME = "source-manifest.json"
+MANIFEST_EXCLUDED_NAMES = {'.git', '__pycache__', 'backup_before_update', 'backup_snapshots', 'update_staged', 'build', 'dist'}
+MANIFEST_EXCLUDED_SUFFIXES = ('.pyc', '.part', '.exe')
+
+# Resumable downloads
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 30
+MAX_DOWNLOAD_ATTEMPTS = 5
+RETRY_DELAY = 1.0  # Doubled after every failed attempt
+PROGRESS_INTERVAL = 0.1  # At most 10 progress updates per second
+
+# Backup snapshots next to the installed files, hardlinked so they cost no copying
+SNAPSHOT_DIR_NAME = "backup_snapshots"
+SNAPSHOT_INFO_NAME = "snapshot.json"
+KEEP_SNAPSHOTS = 3
+
+# Staged updates, downloaded in the background and applied at the next launch.
+# Kept next to the installed files so applying them is a rename on the same volume
+STAGED_DIR_NAME = "update_staged"
+STAGED_INFO_NAME = "update.json"
+STAGING_INFO_NAME = "staging.json"  # Version being downloaded, so an interrupted staging resumes
+
+# Delta updates, e.g. "CS2FontChanger-1.2.0-to-1.3.0.bsdiff"
+DELTA_ASSET_PATTERN = re.compile(r'v?(\d[\w.]*)-to-v?(\d[\w.]*)\.(bsdiff|zstpatch)$')
+ZSTD_PATCH_LEVEL = 19
 
 try:
     from PyQt5.QtWidgets import QApplication, QMessageBox
@@ -29,10 +71,524 @@ try:
 except ImportError:
     QT_AVAILABLE = False
 
+try:
+    import bsdiff4
+    BSDIFF_AVAILABLE = True
+except ImportError:
+    BSDIFF_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# Failures worth retrying; other OSErrors (disk full, permissions) are local and raised at once
+NETWORK_ERRORS = (URLError, ConnectionError, TimeoutError, ssl.SSLError, http.client.HTTPException)
+
+
+class DownloadCancelled(Exception):
+    """Raised when the user cancels a download, the .part file is kept for resuming"""
+
+
+class ChecksumMismatch(Exception):
+    """Raised when a finished download doesn't match its expected SHA-256"""
+
+
+def content_range_size(header):
+    """Complete length from a Content-Range header ('bytes 0-9/10' or 'bytes */10'), None if unknown"""
+    match = re.match(r'bytes [\d*-]+/(\d+)$', (header or '').strip())
+    return int(match.group(1)) if match else None
+
+
+def download_resumable(url, destination, progress_callback=None, expected_sha256=None,
+                       cancel_check=None, max_attempts=MAX_DOWNLOAD_ATTEMPTS, expected_size=None):
+    """Download url to destination through a .part file, resuming with HTTP Range
+
+    The SHA-256 is computed while streaming (a resumed .part file is hashed
+    once up front), and checked against expected_sha256 if given. A .part
+    file that is already complete (expected_size, or a 416 reply whose
+    Content-Range matches its size) is verified instead of downloaded again.
+    progress_callback(downloaded, total) is called at most every
+    PROGRESS_INTERVAL seconds plus once at the end; total is 0 if unknown.
+    Network errors are retried, local disk errors are raised at once.
+    Returns the hex SHA-256 of the file.
+    """
+    destination = Path(destination)
+    part_path = destination.with_name(destination.name + ".part")
+    hasher = hashlib.sha256()
+    downloaded = 0
+
+    if part_path.exists():
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                downloaded += len(chunk)
+
+    def part_matches():
+        return not expected_sha256 or hasher.hexdigest() == expected_sha256.lower()
+
+    if expected_size is not None and downloaded and (downloaded > expected_size or
+                                                     (downloaded == expected_size and not part_matches())):
+        # Left over from a different file
+        part_path.unlink()
+        hasher = hashlib.sha256()
+        downloaded = 0
+
+    attempt = 0
+    last_progress = 0.0
+    total = expected_size or 0
+    while not (expected_size and downloaded == expected_size):
+        request = Request(url)
+        request.add_header('User-Agent', 'CS2FontChanger-AutoUpdater')
+        if downloaded:
+            request.add_header('Range', f'bytes={downloaded}-')
+
+        try:
+            with urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+                length = int(response.headers.get('Content-Length') or 0)
+                if downloaded and response.status == 206:
+                    if not response.headers.get('Content-Range', '').startswith(f'bytes {downloaded}-'):
+                        raise HTTPError(url, 416, "Unexpected Content-Range", response.headers, None)
+                    total = downloaded + length if length else 0
+                    mode = 'ab'
+                else:
+                    # Fresh download, or the server ignored the Range header
+                    hasher = hashlib.sha256()
+                    downloaded = 0
+                    total = length
+                    mode = 'wb'
+
+                with open(part_path, mode) as part_file:
+                    while True:
+                        if cancel_check and cancel_check():
+                            raise DownloadCancelled("Download cancelled by user")
+                        chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        part_file.write(chunk)
+                        hasher.update(chunk)
+                        downloaded += len(chunk)
+
+                        now = time.monotonic()
+                        if progress_callback and now - last_progress >= PROGRESS_INTERVAL:
+                            last_progress = now
+                            progress_callback(downloaded, total)
+
+                if total and downloaded < total:
+                    raise ConnectionError(f"Connection closed after {downloaded} of {total} bytes")
+                break
+
+        except DownloadCancelled:
+            raise
+        except HTTPError as e:
+            if e.code == 416 and downloaded:
+                remote_size = content_range_size(e.headers.get('Content-Range') if e.headers else None)
+                if (remote_size == downloaded or (remote_size is None and expected_sha256)) and part_matches():
+                    # The .part file was already complete
+                    total = downloaded
+                    break
+                # The .part file doesn't fit the remote file any more, start over
+                part_path.unlink(missing_ok=True)
+                hasher = hashlib.sha256()
+                downloaded = 0
+            elif e.code < 500 and e.code != 429:
+                raise
+            attempt += 1
+            if attempt >= max_attempts:
+                raise
+            time.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+        except NETWORK_ERRORS as e:
+            attempt += 1
+            if attempt >= max_attempts:
+                raise
+            print(f"Download interrupted ({e}), resuming at {downloaded} bytes...")
+            time.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+
+    if progress_callback:
+        progress_callback(downloaded, total or downloaded)
+
+    digest = hasher.hexdigest()
+    if expected_sha256 and digest != expected_sha256.lower():
+        part_path.unlink(missing_ok=True)
+        raise ChecksumMismatch(f"SHA-256 mismatch for {destination.name}: expected {expected_sha256}, got {digest}")
+
+    os.replace(part_path, destination)
+    return digest
+
+
+def parse_asset_digest(asset):
+    """SHA-256 of a release asset from the GitHub API 'digest' field ('sha256:<hex>'), if present"""
+    digest = asset.get('digest') or ''
+    if digest.startswith('sha256:'):
+        return digest[len('sha256:'):]
+    return None
+
+
+def sha256_file(path):
+    """Hex SHA-256 of a file, read in chunks"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def get_updater_setup_dir():
+    """Setup directory the updater keeps its state in, without needing Qt"""
+    if os.name == 'nt':  # Windows
+        app_data_dir = Path(os.getenv('APPDATA')) / "cns" / "cs2-font-changer"
+    else:
+        app_data_dir = Path.home() / ".config" / "cs2-font-changer"
+    return app_data_dir / "setup"
+
+
+def move_file(source, destination):
+    """Rename source to destination, copying only if they are on different volumes"""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(source, destination)
+    except OSError:
+        shutil.move(str(source), str(destination))
+
+
+def link_or_copy(source, destination):
+    """Hardlink source to destination, copying where the filesystem can't link
+
+    Updates replace files by delete/rename rather than writing into them, so
+    a hardlink keeps the old contents alive. Usable as copytree's copy_function.
+    """
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+    return destination
+
+
+def new_snapshot(install_dir, version):
+    """Create an empty snapshot directory for the files of version in install_dir"""
+    root = Path(install_dir) / SNAPSHOT_DIR_NAME
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{version}"
+    snapshot_dir = root / name
+    counter = 1
+    while snapshot_dir.exists():
+        counter += 1
+        snapshot_dir = root / f"{name}-{counter}"
+    snapshot_dir.mkdir(parents=True)
+    return snapshot_dir
+
+
+def finish_snapshot(snapshot_dir, version, keep=KEEP_SNAPSHOTS, undoes=None):
+    """Record the files in a snapshot and prune old snapshots, an empty snapshot is removed
+
+    undoes is the name of the snapshot a rollback restored, see rollback_snapshot.
+    """
+    files = sorted(path.relative_to(snapshot_dir).as_posix() for path in snapshot_dir.rglob('*') if path.is_file())
+    if not files:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        return
+    info = {'version': version, 'created': time.time(), 'files': files}
+    if undoes:
+        info['undoes'] = undoes
+    with open(snapshot_dir / SNAPSHOT_INFO_NAME, 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2)
+    prune_snapshots(snapshot_dir.parent.parent, keep)
+
+
+def list_snapshots(install_dir):
+    """Finished snapshots in install_dir as (path, info), oldest first"""
+    snapshots = []
+    root = Path(install_dir) / SNAPSHOT_DIR_NAME
+    if not root.is_dir():
+        return snapshots
+    for snapshot_dir in root.iterdir():
+        try:
+            with open(snapshot_dir / SNAPSHOT_INFO_NAME, 'r', encoding='utf-8') as f:
+                snapshots.append((snapshot_dir, json.load(f)))
+        except (OSError, ValueError):
+            continue  # Unfinished snapshot
+    snapshots.sort(key=lambda snapshot: snapshot[1].get('created', 0))
+    return snapshots
+
+
+def prune_snapshots(install_dir, keep=KEEP_SNAPSHOTS):
+    """Delete all but the newest keep snapshots, only hardlinks are removed for linked files"""
+    snapshots = list_snapshots(install_dir)
+    for snapshot_dir, info in snapshots[:max(len(snapshots) - keep, 0)]:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        print(f"Removed old backup snapshot: {snapshot_dir.name}")
+
+
+def rollback_snapshot(install_dir, name=None):
+    """Swap a snapshot back into install_dir using renames only
+
+    The files it replaces become a new snapshot marked with 'undoes'. Without
+    a name the newest unmarked snapshot is restored, so rolling back twice goes
+    two versions back instead of swapping the rollback out again; undoing a
+    rollback takes naming its snapshot. Returns the info of the restored snapshot.
+    """
+    snapshots = list_snapshots(install_dir)
+    if name:
+        snapshots = [snapshot for snapshot in snapshots if snapshot[0].name == name]
+        if not snapshots:
+            raise Exception(f"No backup snapshot {name} in {install_dir}")
+    else:
+        snapshots = [snapshot for snapshot in snapshots if not snapshot[1].get('undoes')]
+        if not snapshots:
+            raise Exception(f"No older backup snapshots in {install_dir}, "
+                            "name a snapshot from 'rollback --list' to undo a rollback")
+    snapshot_dir, info = snapshots[-1]
+    
+    install_dir = Path(install_dir)
+    replaced_dir = new_snapshot(install_dir, CURRENT_VERSION)
+    for relative_path in info['files']:
+        current_file = manifest_target(install_dir, relative_path)
+        if current_file.exists():
+            move_file(current_file, manifest_target(replaced_dir, relative_path))
+        move_file(manifest_target(snapshot_dir, relative_path), current_file)
+    
+    shutil.rmtree(snapshot_dir)
+    finish_snapshot(replaced_dir, CURRENT_VERSION, undoes=snapshot_dir.name)
+    return info
+
+
+def read_staged_version(info_path):
+    """Version recorded in a staging info file, None if it is missing or unreadable"""
+    try:
+        with open(info_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('version')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def get_running_install_dir():
+    """Directory with the running application's files, the EXE's folder for frozen builds"""
+    if getattr(sys, 'frozen', False):
+        # The bootloader sets sys.executable to the EXE itself, not the _MEI extraction folder
+        return Path(sys.executable).resolve().parent
+    return Path(__file__).resolve().parent
+
+
+def apply_staged_update(install_dir=None):
+    """Swap in an update staged by AutoUpdater.stage_update, call before QApplication exists
+
+    Files are renamed into place (a running EXE can be renamed on Windows,
+    just not overwritten) and the replaced ones are renamed into a backup snapshot.
+    Returns True if an update was applied and the application should relaunch.
+    """
+    stage_dir = Path(install_dir or get_running_install_dir()) / STAGED_DIR_NAME
+    info_path = stage_dir / STAGED_INFO_NAME
+    if not info_path.exists():
+        return False
+    
+    try:
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        
+        if not AutoUpdater.compare_versions(CURRENT_VERSION, info['version']):
+            print(f"Discarding staged update {info['version']}, running {CURRENT_VERSION}")
+            shutil.rmtree(stage_dir, ignore_errors=True)
+            return False
+        
+        target_dir = Path(info['target_dir'])
+        files = [(stage_dir / "files" / relative_path, manifest_target(target_dir, target_path), size)
+                 for relative_path, target_path, size in info['files']]
+        for staged_file, _, size in files:
+            if not staged_file.is_file() or staged_file.stat().st_size != size:
+                raise Exception(f"Staged file is incomplete: {staged_file}")
+        
+        backup_dir = new_snapshot(target_dir, CURRENT_VERSION)
+    except Exception as e:
+        print(f"Staged update is unusable, discarding it: {e}")
+        shutil.rmtree(stage_dir, ignore_errors=True)
+        return False
+    
+    # Undo the renames if any file can't be swapped
+    moved = []
+    try:
+        for staged_file, target_file, _ in files:
+            backup_file = backup_dir / target_file.relative_to(target_dir)
+            if target_file.exists():
+                move_file(target_file, backup_file)
+                moved.append((backup_file, target_file))
+            move_file(staged_file, target_file)
+            moved.append((target_file, staged_file))
+    except Exception as e:
+        print(f"Applying staged update failed, restoring files: {e}")
+        for source, destination in reversed(moved):
+            move_file(source, destination)
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        return False
+    
+    finish_snapshot(backup_dir, CURRENT_VERSION)
+    shutil.rmtree(stage_dir, ignore_errors=True)
+    print(f"Applied staged update to version {info['version']} ({len(files)} files)")
+    return True
+
+
+def relaunch_application():
+    """Start the application again with the same arguments and exit this process"""
+    if getattr(sys, 'frozen', False):
+        # Without this the new onefile process would reuse our _MEI folder, which is deleted when we exit.
+        # PyInstaller >= 6.9 honours the reset variable, older bootloaders only look at the _PYI_/_MEIPASS2 ones
+        env = {key: value for key, value in os.environ.items()
+               if key != '_MEIPASS2' and not key.startswith('_PYI_')}
+        env['PYINSTALLER_RESET_ENVIRONMENT'] = '1'
+        subprocess.Popen([sys.executable] + sys.argv[1:], env=env)
+    else:
+        subprocess.Popen([sys.executable] + sys.argv)
+    sys.exit(0)
+
+
+def extract_zip_member(zip_file, info, destination):
+    """Stream a single ZIP member to destination"""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    with zip_file.open(info) as source, open(destination, 'wb') as target:
+        shutil.copyfileobj(source, target, DOWNLOAD_CHUNK_SIZE)
+
+
+def select_exe_member(zip_file):
+    """Executable in a release ZIP, preferring CS2FontChanger.exe or main.exe, from the central directory"""
+    exe_members = [info for info in zip_file.infolist()
+                   if not info.is_dir() and info.filename.lower().endswith('.exe')]
+    for info in exe_members:
+        name = PurePosixPath(info.filename).name.lower()
+        if 'cs2fontchanger' in name or 'main' in name:
+            return info
+    return exe_members[0] if exe_members else None
+
+
+def extract_zipball(zip_path, destination):
+    """Extract a GitHub zipball into destination without its top-level directory
+
+    Members are streamed straight to their final path, nothing else is
+    written. Returns the extracted paths relative to destination.
+    """
+    extracted = []
+    with zipfile.ZipFile(zip_path, 'r') as zip_file:
+        for info in zip_file.infolist():
+            parts = PurePosixPath(info.filename).parts
+            # Skip directory entries and the top-level "<repo>-<sha>/" folder itself
+            if info.is_dir() or len(parts) < 2:
+                continue
+            relative_path = '/'.join(parts[1:])
+            extract_zip_member(zip_file, info, manifest_target(destination, relative_path))
+            extracted.append(relative_path)
+    if not extracted:
+        raise Exception("Invalid source package")
+    return extracted
+
+
+def build_source_manifest(source_dir, version):
+    """Manifest of every release file under source_dir with its SHA-256 and size"""
+    source_dir = Path(source_dir)
+    files = {}
+    for path in sorted(source_dir.rglob('*')):
+        relative = path.relative_to(source_dir)
+        if not path.is_file() or path.name.lower().endswith(MANIFEST_EXCLUDED_SUFFIXES):
+            continue
+        if MANIFEST_EXCLUDED_NAMES.intersection(relative.parts):
+            continue
+        files[relative.as_posix()] = {'sha256': sha256_file(path), 'size': path.stat().st_size}
+    return {'version': version, 'files': files}
+
+
+def manifest_target(base_dir, relative_path):
+    """Local path for a manifest entry, refusing entries that would escape base_dir"""
+    relative = Path(relative_path)
+    if relative.is_absolute() or '..' in relative.parts or relative.drive:
+        raise ValueError(f"Unsafe path in manifest: {relative_path}")
+    return Path(base_dir) / relative
+
+
+def changed_manifest_files(manifest, base_dir):
+    """Manifest paths whose local copy under base_dir is missing or has a different hash"""
+    changed = []
+    for relative_path, entry in manifest['files'].items():
+        local_path = manifest_target(base_dir, relative_path)
+        if not local_path.is_file() or sha256_file(local_path) != entry['sha256'].lower():
+            changed.append(relative_path)
+    return changed
+
+
+def delta_format_available(patch_format):
+    """Whether the library for a patch format is installed"""
+    if patch_format == 'bsdiff':
+        return BSDIFF_AVAILABLE
+    if patch_format == 'zstpatch':
+        return ZSTD_AVAILABLE
+    return False
+
+
+def find_delta_asset(assets, current_version, latest_version):
+    """Patch asset from current_version to latest_version that can be applied here
+
+    Returns (asset, patch_format), or (None, None) if the release has no usable patch.
+    """
+    current_version = current_version.lower().lstrip('v')
+    latest_version = latest_version.lower().lstrip('v')
+    for asset in assets:
+        match = DELTA_ASSET_PATTERN.search(asset['name'].lower())
+        if not match:
+            continue
+        from_version, to_version, patch_format = match.groups()
+        if from_version == current_version and to_version == latest_version and delta_format_available(patch_format):
+            return asset, patch_format
+    return None, None
+
+
+def zstd_patch_parameters(old_size, new_size):
+    """Compression parameters with a window that reaches back over the whole old file"""
+    window_log = max(10, min(31, (old_size + new_size).bit_length()))
+    return zstandard.ZstdCompressionParameters.from_level(ZSTD_PATCH_LEVEL, source_size=new_size,
+                                                          window_log=window_log, enable_ldm=True)
+
+
+def apply_delta_patch(old_path, patch_path, new_path, patch_format):
+    """Rebuild new_path from old_path and a bsdiff or zstd --patch-from patch"""
+    if patch_format == 'bsdiff':
+        if not BSDIFF_AVAILABLE:
+            raise RuntimeError("bsdiff4 is not installed")
+        bsdiff4.file_patch(str(old_path), str(new_path), str(patch_path))
+    elif patch_format == 'zstpatch':
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is not installed")
+        # The old file is the dictionary, like zstd --patch-from
+        dictionary = zstandard.ZstdCompressionDict(Path(old_path).read_bytes(),
+                                                   dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary, max_window_size=2 ** 31)
+        with open(patch_path, 'rb') as source, open(new_path, 'wb') as destination:
+            decompressor.copy_stream(source, destination)
+    else:
+        raise ValueError(f"Unknown patch format: {patch_format}")
+
+
+def create_delta_patch(old_path, new_path, patch_path, patch_format):
+    """Create a patch that turns old_path into new_path, for publishing next to a release"""
+    if patch_format == 'bsdiff':
+        if not BSDIFF_AVAILABLE:
+            raise RuntimeError("bsdiff4 is not installed")
+        bsdiff4.file_diff(str(old_path), str(new_path), str(patch_path))
+    elif patch_format == 'zstpatch':
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is not installed")
+        old_data = Path(old_path).read_bytes()
+        new_data = Path(new_path).read_bytes()
+        dictionary = zstandard.ZstdCompressionDict(old_data, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+        compressor = zstandard.ZstdCompressor(dict_data=dictionary,
+                                              compression_params=zstd_patch_parameters(len(old_data), len(new_data)))
+        Path(patch_path).write_bytes(compressor.compress(new_data))
+    else:
+        raise ValueError(f"Unknown patch format: {patch_format}")
+
 
 class AutoUpdater(QThread if QT_AVAILABLE else object):
     """Auto updater that replaces EXE or source code"""
     updateFound = pyqtSignal(dict) if QT_AVAILABLE else None
+    updateStaged = pyqtSignal(dict) if QT_AVAILABLE else None
     
     def __init__(self):
         if QT_AVAILABLE:
@@ -40,16 +596,23 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
         self.current_dir = Path(__file__).parent
         self.is_exe = self.detect_exe_environment()
         self.temp_dir = None
+        self.delta_report = None
         
         # Get app data directory for persistent script storage
-        if os.name == 'nt':  # Windows
-            self.app_data_dir = Path(os.getenv('APPDATA')) / "cns" / "cs2-font-changer"
-        else:
-            self.app_data_dir = Path.home() / ".config" / "cs2-font-changer"
-        
-        self.setup_dir = self.app_data_dir / "setup"
+        self.setup_dir = get_updater_setup_dir()
+        self.app_data_dir = self.setup_dir.parent
         self.setup_dir.mkdir(parents=True, exist_ok=True)
+        self.release_cache_path = self.setup_dir / "release_cache.json"
+        self.force_check = False  # Bypass the check interval and backoff
+        # Download in the background and apply at the next launch; source checkouts are asked first
+        self.stage_updates = self.is_exe
+        self.background = False  # No dialogs while staging from the worker thread
         
+    @property
+    def stage_dir(self):
+        """Staging folder next to the installed files, see apply_staged_update"""
+        return self.get_install_dir() / STAGED_DIR_NAME
+    
     def detect_exe_environment(self):
         """Detect if running from EXE or source code - improved PyInstaller detection"""
         # Method 1: PyInstaller detection
@@ -76,61 +639,178 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
                 
         return False
     
-    def get_latest_release_info(self):
-        """Get latest release information from GitHub API"""
+    def load_release_cache(self):
+        """Cached release JSON with its ETag, check time and backoff state"""
         try:
-            request = Request(GITHUB_API_URL)
-            request.add_header('User-Agent', 'CS2FontChanger-AutoUpdater')
-            
-            with urlopen(request, timeout=15) as response:
-                if response.status != 200:
-                    return None
-                
+            with open(self.release_cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # A different API URL (e.g. a stand-in release) makes the cache meaningless
+        return cache if cache.get('url') == GITHUB_API_URL else {}
+    
+    def save_release_cache(self, cache):
+        try:
+            with open(self.release_cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+        except OSError as e:
+            print(f"Could not save release cache: {e}")
+    
+    def fetch_release_data(self, force=False):
+        """Latest release JSON, from the cache within RELEASE_CHECK_INTERVAL
+        
+        Otherwise a conditional request is made with If-None-Match, so an
+        unchanged release costs a 304 that doesn't count against GitHub's
+        rate limit. 403/429 responses and network errors back off
+        exponentially and serve the cached release.
+        """
+        cache = self.load_release_cache()
+        data = cache.get('data')
+        now = time.time()
+        
+        if not force:
+            if data and now - cache.get('checked_at', 0) < RELEASE_CHECK_INTERVAL:
+                return data
+            if now < cache.get('backoff_until', 0):
+                print("Release check is backing off after failed checks, using cached release info")
+                return data
+        
+        request = Request(GITHUB_API_URL)
+        request.add_header('User-Agent', 'CS2FontChanger-AutoUpdater')
+        request.add_header('Accept', 'application/vnd.github+json')
+        if data and cache.get('etag'):
+            request.add_header('If-None-Match', cache['etag'])
+        
+        cache['url'] = GITHUB_API_URL
+        try:
+            with urlopen(request, timeout=RELEASE_CHECK_TIMEOUT) as response:
                 data = json.loads(response.read().decode('utf-8'))
+                cache['data'] = data
+                cache['etag'] = response.headers.get('ETag')
+        except HTTPError as e:
+            if e.code == 304 and data:
+                pass  # Unchanged, refresh the check time below
+            elif e.code in (403, 429):
+                delay = self.back_off(cache, now, self.rate_limit_delay(e.headers, now))
+                print(f"Release check rate limited (HTTP {e.code}), next check in {delay / 60:.0f} minutes")
+                return data
+            else:
+                raise
+        except NETWORK_ERRORS as e:
+            # Offline users would otherwise wait for the timeout on every launch
+            delay = self.back_off(cache, now)
+            print(f"Release check failed ({e}), next check in {delay / 60:.0f} minutes")
+            return data
+        
+        cache['checked_at'] = now
+        cache['failures'] = 0
+        cache['backoff_until'] = 0
+        self.save_release_cache(cache)
+        return data
+    
+    def back_off(self, cache, now, min_delay=0):
+        """Record a failed check and delay the next one exponentially, returns the delay in seconds
+        
+        Jitter spreads out the retries of machines behind one NAT.
+        """
+        failures = cache.get('failures', 0) + 1
+        delay = max(min(RELEASE_BACKOFF_BASE * 2 ** (failures - 1), RELEASE_BACKOFF_MAX), min_delay)
+        delay += random.uniform(0, delay / 2)
+        cache['failures'] = failures
+        cache['backoff_until'] = now + delay
+        self.save_release_cache(cache)
+        return delay
+    
+    def rate_limit_delay(self, headers, now):
+        """Seconds until the rate limit resets according to Retry-After or X-RateLimit-Reset, 0 if unknown"""
+        try:
+            if headers.get('Retry-After'):
+                return float(headers['Retry-After'])
+            if headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset'):
+                return max(float(headers['X-RateLimit-Reset']) - now, 0)
+        except (TypeError, ValueError):
+            pass
+        return 0
+    
+    def get_latest_release_info(self, force=False):
+        """Get latest release information from GitHub API (cached, see fetch_release_data)"""
+        try:
+            data = self.fetch_release_data(force)
+            if data is None:
+                return None
+            
+            tag_name = data['tag_name']
+            latest_version = tag_name.lstrip('v')
+            source_url = data['zipball_url']
+            exe_download_url = None
+            exe_sha256 = None
+            exe_size = 0
+            
+            # Look for EXE asset with priority
+            assets = data.get('assets', [])
+            
+            for asset in assets:
+                asset_name = asset['name'].lower()
                 
-                latest_version = data['tag_name'].lstrip('v')
-                source_url = data['zipball_url']
-                exe_download_url = None
-                
-                # Look for EXE asset with priority
-                assets = data.get('assets', [])
-                
+                # Priority: CS2FontChanger.exe > main.exe > any .exe
+                if 'cs2fontchanger' in asset_name and asset_name.endswith('.exe'):
+                    exe_download_url = asset['browser_download_url']
+                    exe_sha256 = parse_asset_digest(asset)
+                    exe_size = asset.get('size', 0)
+                    break
+                elif 'main' in asset_name and asset_name.endswith('.exe'):
+                    exe_download_url = asset['browser_download_url']
+                    exe_sha256 = parse_asset_digest(asset)
+                    exe_size = asset.get('size', 0)
+                    break
+                elif asset_name.endswith('.exe'):
+                    exe_download_url = asset['browser_download_url']
+                    exe_sha256 = parse_asset_digest(asset)
+                    exe_size = asset.get('size', 0)
+                    # Continue looking for better match
+            
+            # If no direct EXE, look for ZIP with EXE
+            if not exe_download_url:
                 for asset in assets:
                     asset_name = asset['name'].lower()
-                    
-                    # Priority: CS2FontChanger.exe > main.exe > any .exe
-                    if 'cs2fontchanger' in asset_name and asset_name.endswith('.exe'):
-                        exe_download_url = asset['browser_download_url']
-                        break
-                    elif 'main' in asset_name and asset_name.endswith('.exe'):
+                    if ('exe' in asset_name or 'executable' in asset_name) and asset_name.endswith('.zip'):
                         exe_download_url = asset['browser_download_url']
+                        exe_sha256 = parse_asset_digest(asset)
+                        exe_size = asset.get('size', 0)
                         break
-                    elif asset_name.endswith('.exe'):
-                        exe_download_url = asset['browser_download_url']
-                        # Continue looking for better match
-                
-                # If no direct EXE, look for ZIP with EXE
-                if not exe_download_url:
-                    for asset in assets:
-                        asset_name = asset['name'].lower()
-                        if ('exe' in asset_name or 'executable' in asset_name) and asset_name.endswith('.zip'):
-                            exe_download_url = asset['browser_download_url']
-                            break
-                
-                return {
-                    'version': latest_version,
-                    'current_version': CURRENT_VERSION,
-                    'needs_update': self.compare_versions(CURRENT_VERSION, latest_version),
-                    'source_url': source_url,
-                    'exe_url': exe_download_url,
-                    'release_notes': data.get('body', 'No release notes available.')
-                }
-                
+            
+            # Per-file manifest for incremental source updates
+            manifest_asset = next((asset for asset in assets if asset['name'].lower() == MANIFEST_ASSET_NAME), None)
+            
+            # Patch from the running version, only usable for a plain EXE with a known hash
+            delta_asset, delta_format = find_delta_asset(assets, CURRENT_VERSION, latest_version)
+            if exe_download_url and exe_download_url.endswith('.zip'):
+                delta_asset = delta_format = None
+            
+            return {
+                'version': latest_version,
+                'tag_name': tag_name,
+                'current_version': CURRENT_VERSION,
+                'needs_update': self.compare_versions(CURRENT_VERSION, latest_version),
+                'source_url': source_url,
+                'exe_url': exe_download_url,
+                'exe_sha256': exe_sha256,
+                'exe_size': exe_size,
+                'delta_url': delta_asset['browser_download_url'] if delta_asset else None,
+                'delta_format': delta_format,
+                'delta_size': delta_asset.get('size', 0) if delta_asset else 0,
+                'delta_sha256': parse_asset_digest(delta_asset) if delta_asset else None,
+                'manifest_url': manifest_asset['browser_download_url'] if manifest_asset else None,
+                'manifest_sha256': parse_asset_digest(manifest_asset) if manifest_asset else None,
+                'release_notes': data.get('body', 'No release notes available.')
+            }
+            
         except Exception as e:
             print(f"Error checking for updates: {e}")
             return None
     
-    def compare_versions(self, current, latest):
+    @staticmethod
+    def compare_versions(current, latest):
         """Compare version strings"""
         try:
             # Handle different version formats
@@ -151,9 +831,20 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
     
     def run(self):
         """Background thread execution"""
-        release_info = self.get_latest_release_info()
+        release_info = self.get_latest_release_info(self.force_check)
         
         if release_info and release_info['needs_update']:
+            if self.stage_updates:
+                try:
+                    self.stage_update(release_info)
+                    if QT_AVAILABLE and self.updateStaged:
+                        self.updateStaged.emit(release_info)
+                    else:
+                        print(f"Version {release_info['version']} will be installed the next time the application starts")
+                    return
+                except Exception as e:
+                    print(f"Staging update failed ({e}), asking to update now instead")
+            
             if QT_AVAILABLE and self.updateFound:
                 self.updateFound.emit(release_info)
             else:
@@ -170,22 +861,110 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
         if response == 'y':
             self.perform_update(release_info)
     
-    def download_file_with_progress(self, url, destination):
+    def stage_update(self, release_info):
+        """Download and verify an update into update_staged/ for apply_staged_update
+        
+        update.json is written last, so a staging that was interrupted is
+        never applied. staging.json names the version being downloaded: the
+        next check for the same version keeps files/ and resumes its .part
+        files, any other version starts over.
+        """
+        info_path = self.stage_dir / STAGED_INFO_NAME
+        staging_path = self.stage_dir / STAGING_INFO_NAME
+        if read_staged_version(info_path) == release_info['version']:
+            print(f"Update {release_info['version']} is already staged")
+            return
+        
+        if read_staged_version(staging_path) == release_info['version']:
+            print(f"Resuming staging of update {release_info['version']}")
+        elif self.stage_dir.exists():
+            shutil.rmtree(self.stage_dir)
+        files_dir = self.stage_dir / "files"
+        files_dir.mkdir(parents=True, exist_ok=True)
+        with open(staging_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': release_info['version']}, f)
+        
+        self.background = True
+        try:
+            if self.is_exe:
+                target_dir, files = self.stage_exe_update(release_info, files_dir)
+            else:
+                target_dir, files = self.stage_source_update(release_info, files_dir)
+        finally:
+            self.background = False
+        
+        info = {
+            'version': release_info['version'],
+            'target_dir': str(target_dir),
+            # [staged path, path relative to target_dir, size]
+            'files': [[staged.relative_to(files_dir).as_posix(), target, staged.stat().st_size]
+                      for staged, target in files],
+        }
+        with open(info_path.with_suffix('.tmp'), 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=2)
+        os.replace(info_path.with_suffix('.tmp'), info_path)
+        staging_path.unlink()
+        print(f"Staged update {release_info['version']} ({len(files)} files) for the next launch")
+    
+    def stage_exe_update(self, release_info, files_dir):
+        """Download the new executable into files_dir, returns (target_dir, [(staged, target)])"""
+        exe_url = release_info.get('exe_url')
+        if not exe_url:
+            raise Exception("No EXE download available for this release")
+        current_exe = self.find_current_executable()
+        if not current_exe or not current_exe.exists():
+            raise Exception("Could not locate current executable")
+        
+        if exe_url.endswith('.zip'):
+            new_exe_path = self.download_and_extract_exe_to_temp(exe_url, files_dir, release_info.get('exe_sha256'))
+        else:
+            new_exe_path = files_dir / current_exe.name
+            if not self.download_delta_update(release_info, current_exe, new_exe_path):
+                if not self.download_file_with_progress(exe_url, new_exe_path, release_info.get('exe_sha256')):
+                    raise Exception("Failed to download new executable")
+        
+        if not new_exe_path or not new_exe_path.exists():
+            raise Exception("Downloaded executable not found")
+        return current_exe.parent, [(new_exe_path, current_exe.name)]
+    
+    def stage_source_update(self, release_info, files_dir):
+        """Download changed source files into files_dir, returns (target_dir, [(staged, target)])"""
+        if release_info.get('manifest_url'):
+            manifest_path = self.stage_dir / MANIFEST_ASSET_NAME
+            download_resumable(release_info['manifest_url'], manifest_path, expected_sha256=release_info.get('manifest_sha256'))
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            manifest_path.unlink()
+            
+            base_url = manifest.get('base_url')
+            base_url = urljoin(release_info['manifest_url'], base_url) if base_url else f"{GITHUB_RAW_URL}/{release_info['tag_name']}/"
+            files_to_update = changed_manifest_files(manifest, self.current_dir)
+            self.download_manifest_files(manifest, files_to_update, base_url, files_dir)
+            return self.current_dir, [(manifest_target(files_dir, path), path) for path in files_to_update]
+        
+        # No manifest, stage the whole zipball
+        zip_path = self.stage_dir / "source.zip"
+        if not self.download_file_with_progress(release_info['source_url'], zip_path):
+            raise Exception("Failed to download source code")
+        extracted = extract_zipball(zip_path, files_dir)
+        zip_path.unlink()
+        return self.current_dir, [(manifest_target(files_dir, path), path) for path in extracted]
+    
+    def download_file_with_progress(self, url, destination, expected_sha256=None):
         """Download file with progress bar"""
         try:
-            if QT_AVAILABLE:
-                return self.download_with_gui_progress(url, destination)
+            if QT_AVAILABLE and not self.background:
+                return self.download_with_gui_progress(url, destination, expected_sha256)
             else:
-                return self.download_with_console_progress(url, destination)
+                return self.download_with_console_progress(url, destination, expected_sha256)
         except Exception as e:
             print(f"Download failed: {e}")
             return False
     
-    def download_with_gui_progress(self, url, destination):
+    def download_with_gui_progress(self, url, destination, expected_sha256=None):
         """Download with PyQt progress dialog"""
         from PyQt5.QtWidgets import QProgressDialog
         from PyQt5.QtCore import Qt
-        import urllib.request
         
         # Create progress dialog
         progress = QProgressDialog("Downloading update...", "Cancel", 0, 100)
@@ -194,50 +973,42 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
         progress.setMinimumDuration(0)
         progress.show()
         
-        def progress_hook(block_num, block_size, total_size):
+        def progress_hook(downloaded, total_size):
             if total_size > 0:
-                downloaded = block_num * block_size
                 percent = min(int((downloaded / total_size) * 100), 100)
                 progress.setValue(percent)
                 progress.setLabelText(f"Downloading update... {percent}% ({downloaded // 1024} KB / {total_size // 1024} KB)")
-                
-                # Process events to keep GUI responsive
-                QApplication.processEvents()
-                
-                # Check if user cancelled
-                if progress.wasCanceled():
-                    raise Exception("Download cancelled by user")
+            
+            # Process events to keep GUI responsive (throttled by download_resumable)
+            QApplication.processEvents()
         
         try:
             print(f"Downloading from: {url}")
-            urllib.request.urlretrieve(url, destination, progress_hook)
+            digest = download_resumable(url, destination, progress_hook, expected_sha256,
+                                        cancel_check=progress.wasCanceled)
             progress.setValue(100)
             progress.close()
-            print(f"Download completed: {destination}")
+            print(f"Download completed: {destination} (SHA-256 {digest})")
             return True
         except Exception as e:
             progress.close()
-            if "cancelled" not in str(e).lower():
+            if not isinstance(e, DownloadCancelled):
                 if QT_AVAILABLE:
                     QMessageBox.critical(None, "Download Error", f"Failed to download update:\n{str(e)}")
             raise
     
-    def download_with_console_progress(self, url, destination):
+    def download_with_console_progress(self, url, destination, expected_sha256=None):
         """Download with console progress"""
-        import urllib.request
-        import sys
-        
-        def progress_hook(block_num, block_size, total_size):
+        def progress_hook(downloaded, total_size):
             if total_size > 0:
-                downloaded = block_num * block_size
                 percent = min(int((downloaded / total_size) * 100), 100)
                 sys.stdout.write(f"\rDownloading: {percent}% ({downloaded // 1024} KB / {total_size // 1024} KB)")
                 sys.stdout.flush()
         
         try:
             print(f"Downloading from: {url}")
-            urllib.request.urlretrieve(url, destination, progress_hook)
-            print(f"\nDownload completed: {destination}")
+            digest = download_resumable(url, destination, progress_hook, expected_sha256)
+            print(f"\nDownload completed: {destination} (SHA-256 {digest})")
             return True
         except Exception as e:
             print(f"\nDownload failed: {e}")
@@ -246,20 +1017,21 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
     def perform_update(self, release_info):
         """Perform the actual update"""
         try:
-            # Create backup directory
-            backup_dir = self.current_dir / "backup_before_update"
-            if backup_dir.exists():
-                shutil.rmtree(backup_dir)
-            backup_dir.mkdir()
-            print(f"Created backup directory: {backup_dir}")
+            # Hardlinked snapshot of the files about to be replaced
+            backup_dir = new_snapshot(self.get_install_dir(), CURRENT_VERSION)
+            print(f"Created backup snapshot: {backup_dir}")
             
             success = False
-            if self.is_exe:
-                print("Detected EXE environment - performing EXE update")
-                success = self.update_exe_version(release_info, backup_dir)
-            else:
-                print("Detected source environment - performing source update")
-                success = self.update_source_version(release_info, backup_dir)
+            try:
+                if self.is_exe:
+                    print("Detected EXE environment - performing EXE update")
+                    success = self.update_exe_version(release_info, backup_dir)
+                else:
+                    print("Detected source environment - performing source update")
+                    success = self.update_source_version(release_info, backup_dir)
+            finally:
+                # The update helpers exit the process, so this can't wait for a return
+                finish_snapshot(backup_dir, CURRENT_VERSION)
             
             if not success:
                 raise Exception("Update process failed")
@@ -270,6 +1042,14 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
             if QT_AVAILABLE:
                 QMessageBox.critical(None, "Update Failed", error_msg)
     
+    def get_install_dir(self):
+        """Directory with the installed files, the EXE's folder for frozen builds"""
+        if self.is_exe:
+            current_exe = self.find_current_executable()
+            if current_exe:
+                return current_exe.parent
+        return self.current_dir
+    
     def update_exe_version(self, release_info, backup_dir):
         """Update EXE version - downloads to temp folder and uses batch helper"""
         exe_url = release_info.get('exe_url')
@@ -311,11 +1091,12 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
             
             # Download new executable to temp directory
             if exe_url.endswith('.zip'):
-                new_exe_path = self.download_and_extract_exe_to_temp(exe_url, update_temp_dir)
+                new_exe_path = self.download_and_extract_exe_to_temp(exe_url, update_temp_dir, release_info.get('exe_sha256'))
             else:
                 new_exe_path = update_temp_dir / current_exe.name
-                if not self.download_file_with_progress(exe_url, new_exe_path):
-                    raise Exception("Failed to download new executable")
+                if not self.download_delta_update(release_info, current_exe, new_exe_path):
+                    if not self.download_file_with_progress(exe_url, new_exe_path, release_info.get('exe_sha256')):
+                        raise Exception("Failed to download new executable")
             
             if not new_exe_path or not new_exe_path.exists():
                 raise Exception("Downloaded executable not found")
@@ -323,8 +1104,7 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
             print(f"Downloaded new executable to: {new_exe_path}")
             
             # Backup current executable
-            backup_exe = backup_dir / current_exe.name
-            shutil.copy2(current_exe, backup_exe)
+            backup_exe = link_or_copy(current_exe, backup_dir / current_exe.name)
             print(f"Backed up current executable to: {backup_exe}")
             
             # Create and execute helper batch script
@@ -336,44 +1116,56 @@ class AutoUpdater(QThread if QT_AVAILABLE else object):
             print(f"EXE update failed: {e}")
             raise
     
-    def download_and_extract_exe_to_temp(self, zip_url, temp_dir):
+    def download_delta_update(self, release_info, current_exe, new_exe_path):
+        """Build the new executable from a patch asset, returns False to fall back to the full download"""
+        delta_url = release_info.get('delta_url')
+        expected_sha256 = release_info.get('exe_sha256')
+        # Without the new EXE's hash a bad patch result couldn't be detected
+        if not delta_url or not expected_sha256:
+            return False
+        
+        patch_format = release_info['delta_format']
+        patch_path = new_exe_path.with_name(f"{new_exe_path.name}.{patch_format}")
+        try:
+            if not self.download_file_with_progress(delta_url, patch_path, release_info.get('delta_sha256')):
+                return False
+            
+            apply_delta_patch(current_exe, patch_path, new_exe_path, patch_format)
+            digest = sha256_file(new_exe_path)
+            if digest != expected_sha256.lower():
+                raise ChecksumMismatch(f"Patched executable has SHA-256 {digest}, expected {expected_sha256}")
+            
+            patch_size = patch_path.stat().st_size
+        except Exception as e:
+            print(f"Delta update failed ({e}), falling back to full download")
+            new_exe_path.unlink(missing_ok=True)
+            return False
+        finally:
+            patch_path.unlink(missing_ok=True)
+        
+        full_size = release_info.get('exe_size') or new_exe_path.stat().st_size
+        saved = max(full_size - patch_size, 0)
+        self.delta_report = (f"Delta update ({patch_format}): downloaded {patch_size / (1024 * 1024):.1f} MB "
+                             f"instead of {full_size / (1024 * 1024):.1f} MB, "
+                             f"saved {saved / (1024 * 1024):.1f} MB ({saved} bytes)")
+        print(self.delta_report)
+        return True
+    
+    def download_and_extract_exe_to_temp(self, zip_url, temp_dir, expected_sha256=None):
         """Download ZIP and extract EXE to temp directory"""
         zip_path = temp_dir / "executable.zip"
-        if not self.download_file_with_progress(zip_url, zip_path):
+        if not self.download_file_with_progress(zip_url, zip_path, expected_sha256):
             return None
         
-        extract_dir = temp_dir / "extracted"
-        extract_dir.mkdir()
-        
+        # Only the EXE is extracted, straight to the temp root
         with zipfile.ZipFile(zip_path, 'r') as zip_file:
-            zip_file.extractall(extract_dir)
-        
-        # Find EXE in extracted files
-        exe_files = list(extract_dir.rglob("*.exe"))
-        if not exe_files:
-            return None
-        
-        # Prefer CS2FontChanger.exe or main.exe
-        selected_exe = None
-        for exe_file in exe_files:
-            if 'cs2fontchanger' in exe_file.name.lower():
-                selected_exe = exe_file
-                break
-            elif 'main' in exe_file.name.lower():
-                selected_exe = exe_file
-                break
-        
-        if not selected_exe:
-            selected_exe = exe_files[0]  # Return first EXE found
+            exe_member = select_exe_member(zip_file)
+            if not exe_member:
+                return None
+            final_exe_path = temp_dir / PurePosixPath(exe_member.filename).name
+            extract_zip_member(zip_file, exe_member, final_exe_path)
         
-        # Move EXE to temp root and clean up
-        final_exe_path = temp_dir / selected_exe.name
-        shutil.move(selected_exe, final_exe_path)
-        
-        # Clean up extraction
-        shutil.rmtree(extract_dir)
         zip_path.unlink()
-        
         return final_exe_path
     
     def create_update_helper_batch(self, current_exe, new_exe_path, update_temp_dir, version):
@@ -420,8 +1212,10 @@ del "%~f0"
             
             # Show completion message for EXE update - manual restart required
             if QT_AVAILABLE:
+                delta_note = f"{self.delta_report}\n\n" if self.delta_report else ""
                 QMessageBox.information(None, "Update Ready", 
                                       f"Update downloaded successfully!\n\n"
+                                      f"{delta_note}"
                                       f"The application will now close and update to version {version}.\n\n"
                                       f"Update completed. Please relaunch the application")
                 QApplication.quit()
@@ -519,25 +1313,13 @@ del "%~f0"
         if not self.download_file_with_progress(zip_url, zip_path):
             return None
         
-        extract_dir = self.temp_dir / "extracted"
-        extract_dir.mkdir()
-        
         with zipfile.ZipFile(zip_path, 'r') as zip_file:
-            zip_file.extractall(extract_dir)
-        
-        # Find EXE in extracted files
-        exe_files = list(extract_dir.rglob("*.exe"))
-        if not exe_files:
-            return None
-        
-        # Prefer CS2FontChanger.exe or main.exe
-        for exe_file in exe_files:
-            if 'cs2fontchanger' in exe_file.name.lower():
-                return exe_file
-            elif 'main' in exe_file.name.lower():
-                return exe_file
-        
-        return exe_files[0]  # Return first EXE found
+            exe_member = select_exe_member(zip_file)
+            if not exe_member:
+                return None
+            exe_path = self.temp_dir / PurePosixPath(exe_member.filename).name
+            extract_zip_member(zip_file, exe_member, exe_path)
+        return exe_path
     
     def create_replacement_script(self, current_exe, new_exe, version):
         """Create update script in AppData setup directory for reliable replacement"""
@@ -689,59 +1471,47 @@ REM (goto) 2>nul & del "%~f0"
             
             print(f"Created temp update directory: {update_temp_dir}")
             
+            if release_info.get('manifest_url'):
+                try:
+                    return self.update_source_incremental(release_info, backup_dir, update_temp_dir)
+                except Exception as e:
+                    print(f"Incremental update failed ({e}), downloading the full source instead")
+                    shutil.rmtree(update_temp_dir)
+                    update_temp_dir.mkdir(parents=True)
+            
             # Download source ZIP to temp directory
             zip_path = update_temp_dir / "source.zip"
             if not self.download_file_with_progress(source_url, zip_path):
                 raise Exception("Failed to download source code")
             
-            # Extract source to temp directory
-            extract_dir = update_temp_dir / "extracted"
-            extract_dir.mkdir()
-            
-            with zipfile.ZipFile(zip_path, 'r') as zip_file:
-                zip_file.extractall(extract_dir)
-            
-            repo_dirs = [d for d in extract_dir.iterdir() if d.is_dir()]
-            if not repo_dirs:
-                raise Exception("Invalid source package")
-            
-            source_dir = repo_dirs[0]
-            print(f"Extracted source to: {source_dir}")
+            # Extract source straight into the update temp root, without the zipball's top-level folder
+            extracted = extract_zipball(zip_path, update_temp_dir)
+            zip_path.unlink()
+            print(f"Extracted {len(extracted)} source files to: {update_temp_dir}")
             
-            # Move ALL source files and directories to update temp root
+            # Top-level files and directories are replaced as a whole
             files_to_update = []
             dirs_to_update = []
-            
-            # Get all items from source directory
-            for item in source_dir.iterdir():
-                if item.is_file():
-                    dest_file = update_temp_dir / item.name
-                    shutil.move(item, dest_file)
-                    files_to_update.append(item.name)
-                    print(f"Prepared file for update: {item.name}")
-                elif item.is_dir():
-                    dest_dir = update_temp_dir / item.name
-                    shutil.move(item, dest_dir)
-                    dirs_to_update.append(item.name)
-                    print(f"Prepared directory for update: {item.name}")
-            
-            # Clean up extraction artifacts
-            shutil.rmtree(extract_dir)
-            zip_path.unlink()
+            for relative_path in extracted:
+                top_level, _, rest = relative_path.partition('/')
+                if not rest:
+                    files_to_update.append(top_level)
+                    print(f"Prepared file for update: {top_level}")
+                elif top_level not in dirs_to_update:
+                    dirs_to_update.append(top_level)
+                    print(f"Prepared directory for update: {top_level}")
             
             # Backup ALL existing files and directories that will be replaced
             for file_name in files_to_update:
                 current_file = self.current_dir / file_name
                 if current_file.exists():
-                    backup_file = backup_dir / file_name
-                    shutil.copy2(current_file, backup_file)
+                    link_or_copy(current_file, backup_dir / file_name)
                     print(f"Backed up file: {file_name}")
             
             for dir_name in dirs_to_update:
                 current_dir_path = self.current_dir / dir_name
                 if current_dir_path.exists():
-                    backup_dir_path = backup_dir / dir_name
-                    shutil.copytree(current_dir_path, backup_dir_path)
+                    shutil.copytree(current_dir_path, backup_dir / dir_name, copy_function=link_or_copy)
                     print(f"Backed up directory: {dir_name}")
             
             print(f"Prepared {len(files_to_update)} files and {len(dirs_to_update)} directories for update")
@@ -755,6 +1525,75 @@ REM (goto) 2>nul & del "%~f0"
             print(f"Source update failed: {e}")
             raise
     
+    def update_source_incremental(self, release_info, backup_dir, update_temp_dir):
+        """Update only the source files whose hash differs from the release manifest"""
+        manifest_path = update_temp_dir / MANIFEST_ASSET_NAME
+        download_resumable(release_info['manifest_url'], manifest_path, expected_sha256=release_info.get('manifest_sha256'))
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        manifest_path.unlink()
+        
+        # File URLs are relative to the manifest's base_url, or the raw files of the release tag
+        base_url = manifest.get('base_url')
+        if base_url:
+            base_url = urljoin(release_info['manifest_url'], base_url)
+        else:
+            base_url = f"{GITHUB_RAW_URL}/{release_info['tag_name']}/"
+        
+        files_to_update = changed_manifest_files(manifest, self.current_dir)
+        if not files_to_update:
+            print("All source files already match the release manifest")
+            if QT_AVAILABLE:
+                QMessageBox.information(None, "Update", f"All files already match version {release_info['version']}.")
+            return True
+        
+        total_bytes = sum(manifest['files'][path]['size'] for path in files_to_update)
+        print(f"Downloading {len(files_to_update)} of {len(manifest['files'])} files ({total_bytes // 1024} KB)")
+        self.download_manifest_files(manifest, files_to_update, base_url, update_temp_dir)
+        
+        # Back up only the files that will be replaced
+        for relative_path in files_to_update:
+            current_file = manifest_target(self.current_dir, relative_path)
+            if current_file.exists():
+                link_or_copy(current_file, manifest_target(backup_dir, relative_path))
+                print(f"Backed up file: {relative_path}")
+        
+        self.create_source_update_helper_batch(files_to_update, [], update_temp_dir, release_info['version'])
+        return True
+    
+    def download_manifest_files(self, manifest, files_to_update, base_url, update_temp_dir):
+        """Download changed manifest files into update_temp_dir, verifying each SHA-256"""
+        progress = None
+        if QT_AVAILABLE and not self.background:
+            from PyQt5.QtWidgets import QProgressDialog
+            from PyQt5.QtCore import Qt
+            progress = QProgressDialog("Downloading update...", "Cancel", 0, len(files_to_update))
+            progress.setWindowTitle("CS2 Font Changer Updater")
+            progress.setWindowModality(Qt.WindowModal)
+            progress.setMinimumDuration(0)
+            progress.show()
+        
+        try:
+            for index, relative_path in enumerate(files_to_update):
+                if progress:
+                    progress.setValue(index)
+                    progress.setLabelText(f"Downloading update... {relative_path} ({index + 1}/{len(files_to_update)})")
+                    QApplication.processEvents()
+                else:
+                    print(f"Downloading ({index + 1}/{len(files_to_update)}): {relative_path}")
+                
+                destination = manifest_target(update_temp_dir, relative_path)
+                if destination.is_file() and sha256_file(destination) == manifest['files'][relative_path]['sha256'].lower():
+                    continue  # Finished by an interrupted staging of this version
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                download_resumable(urljoin(base_url, quote(relative_path)), destination,
+                                   expected_sha256=manifest['files'][relative_path]['sha256'],
+                                   cancel_check=progress.wasCanceled if progress else None,
+                                   expected_size=manifest['files'][relative_path].get('size'))
+        finally:
+            if progress:
+                progress.close()
+    
     def create_source_update_helper_batch(self, files_to_update, dirs_to_update, update_temp_dir, version):
         """Create update_helper.bat script for source code update - handles all files and directories"""
         script_path = self.setup_dir / "update_helper.bat"
@@ -775,6 +1614,9 @@ REM (goto) 2>nul & del "%~f0"
         for file_name in files_to_update:
             new_file = update_temp_dir / file_name
             current_file = self.current_dir / file_name
+            if current_file.parent != self.current_dir:
+                # Files from an incremental update can live in subdirectories that don't exist yet
+                move_commands.append(f'if not exist "{current_file.parent}" mkdir "{current_file.parent}"')
             move_commands.append(f'move "{new_file}" "{current_file}"')
         
         # Build move commands for new directories
@@ -871,6 +1713,7 @@ class UpdateManager:
         
         if QT_AVAILABLE and self.updater.updateFound:
             self.updater.updateFound.connect(self.show_update_dialog)
+            self.updater.updateStaged.connect(self.show_update_staged)
     
     def start_background_check(self):
         """Start background update check"""
@@ -880,6 +1723,15 @@ class UpdateManager:
             thread = threading.Thread(target=self.updater.run, daemon=True)
             thread.start()
     
+    def show_update_staged(self, release_info):
+        """Let the user know a staged update will be installed on the next start, without blocking"""
+        message = (f"Version {release_info['version']} has been downloaded and will be installed "
+                   f"the next time CS2 Font Changer starts")
+        if hasattr(self.parent, 'log_message'):
+            self.parent.log_message(f"<span style='color: #2ecc71'>Update</span> {message}")
+        else:
+            print(message)
+    
     def show_update_dialog(self, release_info):
         """Show update dialog when update is found"""
         if not QT_AVAILABLE:
@@ -925,12 +1777,72 @@ def check_for_updates_silent(parent_widget=None):
 
 def main():
     """Standalone updater execution"""
+    parser = argparse.ArgumentParser(description="CS2 Font Changer updater")
+    parser.add_argument('--force', action='store_true', help="Check for updates even within the check interval")
+    parser.add_argument('--stage', action='store_true', help="Stage the update for the next launch instead of asking")
+    commands = parser.add_subparsers(dest='command')
+    download_parser = commands.add_parser('download', help="Download a file with resume and SHA-256 verification")
+    download_parser.add_argument('url')
+    download_parser.add_argument('destination')
+    download_parser.add_argument('--sha256', help="Expected SHA-256 of the file")
+    delta_parser = commands.add_parser('make-delta', help="Create a patch asset between two executables")
+    delta_parser.add_argument('old_exe')
+    delta_parser.add_argument('new_exe')
+    delta_parser.add_argument('patch', help="Output file, e.g. CS2FontChanger-1.2.0-to-1.3.0.bsdiff")
+    delta_parser.add_argument('--format', choices=['bsdiff', 'zstpatch'], default='bsdiff')
+    manifest_parser = commands.add_parser('make-manifest', help="Create the source manifest asset for a release")
+    manifest_parser.add_argument('source_dir')
+    manifest_parser.add_argument('manifest', help=f"Output file, published as {MANIFEST_ASSET_NAME}")
+    manifest_parser.add_argument('--version', default=CURRENT_VERSION)
+    rollback_parser = commands.add_parser('rollback', help="Swap a backup snapshot back into place (renames, no copying)")
+    rollback_parser.add_argument('snapshot', nargs='?', help="Snapshot name (default: the newest one not made by a rollback)")
+    rollback_parser.add_argument('--dir', help="Install directory (default: this installation)")
+    rollback_parser.add_argument('--list', action='store_true', help="List the snapshots instead")
+    args = parser.parse_args()
+    
+    if args.command == 'download':
+        def progress_hook(downloaded, total_size):
+            sys.stdout.write(f"\rDownloading: {downloaded // 1024} KB / {total_size // 1024} KB")
+            sys.stdout.flush()
+        digest = download_resumable(args.url, args.destination, progress_hook, args.sha256)
+        print(f"\nSHA-256: {digest}")
+        return
+    
+    if args.command == 'rollback':
+        install_dir = Path(args.dir) if args.dir else AutoUpdater().get_install_dir()
+        if args.list:
+            for snapshot_dir, info in list_snapshots(install_dir):
+                created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info['created']))
+                undoes = f", undoes rollback to {info['undoes']}" if info.get('undoes') else ""
+                print(f"{snapshot_dir.name}  version {info['version']}, {len(info['files'])} files, {created}{undoes}")
+            return
+        info = rollback_snapshot(install_dir, args.snapshot)
+        print(f"Rolled back {len(info['files'])} files to version {info['version']} in {install_dir}")
+        return
+    
+    if args.command == 'make-manifest':
+        manifest = build_source_manifest(args.source_dir, args.version)
+        with open(args.manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        print(f"Wrote {len(manifest['files'])} files to {args.manifest}")
+        return
+    
+    if args.command == 'make-delta':
+        create_delta_patch(args.old_exe, args.new_exe, args.patch, args.format)
+        patch_size = Path(args.patch).stat().st_size
+        new_size = Path(args.new_exe).stat().st_size
+        print(f"Patch: {patch_size} bytes for a {new_size} byte executable ({patch_size / new_size:.1%})")
+        print(f"New executable SHA-256: {sha256_file(args.new_exe)}")
+        return
+    
     if QT_AVAILABLE:
         app = QApplication.instance()
         if app is None:
             app = QApplication(sys.argv)
     
     updater = AutoUpdater()
+    updater.force_check = args.force
+    updater.stage_updates = args.stage
     updater.run()
     
     if QT_AVAILABLE and QApplication.instance():